@@ -46,8 +46,12 @@ def log_tool_call(
     result: Optional[str] = None,
     error: Optional[str] = None,
     duration_ms: Optional[int] = None,
+    details: Optional[Dict[str, Any]] = None,
 ):
-    """Log an MCP tool call."""
+    """Log an MCP tool call.
+
+    details: optional per-call diagnostics (coalescing, timings, ...) stored as-is.
+    """
     entry = {
         "type": "tool_call",
         "mcp": mcp_name,
@@ -60,6 +64,8 @@ def log_tool_call(
         "success": error is None,
         "error": error,
     }
+    if details:
+        entry["details"] = details
     _write_log(LOG_FILE, entry)
 
 
@@ -97,6 +103,42 @@ def log_session_event(
     _write_log(SESSION_LOG_FILE, entry)
 
 
+def get_connection_usage(mcp_name: str, max_bytes: int = 2_000_000) -> Dict[str, Dict[str, Any]]:
+    """Summarize recent successful tool calls per connection.
+
+    Reads only the last max_bytes of the activity log. Returns
+    {connection: {"calls": n, "last": iso time, "modules": {module: n}, "resources": {resource: n}}},
+    with modules from run calls and resources from graph_request calls.
+    """
+    usage = {}
+    try:
+        with open(LOG_FILE, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - max_bytes))
+            if size > max_bytes:
+                f.readline()  # Skip the partial first line
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                connection = entry.get("connection")
+                if entry.get("type") != "tool_call" or entry.get("mcp") != mcp_name or not connection or not entry.get("success"):
+                    continue
+                stats = usage.setdefault(connection, {"calls": 0, "last": None, "modules": {}, "resources": {}})
+                stats["calls"] += 1
+                stats["last"] = entry.get("logged_at")
+                args = entry.get("arguments") or {}
+                if args.get("module"):
+                    stats["modules"][args["module"]] = stats["modules"].get(args["module"], 0) + 1
+                if entry.get("tool") == "graph_request":
+                    resource = args.get("resource") or "graph"
+                    stats["resources"][resource] = stats["resources"].get(resource, 0) + 1
+    except Exception:
+        pass
+    return usage
+
+
 def get_session_history(
     tenant: Optional[str] = None,
     module: Optional[str] = None,
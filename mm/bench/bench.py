@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for mm's graph_request against a local fake Graph server.
+
+Drives server.call_tool in-process at a configurable concurrency, with Graph,
+Flow and token traffic pointed at fake_graph.py (started as a subprocess
+unless --fake-url is given). Token acquisition is replaced by a fake MSAL path:
+one POST to the fake token endpoint per connection/resource, then served from
+memory, like MSAL's in-process cache.
+
+Writes machine-readable JSON (latency percentiles, throughput, bytes, peak RSS)
+that can be diffed across versions with --baseline.
+
+Usage:
+    python mm/bench/bench.py --concurrency 16 --requests 500 --output bench.json
+    python mm/bench/bench.py --scenarios me,batch --throttle-rate 0.05
+    python mm/bench/bench.py --output new.json --baseline old.json
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+BENCH_DIR = Path(__file__).parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+import server  # noqa: E402  (mm/server.py)
+
+try:
+    import mcp_logger
+except ImportError:
+    mcp_logger = None
+
+
+# === Scenarios ===
+# Each builds graph_request arguments for request number i on a connection.
+
+def _scenario_me(i, conn, args):
+    return {"connection": conn, "endpoint": "/me"}
+
+
+def _scenario_paged(i, conn, args):
+    pages = max(1, args.total_items // args.page_size)
+    return {"connection": conn, "endpoint": f"/bench/items?$top={args.page_size}&$skiptoken={(i % pages) * args.page_size}"}
+
+
+def _scenario_large(i, conn, args):
+    return {"connection": conn, "endpoint": "/bench/large"}
+
+
+def _scenario_batch(i, conn, args):
+    return {
+        "connection": conn,
+        "endpoint": "/$batch",
+        "method": "POST",
+        "body": {"requests": [{"id": str(n), "method": "GET", "url": "/me"} for n in range(args.batch_size)]},
+    }
+
+
+def _scenario_flow(i, conn, args):
+    return {"connection": conn, "endpoint": "/providers/Microsoft.ProcessSimple/environments", "resource": "flow"}
+
+
+SCENARIOS = {
+    "me": _scenario_me,
+    "paged": _scenario_paged,
+    "large": _scenario_large,
+    "batch": _scenario_batch,
+    "flow": _scenario_flow,
+}
+
+
+# === Fake environment ===
+
+def _start_fake_server(args) -> tuple:
+    """Start fake_graph.py as a subprocess. Returns (process, base_url)."""
+    cmd = [
+        sys.executable, str(BENCH_DIR / "fake_graph.py"),
+        "--port", str(args.port),
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--token-latency-ms", str(args.token_latency_ms),
+        "--total-items", str(args.total_items),
+        "--payload-kb", str(args.payload_kb),
+        "--throttle-rate", str(args.throttle_rate),
+        "--retry-after", str(args.retry_after),
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    proc.stdout.readline()  # "listening" banner
+    return proc, f"http://127.0.0.1:{args.port}"
+
+
+def _install_fakes(fake_url: str, connections: list, workdir: Path):
+    """Point mm at the fake server, a temp registry and a temp activity log."""
+    for name in ("graph", "flow"):
+        server.RESOURCE_CONFIGS[name] = {**server.RESOURCE_CONFIGS[name], "base_url": fake_url}
+
+    registry = {"connections": {
+        name: {"appId": "00000000-0000-0000-0000-00000000bench", "tenant": "bench.example",
+               "tenantId": "bench-tenant", "description": "benchmark", "mcps": ["mm"]}
+        for name in connections
+    }}
+    server.CONNECTIONS_FILE = workdir / "connections.json"
+    server.CONNECTIONS_FILE.write_text(json.dumps(registry))
+
+    if mcp_logger:
+        mcp_logger.LOG_FILE = workdir / "mcp-activity.jsonl"
+
+    tokens = {}
+    tokens_lock = threading.Lock()
+    token_client = httpx.Client()
+
+    def fake_acquire(connection, conn_config, scopes=None, resource="graph", interactive=True):
+        key = (connection, resource)
+        with tokens_lock:
+            if key in tokens:
+                return {"access_token": tokens[key]}
+        resp = token_client.post(f"{fake_url}/{conn_config['tenantId']}/oauth2/v2.0/token",
+                                 data={"grant_type": "refresh_token", "scope": " ".join(scopes or [])})
+        token = resp.json()["access_token"]
+        with tokens_lock:
+            tokens[key] = token
+        return {"access_token": token}
+
+    server._acquire_graph_token = fake_acquire
+
+
+# === Measurement ===
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _peak_rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _fake_stats(client: httpx.Client, fake_url: str) -> dict:
+    return client.get(f"{fake_url}/_bench/stats").json()
+
+
+async def _run_scenario(name: str, args, connections: list, fake_url: str, client: httpx.Client) -> dict:
+    build = SCENARIOS[name]
+    client.post(f"{fake_url}/_bench/reset")
+    latencies = []
+    errors = 0
+    bytes_returned = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors, bytes_returned
+        while next_index < args.requests:
+            i = next_index
+            next_index += 1
+            arguments = build(i, connections[i % len(connections)], args)
+            start = time.perf_counter()
+            result = await server.call_tool("graph_request", arguments)
+            latencies.append((time.perf_counter() - start) * 1000)
+            text = result[0].text if result else ""
+            bytes_returned += len(text.encode())
+            if text.startswith("Error:"):
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    upstream = _fake_stats(client, fake_url)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50), 2),
+            "p95": round(_percentile(latencies, 95), 2),
+            "p99": round(_percentile(latencies, 99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        },
+        "bytes_returned": bytes_returned,
+        "upstream": {
+            "requests": upstream["requests"],
+            "throttled": upstream["throttled"],
+            "tokens": upstream["tokens"],
+            "bytes": upstream["bytes_out"],
+        },
+        "peak_rss_kb": _peak_rss_kb(),
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _print_comparison(current: dict, baseline: dict):
+    """Print per-scenario deltas against a previous results file."""
+    def delta(new, old):
+        if not old:
+            return "n/a"
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    print(f"\nvs baseline {baseline.get('revision') or '?'} ({baseline.get('timestamp', '?')}):", file=sys.stderr)
+    for name, cur in current["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if not old:
+            print(f"  {name}: no baseline", file=sys.stderr)
+            continue
+        print(
+            f"  {name}: p50 {delta(cur['latency_ms']['p50'], old['latency_ms']['p50'])}"
+            f"  p95 {delta(cur['latency_ms']['p95'], old['latency_ms']['p95'])}"
+            f"  p99 {delta(cur['latency_ms']['p99'], old['latency_ms']['p99'])}"
+            f"  rps {delta(cur['throughput_rps'], old['throughput_rps'])}"
+            f"  upstream {delta(cur['upstream']['requests'], old['upstream']['requests'])}",
+            file=sys.stderr,
+        )
+
+
+async def _main_async(args) -> dict:
+    connections = [f"Bench-{n}" for n in range(args.connections)]
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Unknown scenario(s): {', '.join(unknown)}. Available: {', '.join(SCENARIOS)}")
+
+    fake_proc = None
+    fake_url = args.fake_url
+    if not fake_url:
+        fake_proc, fake_url = _start_fake_server(args)
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="mm-bench-") as workdir:
+            _install_fakes(fake_url, connections, Path(workdir))
+            with httpx.Client() as client:
+                results = {}
+                for name in scenarios:
+                    results[name] = await _run_scenario(name, args, connections, fake_url, client)
+                    print(f"{name}: p50={results[name]['latency_ms']['p50']}ms "
+                          f"p99={results[name]['latency_ms']['p99']}ms "
+                          f"rps={results[name]['throughput_rps']} errors={results[name]['errors']}",
+                          file=sys.stderr)
+    finally:
+        if fake_proc:
+            fake_proc.terminate()
+            fake_proc.wait(timeout=5)
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "revision": _git_revision(),
+        "python": sys.version.split()[0],
+        "config": {
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "connections": args.connections,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "token_latency_ms": args.token_latency_ms,
+            "page_size": args.page_size,
+            "total_items": args.total_items,
+            "payload_kb": args.payload_kb,
+            "batch_size": args.batch_size,
+            "throttle_rate": args.throttle_rate,
+        },
+        "scenarios": results,
+        "mm": {
+            "singleflight": server._graph_singleflight.stats(),
+            "scheduler": server._scheduler.stats(),
+        },
+        "peak_rss_kb": _peak_rss_kb(),
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Offline graph_request benchmark against a fake Graph server")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma list of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--connections", type=int, default=2, help="Distinct registry connections to spread load over")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=20, help="Sub-requests per $batch call")
+    parser.add_argument("--fake-url", help="Use an already running fake_graph.py instead of starting one")
+    parser.add_argument("--port", type=int, default=5390, help="Port for the spawned fake server")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--token-latency-ms", type=float, default=150)
+    parser.add_argument("--total-items", type=int, default=1000)
+    parser.add_argument("--payload-kb", type=int, default=256)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--output", help="Write JSON results here (default: stdout)")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    results = asyncio.run(_main_async(args))
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        _print_comparison(results, json.loads(Path(args.baseline).read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Fake Microsoft Graph / Flow / token endpoint for offline mm benchmarks.
+
+Serves canned responses with configurable latency, paging, throttling
+(429 + Retry-After), large payloads and $batch. Not a Graph emulator — just
+enough surface for graph_request to exercise its full request path.
+
+Routes (an optional /v1.0 or /beta prefix is ignored):
+  GET  /me                                   small user object
+  GET  /bench/items?$top=N&$skiptoken=K      paged collection with @odata.nextLink
+  GET  /bench/large                          ~--payload-kb of JSON
+  POST /$batch                               echoes one 200 response per sub-request
+  GET  /providers/Microsoft.ProcessSimple/environments   Flow environments
+  POST /{tenant}/oauth2/v2.0/token           fake access token (--token-latency-ms)
+  GET  /_bench/stats, POST /_bench/reset     request/byte counters for the harness
+
+Usage:
+    python fake_graph.py --port 5390 --latency-ms 50 --throttle-rate 0.1
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class FakeGraphState:
+    """Server configuration plus thread-safe counters."""
+
+    def __init__(self, args):
+        self.latency = args.latency_ms / 1000
+        self.jitter = args.jitter_ms / 1000
+        self.token_latency = args.token_latency_ms / 1000
+        self.total_items = args.total_items
+        self.payload_kb = args.payload_kb
+        self.throttle_every = round(1 / args.throttle_rate) if args.throttle_rate > 0 else 0
+        self.retry_after = args.retry_after
+        self.random = random.Random(args.seed)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.throttled = 0
+            self.tokens = 0
+            self.batch_subrequests = 0
+            self.bytes_out = 0
+            self.by_route = {}
+
+    def count(self, route: str, throttle: bool = True) -> bool:
+        """Count a request. Returns True if it should be throttled."""
+        with self.lock:
+            self.requests += 1
+            self.by_route[route] = self.by_route.get(route, 0) + 1
+            if throttle and self.throttle_every and self.requests % self.throttle_every == 0:
+                self.throttled += 1
+                return True
+            return False
+
+    def delay(self, base: float):
+        with self.lock:
+            jitter = self.random.uniform(0, self.jitter) if self.jitter else 0.0
+        time.sleep(base + jitter)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "tokens": self.tokens,
+                "batch_subrequests": self.batch_subrequests,
+                "bytes_out": self.bytes_out,
+                "by_route": dict(self.by_route),
+            }
+
+
+def make_handler(state: FakeGraphState):
+    large_blob = "x" * 1000
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like Graph
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload, headers: dict = None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+            with state.lock:
+                state.bytes_out += len(body)
+
+        def _read_body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            try:
+                return json.loads(raw) if raw else None
+            except json.JSONDecodeError:
+                return None
+
+        def _route(self):
+            parts = urlsplit(self.path)
+            path = re.sub(r"^/(v1\.0|beta)(?=/)", "", parts.path)
+            return path, parse_qs(parts.query)
+
+        def _throttled(self):
+            self._send_json(
+                429,
+                {"error": {"code": "TooManyRequests", "message": "Too many requests (fake)."}},
+                {"Retry-After": str(state.retry_after)},
+            )
+
+        def do_GET(self):
+            path, query = self._route()
+            if path == "/_bench/stats":
+                return self._send_json(200, state.stats())
+
+            if state.count(path.split("?")[0]):
+                return self._throttled()
+            state.delay(state.latency)
+
+            if path == "/me":
+                return self._send_json(200, {
+                    "@odata.context": "https://graph.microsoft.com/v1.0/$metadata#users/$entity",
+                    "id": "00000000-0000-0000-0000-000000000001",
+                    "displayName": "Bench User",
+                    "userPrincipalName": "bench@bench.example",
+                    "mail": "bench@bench.example",
+                })
+            if path == "/bench/items":
+                top = int(query.get("$top", ["100"])[0])
+                skip = int(query.get("$skiptoken", ["0"])[0])
+                end = min(skip + top, state.total_items)
+                payload = {
+                    "value": [{"id": str(i), "name": f"item-{i}", "@odata.etag": "W/\"1\""} for i in range(skip, end)],
+                }
+                if end < state.total_items:
+                    host = self.headers.get("Host", "localhost")
+                    payload["@odata.nextLink"] = f"http://{host}/v1.0/bench/items?$top={top}&$skiptoken={end}"
+                return self._send_json(200, payload)
+            if path == "/bench/large":
+                return self._send_json(200, {
+                    "value": [{"id": str(i), "blob": large_blob} for i in range(state.payload_kb)],
+                })
+            if path == "/providers/Microsoft.ProcessSimple/environments":
+                return self._send_json(200, {
+                    "value": [{"name": f"env-{i}", "properties": {"displayName": f"Environment {i}"}} for i in range(3)],
+                })
+            return self._send_json(404, {"error": {"code": "ResourceNotFound", "message": f"No fake route for {path}"}})
+
+        def do_POST(self):
+            path, _ = self._route()
+            body = self._read_body()
+
+            if path == "/_bench/reset":
+                state.reset()
+                return self._send_json(200, {"status": "reset"})
+
+            if re.fullmatch(r"/[^/]+/oauth2/v2\.0/token", path):
+                state.count("token", throttle=False)
+                with state.lock:
+                    state.tokens += 1
+                state.delay(state.token_latency)
+                return self._send_json(200, {
+                    "token_type": "Bearer",
+                    "expires_in": 3600,
+                    "access_token": f"fake-token-{time.time_ns()}",
+                })
+
+            if state.count(path):
+                return self._throttled()
+            state.delay(state.latency)
+
+            if path == "/$batch":
+                requests = (body or {}).get("requests", [])
+                with state.lock:
+                    state.batch_subrequests += len(requests)
+                return self._send_json(200, {
+                    "responses": [
+                        {"id": r.get("id"), "status": 200, "body": {"url": r.get("url"), "ok": True}}
+                        for r in requests
+                    ],
+                })
+            return self._send_json(404, {"error": {"code": "ResourceNotFound", "message": f"No fake route for {path}"}})
+
+    return Handler
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Fake Graph/Flow/token server for mm benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5390)
+    parser.add_argument("--latency-ms", type=float, default=50, help="Base latency per API request")
+    parser.add_argument("--jitter-ms", type=float, default=10, help="Uniform random extra latency")
+    parser.add_argument("--token-latency-ms", type=float, default=150, help="Latency of the token endpoint")
+    parser.add_argument("--total-items", type=int, default=1000, help="Size of the paged /bench/items collection")
+    parser.add_argument("--payload-kb", type=int, default=256, help="Approximate size of /bench/large")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of API requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds on 429")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    state = FakeGraphState(args)
+    httpd = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    httpd.daemon_threads = True
+    print(f"Fake Graph listening on http://{args.host}:{args.port}", flush=True)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
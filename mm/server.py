@@ -8,14 +8,28 @@ Tools:
 
 Connection registry (~/.m365-connections.json) is READ-ONLY.
 Connections must be pre-created by the user - MCPs cannot modify the registry.
+
+Runs over stdio by default. `server.py --http` runs a long-lived service on the
+streamable HTTP transport instead, keeping token caches, HTTP pools and
+schedulers warm across calls.
 """
 
+import argparse
+import asyncio
+import contextvars
+import hmac
 import json
 import os
 import re
+import signal
 import sys
+import threading
 import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from fnmatch import fnmatchcase
 from pathlib import Path
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit, urlunsplit
 import httpx
 import msal
 from mcp.server import Server
@@ -25,12 +39,44 @@ from mcp.types import Tool, TextContent
 # Shared logger
 sys.path.insert(0, str(Path(__file__).parent.parent))
 try:
-    from mcp_logger import log_tool_call
+    from mcp_logger import get_connection_usage, log_tool_call
 except ImportError:
     def log_tool_call(*args, **kwargs): pass
+    def get_connection_usage(*args, **kwargs): return {}
 
 # Session pool endpoint (for PowerShell)
 SESSION_POOL_URL = os.getenv("MM_SESSION_POOL_URL", "http://localhost:5200")
+# Unix domain socket for a co-located pool (gunicorn --bind unix:...); overrides the URL's host/port
+SESSION_POOL_UDS = os.getenv("MM_SESSION_POOL_UDS", "")
+POOL_CONNECT_TIMEOUT = float(os.getenv("MM_POOL_CONNECT_TIMEOUT", "5"))
+POOL_READ_TIMEOUT = float(os.getenv("MM_POOL_READ_TIMEOUT", "120"))
+# Connect attempts are retried with backoff (covers a pool container restart)
+POOL_CONNECT_RETRIES = int(os.getenv("MM_POOL_CONNECT_RETRIES", "5"))
+# run waits this long for a pool job before returning a job handle to poll
+RUN_WAIT_SECONDS = min(float(os.getenv("MM_RUN_WAIT_SECONDS", "25")), POOL_READ_TIMEOUT - 5)
+# format=json results are paged; objects returned per call unless limit is given
+JSON_PAGE_SIZE = int(os.getenv("MM_JSON_PAGE_SIZE", "50"))
+# run_batch and streamed runs are synchronous: allow for the pool's COMMAND_TIMEOUT (300s)
+BATCH_READ_TIMEOUT = float(os.getenv("MM_BATCH_READ_TIMEOUT", "330"))
+# Clients that send a progressToken get run's text output live as MCP progress
+# notifications (at most one per interval) instead of a job handle
+PROGRESS_INTERVAL = float(os.getenv("MM_PROGRESS_INTERVAL", "1"))
+PROGRESS_MESSAGE_MAX = 1000  # Characters of output per notification
+
+# Predictive warm-up: after a connection listing or the first call on a
+# connection, silently refresh tokens and pre-create pool sessions for the
+# resources and modules it usually uses (learned from the activity log)
+WARMUP_ENABLED = os.getenv("MM_WARMUP", "false").lower() == "true"
+WARMUP_MODULES = int(os.getenv("MM_WARMUP_MODULES", "2"))  # Pool sessions per connection
+WARMUP_INTERVAL = 600  # Seconds before the same connection is warmed again
+
+# HTTP service mode (--http)
+HTTP_HOST = os.getenv("MM_HTTP_HOST", "127.0.0.1")
+HTTP_PORT = int(os.getenv("MM_HTTP_PORT", "8765"))
+# Optional shared secret: clients must send "Authorization: Bearer <token>"
+HTTP_TOKEN = os.getenv("MM_HTTP_TOKEN", "")
+# Seconds in-flight calls get to finish on SIGTERM/SIGINT
+HTTP_GRACEFUL_TIMEOUT = int(os.getenv("MM_HTTP_GRACEFUL_TIMEOUT", "30"))
 
 # Connection registry (READ-ONLY)
 CONNECTIONS_FILE = Path.home() / ".m365-connections.json"
@@ -85,30 +131,141 @@ EMAIL_SIG_PATTERNS = [
     r'\n--\s*\n',  # standard sig separator
 ]
 
-# Resource configurations for different Microsoft APIs
+# Resource configurations for different Microsoft APIs.
+# All resources share the connection's MSAL token cache, so once a connection has
+# signed in, tokens for the other resources are acquired silently via refresh token.
+#   label:                shown in device code prompts and API error messages
+#   headers:              extra request headers for this API
+#   endpoint_prefix:      prepended to endpoints that don't already contain it
+#   api_version_required: endpoint must carry ?api-version= (added from defaults / api_version arg)
+# "{sharepoint_host}" is filled per connection (registry "sharepoint_host", else first label of tenant).
 RESOURCE_CONFIGS = {
     "graph": {
+        "label": "Graph API",
         "base_url": "https://graph.microsoft.com",
         "scopes": GRAPH_SCOPES,
     },
     "flow": {
+        "label": "Power Automate",
         "base_url": "https://api.flow.microsoft.com",
         "scopes": ["https://service.flow.microsoft.com/.default"],
     },
+    "arm": {
+        "label": "Azure Resource Manager",
+        "base_url": "https://management.azure.com",
+        "scopes": ["https://management.azure.com/user_impersonation"],
+        "api_version_required": True,
+    },
+    "sharepoint": {
+        "label": "SharePoint REST",
+        "base_url": "https://{sharepoint_host}.sharepoint.com",
+        "scopes": ["https://{sharepoint_host}.sharepoint.com/.default"],
+        "headers": {
+            "Accept": "application/json;odata=nometadata",
+            "Content-Type": "application/json;odata=nometadata",
+        },
+        "endpoint_prefix": "/_api",
+    },
 }
 
+# Default ARM api-version per resource provider namespace (lowercase).
+# Providers not listed here need an explicit api_version (or ?api-version= in the endpoint).
+_ARM_API_VERSIONS = {
+    "microsoft.resources": "2021-04-01",
+    "microsoft.authorization": "2022-04-01",
+    "microsoft.web": "2022-09-01",
+    "microsoft.storage": "2023-01-01",
+    "microsoft.compute": "2023-09-01",
+    "microsoft.network": "2023-09-01",
+    "microsoft.keyvault": "2023-07-01",
+    "microsoft.sql": "2021-11-01",
+    "microsoft.operationalinsights": "2022-10-01",
+    "microsoft.containerservice": "2024-02-01",
+    "microsoft.logic": "2019-05-01",
+}
+# Subscription/tenant listing lives on its own API surface
+_ARM_SUBSCRIPTIONS_API_VERSION = "2022-12-01"
+
+
+# Parsed registry, reused while the file is unchanged: (path, mtime_ns, registry)
+_REGISTRY_CACHE = None
+_REGISTRY_LOCK = threading.Lock()
+
 
 def load_registry() -> dict:
-    """Load connection registry. Read-only - never writes."""
+    """Load connection registry. Read-only - never writes.
+
+    The parsed file is cached until its mtime changes, so a long-running
+    process doesn't re-read it on every call. Callers must not modify it.
+    """
+    global _REGISTRY_CACHE
     try:
-        return json.loads(CONNECTIONS_FILE.read_text())
+        mtime = CONNECTIONS_FILE.stat().st_mtime_ns
+        cached = _REGISTRY_CACHE
+        if cached and cached[:2] == (CONNECTIONS_FILE, mtime):
+            return cached[2]
+        registry = json.loads(CONNECTIONS_FILE.read_text())
     except (FileNotFoundError, json.JSONDecodeError):
         return {"connections": {}}
+    with _REGISTRY_LOCK:
+        _REGISTRY_CACHE = (CONNECTIONS_FILE, mtime, registry)
+    return registry
+
+
+def _resolve_resource_config(resource: str, conn_config: dict) -> tuple:
+    """Get a resource config with per-tenant placeholders filled. Returns (config, error_text)."""
+    res_config = RESOURCE_CONFIGS[resource]
+    if "{sharepoint_host}" not in res_config["base_url"]:
+        return res_config, None
+    tenant = conn_config.get("tenant", "")
+    sharepoint_host = conn_config.get("sharepoint_host") or (tenant.split(".")[0] if "." in tenant else "")
+    if not sharepoint_host:
+        return None, "Error: Connection has no SharePoint host. Set \"sharepoint_host\" (e.g. \"contoso\") in the registry."
+    return {
+        **res_config,
+        "base_url": res_config["base_url"].format(sharepoint_host=sharepoint_host),
+        "scopes": [sc.format(sharepoint_host=sharepoint_host) for sc in res_config["scopes"]],
+    }, None
+
+
+def _arm_default_api_version(path: str) -> str | None:
+    """Pick a default api-version for an ARM path from its (innermost) provider namespace."""
+    providers = re.findall(r'/providers/([^/?]+)', path, re.IGNORECASE)
+    if providers:
+        return _ARM_API_VERSIONS.get(providers[-1].lower())
+    if re.match(r'^/(subscriptions|tenants)(/[^/]+)?/?$', path, re.IGNORECASE):
+        return _ARM_SUBSCRIPTIONS_API_VERSION
+    if re.match(r'^/subscriptions/[^/]+/', path, re.IGNORECASE):
+        # resourcegroups, resources, providers, tagNames, deployments — Microsoft.Resources
+        return _ARM_API_VERSIONS["microsoft.resources"]
+    return None
+
+
+def _prepare_endpoint(endpoint: str, res_config: dict, api_version: str = None) -> tuple:
+    """Apply resource-specific endpoint rules. Returns (endpoint, error_text)."""
+    if not endpoint.startswith("/"):
+        endpoint = f"/{endpoint}"
+
+    prefix = res_config.get("endpoint_prefix")
+    if prefix and prefix not in endpoint:
+        endpoint = f"{prefix}{endpoint}"
+
+    if res_config.get("api_version_required") and "api-version=" not in endpoint.lower():
+        version = api_version or _arm_default_api_version(endpoint.split("?", 1)[0])
+        if not version:
+            return None, (
+                "Error: This endpoint needs an api-version. Pass api_version (e.g. '2023-01-01') "
+                "or include ?api-version= in the endpoint."
+            )
+        endpoint += ("&" if "?" in endpoint else "?") + f"api-version={version}"
+
+    return endpoint, None
 
 
 def get_connection_config(connection: str) -> tuple:
     """Get connection config. Returns (config, error_text)."""
-    registry = load_registry()
+    with _phase("registry"):
+        registry = load_registry()
     conn_config = registry.get("connections", {}).get(connection)
     if not conn_config:
         available = list(registry.get("connections", {}).keys())
@@ -125,24 +282,50 @@ def _get_token_cache_path(connection: str) -> Path:
     return GRAPH_TOKEN_DIR / f"{safe_name}.json"
 
 
+# In-process MSAL apps, reused across calls and resources while the on-disk cache is unchanged.
+# connection -> (app, cache, cache_path, app_id, authority, cache_mtime)
+_MSAL_APPS = {}
+_MSAL_APPS_LOCK = threading.Lock()
+
+
+def _cache_mtime(cache_path: Path):
+    try:
+        return cache_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
 def _get_msal_app(connection: str, conn_config: dict) -> msal.PublicClientApplication:
-    """Create MSAL app with persistent token cache for a connection."""
+    """Get MSAL app with persistent token cache for a connection.
+
+    The app (and its in-memory token cache) is kept for the life of the process
+    and reloaded only when the registry entry or the cache file changes, so
+    repeat calls get access tokens from memory instead of re-reading disk.
+    """
     app_id = conn_config.get("appId")
     tenant = conn_config.get("tenantId") or conn_config.get("tenant", "common")
 
     # If tenant is a domain (e.g. contoso.com), use it as-is - MSAL handles it
     authority = f"https://login.microsoftonline.com/{tenant}"
 
-    cache = msal.SerializableTokenCache()
     cache_path = _get_token_cache_path(connection)
-    if cache_path.exists():
-        cache.deserialize(cache_path.read_text())
+    mtime = _cache_mtime(cache_path)
 
-    app = msal.PublicClientApplication(
-        client_id=app_id,
-        authority=authority,
-        token_cache=cache,
-    )
+    with _MSAL_APPS_LOCK:
+        cached = _MSAL_APPS.get(connection)
+        if cached and cached[3:] == (app_id, authority, mtime):
+            return cached[0], cached[1], cached[2]
+
+        cache = msal.SerializableTokenCache()
+        if mtime is not None:
+            cache.deserialize(cache_path.read_text())
+
+        app = msal.PublicClientApplication(
+            client_id=app_id,
+            authority=authority,
+            token_cache=cache,
+        )
+        _MSAL_APPS[connection] = (app, cache, cache_path, app_id, authority, mtime)
     return app, cache, cache_path
 
 
@@ -150,6 +333,11 @@ def _save_cache(cache: msal.SerializableTokenCache, cache_path: Path):
     """Persist token cache if changed."""
     if cache.has_state_changed:
         cache_path.write_text(cache.serialize())
+        # Our own write shouldn't invalidate the in-process app
+        with _MSAL_APPS_LOCK:
+            for connection, entry in _MSAL_APPS.items():
+                if entry[1] is cache:
+                    _MSAL_APPS[connection] = entry[:5] + (_cache_mtime(cache_path),)
 
 
 # Pending device code flows — persisted to disk so they survive process restarts
@@ -212,8 +400,15 @@ def _check_account_mismatch(result: dict, conn_config: dict,
     )
 
     if actual_email and expected.lower() != actual_email.lower():
-        # Wrong account — nuke the cache so it doesn't persist
+        # Wrong account — nuke the cache so it doesn't persist. The in-process
+        # app holds the same tokens and would write them back on its next save,
+        # so empty it and drop it too
         cache_path.unlink(missing_ok=True)
+        cache.deserialize("{}")
+        with _MSAL_APPS_LOCK:
+            for connection, entry in list(_MSAL_APPS.items()):
+                if entry[1] is cache:
+                    del _MSAL_APPS[connection]
         # Log the details, don't expose to the AI
         log_tool_call(
             mcp_name="mm", tool_name="graph_auth",
@@ -254,7 +449,8 @@ def _sanitize_auth_error(raw_error: str, connection: str) -> str:
 
 
 def _acquire_graph_token(connection: str, conn_config: dict,
-                         scopes: list = None, resource: str = "graph") -> dict:
+                         scopes: list = None, resource: str = "graph",
+                         interactive: bool = True) -> dict:
     """
     Acquire a token for a connection.
 
@@ -262,6 +458,10 @@ def _acquire_graph_token(connection: str, conn_config: dict,
       {"access_token": "..."} on success
       {"device_code": "...", "message": "..."} when auth needed
       {"error": "..."} on failure
+
+    With interactive=False only the token cache is consulted — no device code
+    flow is started or polled, and {"error": "interaction_required"} is returned
+    when no cached token is usable.
     """
     effective_scopes = scopes or GRAPH_SCOPES
 
@@ -283,6 +483,9 @@ def _acquire_graph_token(connection: str, conn_config: dict,
                 _save_cache(cache, cache_path)
                 return {"access_token": result["access_token"]}
 
+    if not interactive:
+        return {"error": "interaction_required"}
+
     # Check if we have a pending device code flow (persisted to disk)
     flow_info = _load_pending_flow(connection, resource)
     if flow_info:
@@ -326,12 +529,14 @@ def _acquire_graph_token(connection: str, conn_config: dict,
     return {"device_code": device_code, "message": flow.get("message", "")}
 
 
-def _make_graph_request(access_token: str, endpoint: str, method: str = "GET",
-                        body: dict = None, headers: dict = None,
-                        base_url: str = None) -> dict:
-    """Make a direct HTTP request to a Microsoft API."""
+def _build_api_url(endpoint: str, base_url: str = None) -> str:
+    """Build the full request URL for an endpoint on a Microsoft API."""
     base = base_url or "https://graph.microsoft.com"
 
+    # Absolute URL on the same API (e.g. a paging nextLink) — use as-is
+    if endpoint.startswith(f"{base}/"):
+        return endpoint
+
     # Normalize endpoint
     if not endpoint.startswith("/"):
         endpoint = f"/{endpoint}"
@@ -339,11 +544,17 @@ def _make_graph_request(access_token: str, endpoint: str, method: str = "GET",
     # Only add version prefix for Graph API
     if base == "https://graph.microsoft.com":
         if endpoint.startswith("/beta/") or endpoint.startswith("/v1.0/"):
-            url = f"{base}{endpoint}"
-        else:
-            url = f"{base}/v1.0{endpoint}"
-    else:
-        url = f"{base}{endpoint}"
+            return f"{base}{endpoint}"
+        return f"{base}/v1.0{endpoint}"
+    return f"{base}{endpoint}"
+
+
+def _make_graph_request(access_token: str, endpoint: str, method: str = "GET",
+                        body: dict = None, headers: dict = None,
+                        base_url: str = None, api_label: str = "Graph API",
+                        strip_odata: bool = True) -> dict:
+    """Make a direct HTTP request to a Microsoft API."""
+    url = _build_api_url(endpoint, base_url)
 
     req_headers = {
         "Authorization": f"Bearer {access_token}",
@@ -352,14 +563,19 @@ def _make_graph_request(access_token: str, endpoint: str, method: str = "GET",
     if headers:
         req_headers.update(headers)
 
+    send_body = body if body and method.upper() != "GET" else None
     try:
-        resp = httpx.request(
+        resp = _graph_http.request(
             method=method.upper(),
             url=url,
             headers=req_headers,
-            json=body if body and method.upper() != "GET" else None,
+            json=send_body,
             timeout=120,
         )
+        _add_call_bytes(
+            request_bytes=len(json.dumps(send_body).encode()) if send_body is not None else 0,
+            response_bytes=len(resp.content),
+        )
 
         if resp.status_code == 204:
             return {"status": "success", "data": {"message": "OK (no content)"}}
@@ -373,24 +589,27 @@ def _make_graph_request(access_token: str, endpoint: str, method: str = "GET",
             log_tool_call(
                 mcp_name="mm", tool_name="graph_request",
                 arguments={"endpoint": endpoint, "method": method},
-                error=f"Graph API {resp.status_code}: {json.dumps(error_data)}",
+                error=f"{api_label} {resp.status_code}: {json.dumps(error_data)}",
                 duration_ms=0,
             )
             # Extract just the error code and safe message
-            if isinstance(error_data, dict) and "error" in error_data:
-                err_obj = error_data["error"]
+            # (SharePoint REST reports errors under "odata.error" with message.value)
+            if isinstance(error_data, dict) and ("error" in error_data or "odata.error" in error_data):
+                err_obj = error_data.get("error") or error_data["odata.error"]
                 code = err_obj.get("code", "UnknownError") if isinstance(err_obj, dict) else str(err_obj)
                 msg = err_obj.get("message", "") if isinstance(err_obj, dict) else ""
+                if isinstance(msg, dict):
+                    msg = msg.get("value", "")
                 # Strip any tenant/org references from the message
                 msg = re.sub(r"'[^']*'", "'[redacted]'", msg)
                 msg = re.sub(r"tenant\s+[a-f0-9-]+", "tenant [redacted]", msg, flags=re.IGNORECASE)
                 return {
                     "status": "error",
-                    "error": f"Graph API {resp.status_code} ({code}): {msg}" if msg else f"Graph API {resp.status_code} ({code})",
+                    "error": f"{api_label} {resp.status_code} ({code}): {msg}" if msg else f"{api_label} {resp.status_code} ({code})",
                 }
             return {
                 "status": "error",
-                "error": f"Graph API returned {resp.status_code}. Check logs for details.",
+                "error": f"{api_label} returned {resp.status_code}. Check logs for details.",
             }
 
         try:
@@ -399,7 +618,7 @@ def _make_graph_request(access_token: str, endpoint: str, method: str = "GET",
             data = {"raw": resp.text[:2000]}
 
         # Strip OData noise
-        if isinstance(data, dict):
+        if strip_odata and isinstance(data, dict):
             odata_keys = [k for k in data if k.startswith("@odata.")]
             for k in odata_keys:
                 del data[k]
@@ -413,11 +632,460 @@ def _make_graph_request(access_token: str, endpoint: str, method: str = "GET",
         return {"status": "success", "data": data}
 
     except httpx.TimeoutException:
-        return {"status": "error", "error": "Graph API request timed out"}
+        return {"status": "error", "error": f"{api_label} request timed out"}
     except Exception as e:
         return {"status": "error", "error": str(e)}
 
 
+# === Call Instrumentation ===
+# Per-call diagnostics collected while a tool call runs and attached to its log
+# entry: phase timers (registry, token, hooks, queue, io, serialize), upstream
+# request/response byte counts, and path/coalescing notes.
+#
+# Optional OpenMetrics export of per-tool/connection/phase histograms:
+#   MM_METRICS_FILE  text exposition file, merged across processes (stateless mode)
+#   MM_METRICS_PORT  HTTP endpoint serving /metrics from this process (service mode)
+
+METRICS_FILE = os.getenv("MM_METRICS_FILE", "")
+METRICS_PORT = int(os.getenv("MM_METRICS_PORT", "0"))
+
+_CALL_DETAILS: contextvars.ContextVar = contextvars.ContextVar("mm_call_details", default=None)
+# Progress callback for the current tool call (None when the client sent no progressToken)
+_PROGRESS: contextvars.ContextVar = contextvars.ContextVar("mm_progress", default=None)
+
+
+def _record_call_detail(**kwargs):
+    """Attach diagnostics to the current tool call's log entry (no-op outside a call)."""
+    details = _CALL_DETAILS.get()
+    if details is not None:
+        details.update(kwargs)
+
+
+def _add_call_timing(phase: str, seconds: float):
+    """Accumulate time spent in a phase of the current tool call."""
+    details = _CALL_DETAILS.get()
+    if details is not None:
+        phases = details.setdefault("phases_ms", {})
+        phases[phase] = phases.get(phase, 0.0) + seconds * 1000
+
+
+def _add_call_bytes(request_bytes: int = 0, response_bytes: int = 0):
+    """Accumulate upstream bytes sent/received by the current tool call."""
+    details = _CALL_DETAILS.get()
+    if details is not None:
+        details["request_bytes"] = details.get("request_bytes", 0) + request_bytes
+        details["response_bytes"] = details.get("response_bytes", 0) + response_bytes
+
+
+@contextmanager
+def _phase(name: str):
+    """Time a block as one phase of the current tool call."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _add_call_timing(name, time.perf_counter() - start)
+
+
+class _MetricsRegistry:
+    """Fixed-bucket histograms and counters, renderable as OpenMetrics text.
+
+    State is plain JSON-able dicts so registries from separate processes can be
+    merged through MM_METRICS_FILE.
+    """
+
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+               1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}  # json([tool, connection, phase]) -> {"buckets": [...], "sum": s, "count": n}
+        self.counters = {}    # json([name, tool, connection, label]) -> value
+
+    def observe(self, tool: str, connection: str, phase: str, seconds: float):
+        key = json.dumps([tool, connection, phase])
+        with self.lock:
+            hist = self.histograms.setdefault(key, {"buckets": [0] * len(self.BUCKETS), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    hist["buckets"][i] += 1
+            hist["sum"] += seconds
+            hist["count"] += 1
+
+    def inc(self, name: str, tool: str, connection: str, label: str, value: float = 1):
+        key = json.dumps([name, tool, connection, label])
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def record_call(self, tool: str, connection: str, details: dict, duration_s: float, success: bool):
+        connection = connection or ""
+        self.observe(tool, connection, "total", duration_s)
+        for phase, ms in details.get("phases_ms", {}).items():
+            self.observe(tool, connection, phase, ms / 1000)
+        self.inc("calls", tool, connection, "success" if success else "error")
+        self.inc("bytes", tool, connection, "request", details.get("request_bytes", 0))
+        self.inc("bytes", tool, connection, "response", details.get("response_bytes", 0))
+
+    def to_state(self) -> dict:
+        with self.lock:
+            return {"histograms": json.loads(json.dumps(self.histograms)), "counters": dict(self.counters)}
+
+    def merge(self, state: dict):
+        with self.lock:
+            for key, other in state.get("histograms", {}).items():
+                hist = self.histograms.setdefault(key, {"buckets": [0] * len(self.BUCKETS), "sum": 0.0, "count": 0})
+                hist["buckets"] = [a + b for a, b in zip(hist["buckets"], other["buckets"])]
+                hist["sum"] += other["sum"]
+                hist["count"] += other["count"]
+            for key, value in state.get("counters", {}).items():
+                self.counters[key] = self.counters.get(key, 0) + value
+
+    def render(self) -> str:
+        """OpenMetrics text exposition."""
+        def esc(value: str) -> str:
+            return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        def number(value) -> str:
+            # Full precision: integers as integers, floats round-trip via repr
+            return str(value) if isinstance(value, int) else repr(float(value))
+
+        lines = [
+            "# TYPE mm_tool_phase_seconds histogram",
+            "# UNIT mm_tool_phase_seconds seconds",
+            "# HELP mm_tool_phase_seconds Time spent per tool call phase (phase=total for the whole call).",
+        ]
+        with self.lock:
+            for key in sorted(self.histograms):
+                tool, connection, phase = json.loads(key)
+                hist = self.histograms[key]
+                labels = f'tool="{esc(tool)}",connection="{esc(connection)}",phase="{esc(phase)}"'
+                for bound, count in zip(self.BUCKETS, hist["buckets"]):
+                    lines.append(f'mm_tool_phase_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'mm_tool_phase_seconds_bucket{{{labels},le="+Inf"}} {hist["count"]}')
+                lines.append(f"mm_tool_phase_seconds_count{{{labels}}} {hist['count']}")
+                lines.append(f"mm_tool_phase_seconds_sum{{{labels}}} {hist['sum']:.6f}")
+
+            families = {
+                "calls": ("mm_tool_calls", "outcome", "Tool calls by outcome."),
+                "bytes": ("mm_tool_upstream_bytes", "direction", "Bytes sent to / received from Graph and the session pool."),
+            }
+            for name, (family, label_name, help_text) in families.items():
+                lines.append(f"# TYPE {family} counter")
+                lines.append(f"# HELP {family} {help_text}")
+                for key in sorted(self.counters):
+                    counter, tool, connection, label = json.loads(key)
+                    if counter != name:
+                        continue
+                    lines.append(
+                        f'{family}_total{{tool="{esc(tool)}",connection="{esc(connection)}",'
+                        f'{label_name}="{esc(label)}"}} {number(self.counters[key])}'
+                    )
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+_metrics = _MetricsRegistry()
+
+
+def _export_metrics_file(call_metrics: _MetricsRegistry):
+    """Merge one call's metrics into MM_METRICS_FILE (shared by concurrent mm processes)."""
+    import fcntl
+
+    path = Path(METRICS_FILE)
+    state_path = path.with_name(path.name + ".state.json")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path.with_name(path.name + ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            merged = _MetricsRegistry()
+            if state_path.exists():
+                try:
+                    merged.merge(json.loads(state_path.read_text()))
+                except json.JSONDecodeError:
+                    pass
+            merged.merge(call_metrics.to_state())
+            state_path.write_text(json.dumps(merged.to_state()))
+            tmp_path = path.with_name(path.name + ".tmp")
+            tmp_path.write_text(merged.render())
+            os.replace(tmp_path, path)
+    except OSError as e:
+        sys.stderr.write(f"[mm] Failed to export metrics: {e}\n")
+
+
+def _record_call_metrics(tool: str, connection: str, details: dict, duration_s: float, success: bool):
+    """Feed a finished call into the in-process registry and the optional metrics file."""
+    _metrics.record_call(tool, connection, details, duration_s, success)
+    if METRICS_FILE:
+        single = _MetricsRegistry()
+        single.record_call(tool, connection, details, duration_s, success)
+        _export_metrics_file(single)
+
+
+def _start_metrics_server(port: int):
+    """Serve the in-process registry as OpenMetrics on http://127.0.0.1:{port}/metrics."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = _metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/openmetrics-text; version=1.0.0; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    try:
+        httpd = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+    except OSError as e:
+        sys.stderr.write(f"[mm] Metrics endpoint not started on port {port}: {e}\n")
+        return
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+
+# === Request Coalescing ===
+# Identical GETs issued concurrently (several tool calls asking for /me, a site's
+# drives, a team's channels at the same moment) share one upstream request.
+
+_COALESCE_GETS = os.getenv("MM_COALESCE_GETS", "true").lower() != "false"
+
+
+class _Flight:
+    """One in-flight upstream call and the callers waiting on it."""
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _SingleFlight:
+    """Run a call once per key while it is in flight; waiters get the same result.
+
+    The result object is shared between callers — treat it as read-only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn) -> tuple:
+        """Run fn() or join the identical in-flight call. Returns (result, shared)."""
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = fn()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+        return flight.result, False
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.executed + self.coalesced
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "ratio": round(self.coalesced / total, 3) if total else 0.0,
+            }
+
+
+_graph_singleflight = _SingleFlight()
+
+
+def _normalize_url(url: str) -> str:
+    """Canonical form of a request URL for coalescing (host case, query order, trailing slash)."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+# === Request Scheduler ===
+# Weighted-fair admission for outbound calls (Graph HTTP and session pool) so one
+# tenant's bulk job can't starve everyone else sharing this mm deployment.
+# Per-connection weight comes from "schedulerWeight" in the registry (default 1).
+
+_MAX_CONCURRENCY = int(os.getenv("MM_MAX_CONCURRENCY", "16"))
+_MAX_CONCURRENCY_PER_CONNECTION = int(os.getenv("MM_MAX_CONCURRENCY_PER_CONNECTION", "4"))
+_MAX_QUEUE = int(os.getenv("MM_MAX_QUEUE", "256"))
+_MAX_QUEUE_PER_CONNECTION = int(os.getenv("MM_MAX_QUEUE_PER_CONNECTION", "32"))
+_QUEUE_TIMEOUT = float(os.getenv("MM_QUEUE_TIMEOUT", "60"))
+
+
+class SchedulerBusy(Exception):
+    """Request rejected by the scheduler (queue full or queue wait timed out)."""
+
+
+class _Ticket:
+    """A queued request waiting for a concurrency slot."""
+    __slots__ = ("tag", "granted")
+
+    def __init__(self, tag: float):
+        self.tag = tag
+        self.granted = False
+
+
+class _FairScheduler:
+    """Weighted-fair queueing with global and per-connection concurrency caps.
+
+    Each request gets a virtual finish tag (last tag of its connection, or the
+    global virtual clock if idle, plus 1/weight). Free slots go to the smallest
+    tag among connections still under their own cap, so a connection with a deep
+    queue advances its tags quickly and yields to lightly-loaded ones.
+    """
+
+    def __init__(self, max_concurrency: int, max_per_connection: int,
+                 max_queue: int, max_queue_per_connection: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_per_connection = max_per_connection
+        self.max_queue = max_queue
+        self.max_queue_per_connection = max_queue_per_connection
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self._active = 0
+        self._active_by_conn = defaultdict(int)
+        self._queues = defaultdict(deque)
+        self._last_tag = {}
+        self._clock = 0.0
+        self._queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _dispatch(self):
+        """Grant free slots to the fairest eligible waiters. Caller holds the lock."""
+        granted = False
+        while self._active < self.max_concurrency:
+            best = None
+            for conn, queue in self._queues.items():
+                if not queue or self._active_by_conn[conn] >= self.max_per_connection:
+                    continue
+                if best is None or queue[0].tag < self._queues[best][0].tag:
+                    best = conn
+            if best is None:
+                break
+            ticket = self._queues[best].popleft()
+            ticket.granted = True
+            self._queued -= 1
+            self._active += 1
+            self._active_by_conn[best] += 1
+            self._clock = max(self._clock, ticket.tag)
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def acquire(self, connection: str, weight: float = 1.0) -> float:
+        """Wait for a slot. Returns seconds spent queued; raises SchedulerBusy."""
+        start = time.monotonic()
+        with self._cond:
+            queue = self._queues[connection]
+            if len(queue) >= self.max_queue_per_connection or self._queued >= self.max_queue:
+                self.rejected += 1
+                raise SchedulerBusy(
+                    f"Too many queued requests for '{connection}' ({len(queue)} waiting). Retry shortly."
+                )
+            tag = max(self._clock, self._last_tag.get(connection, 0.0)) + 1.0 / max(weight, 0.01)
+            self._last_tag[connection] = tag
+            ticket = _Ticket(tag)
+            queue.append(ticket)
+            self._queued += 1
+            self._dispatch()
+
+            deadline = start + self.queue_timeout
+            while not ticket.granted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    queue.remove(ticket)
+                    self._queued -= 1
+                    self.timed_out += 1
+                    raise SchedulerBusy(
+                        f"Request for '{connection}' waited {int(self.queue_timeout)}s without a free slot. Retry shortly."
+                    )
+                self._cond.wait(remaining)
+        return time.monotonic() - start
+
+    def release(self, connection: str):
+        with self._cond:
+            self._active -= 1
+            self._active_by_conn[connection] -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, connection: str, weight: float = 1.0):
+        """Hold a concurrency slot for the duration of the block. Yields queue wait seconds."""
+        waited = self.acquire(connection, weight)
+        try:
+            yield waited
+        finally:
+            self.release(connection)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "active": self._active,
+                "queued": self._queued,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+            }
+
+
+_scheduler = _FairScheduler(
+    _MAX_CONCURRENCY, _MAX_CONCURRENCY_PER_CONNECTION,
+    _MAX_QUEUE, _MAX_QUEUE_PER_CONNECTION, _QUEUE_TIMEOUT,
+)
+
+# Shared outbound HTTP pool for Microsoft APIs — sized to the scheduler's global cap
+_graph_http = httpx.Client(
+    limits=httpx.Limits(max_connections=_MAX_CONCURRENCY, max_keepalive_connections=_MAX_CONCURRENCY),
+)
+
+
+def _scheduler_weight(conn_config: dict) -> float:
+    """Scheduling weight for a connection ("schedulerWeight" in registry, default 1)."""
+    try:
+        return float(conn_config.get("schedulerWeight", 1))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+@contextmanager
+def _scheduled(connection: str, conn_config: dict):
+    """Run an upstream call under the fair scheduler, recording queue wait and upstream time."""
+    with _scheduler.slot(connection, _scheduler_weight(conn_config)) as waited:
+        _add_call_timing("queue", waited)
+        upstream_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            _add_call_timing("io", time.perf_counter() - upstream_start)
+
+
 # === Email Interceptors ===
 
 def _strip_email_signature(body, endpoint, conn_config=None):
@@ -656,7 +1324,7 @@ _MISSING_AZ_CMDLETS = re.compile(
 
 
 def _hook_missing_az_module(command, module, conn_config, confirmed=False):
-    """Block cmdlets from uninstalled Az modules — redirect to Invoke-AzRestMethod."""
+    """Block cmdlets from uninstalled Az modules — redirect to the ARM REST API."""
     if module != "azure":
         return command, None
     match = _MISSING_AZ_CMDLETS.search(command)
@@ -666,8 +1334,10 @@ def _hook_missing_az_module(command, module, conn_config, confirmed=False):
     # Return None command to signal "don't execute, just return the note"
     return None, (
         f"'{cmdlet}' requires an Az module that isn't installed in the container. "
-        f"Only Az.Accounts is installed. Use Invoke-AzRestMethod to call the Azure REST API directly. "
-        f"Example: Invoke-AzRestMethod -Path '/subscriptions/{{subId}}/resourceGroups/{{rg}}/providers/Microsoft.Insights/components?api-version=2020-02-02' -Method GET"
+        f"Only Az.Accounts is installed. Call the Azure REST API directly with the graph_request tool "
+        f"and resource='arm' (no PowerShell session needed). "
+        f"Example: graph_request(connection, endpoint='/subscriptions/{{subId}}/resourceGroups/{{rg}}/providers/Microsoft.Insights/components', "
+        f"resource='arm', api_version='2020-02-02')"
     )
 
 
@@ -729,23 +1399,513 @@ def _run_run_hooks(command, module, conn_config, confirmed=False):
     return command, notes
 
 
+# === Cmdlet-to-REST Fast Path ===
+# A curated set of simple read cmdlets is served over Graph/ARM/SharePoint REST
+# with the connection's cached MSAL tokens, skipping the session pool and pwsh.
+# Anything not translated confidently (pipelines, variables, unknown parameters,
+# no cached token, REST error) raises _FastPathUnavailable and goes to the pool.
+# Per-connection opt-out: "skipRestFastPath": true in the registry.
+
+_REST_FAST_PATH_DEFAULT = os.getenv("MM_REST_FAST_PATH", "true").lower() != "false"
+
+# Characters that make a command more than "cmdlet + literal parameters"
+_FAST_PATH_UNSAFE = re.compile(r"[;|&(){}$`,<>\[\]\n]")
+_FAST_PATH_TOKEN = re.compile(r"""'[^']*'|"[^"]*"|\S+""")
+
+
+class _FastPathUnavailable(Exception):
+    """The fast path can't serve this command confidently — use the session pool."""
+
+
+def _parse_simple_cmdlet(command: str) -> tuple | None:
+    """Parse 'Verb-Noun -Param value -Switch' into (cmdlet, {param: value}). None if not that simple."""
+    tokens = _FAST_PATH_TOKEN.findall(command.strip())
+    if not tokens or not re.fullmatch(r"[A-Za-z]+-[A-Za-z]+", tokens[0]):
+        return None
+
+    params = {}
+    i = 1
+    while i < len(tokens):
+        token = tokens[i]
+        if not re.fullmatch(r"-[A-Za-z]+", token):
+            return None  # positional argument or -Param:value form
+        name = token[1:].lower()
+        if name in params:
+            return None
+        value = True
+        if i + 1 < len(tokens) and not tokens[i + 1].startswith("-"):
+            raw = tokens[i + 1]
+            if raw[0] in "'\"":
+                if len(raw) < 2 or raw[-1] != raw[0]:
+                    return None
+                value = raw[1:-1]
+                if raw[0] == '"' and re.search(r"[$`]", value):
+                    return None  # double quotes expand $vars and subexpressions
+            elif raw.startswith("@") or _FAST_PATH_UNSAFE.search(raw):
+                return None
+            else:
+                value = raw
+            i += 1
+        params[name] = value
+        i += 1
+    return tokens[0], params
+
+
+class _RestReader:
+    """Silent-token GET helper bound to one connection, used by fast-path translators."""
+
+    def __init__(self, connection: str, conn_config: dict):
+        self.connection = connection
+        self.conn_config = conn_config
+        self.resources = []
+        self._tokens = {}
+
+    def _token(self, resource: str, res_config: dict) -> str:
+        if resource not in self._tokens:
+            with _phase("token"):
+                result = _acquire_graph_token(
+                    self.connection, self.conn_config,
+                    scopes=res_config["scopes"], resource=resource, interactive=False,
+                )
+            if "access_token" not in result:
+                raise _FastPathUnavailable(f"no cached {res_config['label']} token")
+            self._tokens[resource] = result["access_token"]
+        return self._tokens[resource]
+
+    def get(self, resource: str, endpoint: str, all_pages: bool = False):
+        """GET an endpoint. With all_pages, follow next links and return the combined value list."""
+        res_config, err = _resolve_resource_config(resource, self.conn_config)
+        if err:
+            raise _FastPathUnavailable(err)
+        endpoint, err = _prepare_endpoint(endpoint, res_config)
+        if err:
+            raise _FastPathUnavailable(err)
+        token = self._token(resource, res_config)
+        if resource not in self.resources:
+            self.resources.append(resource)
+
+        items = []
+        while endpoint:
+            with _scheduled(self.connection, self.conn_config):
+                result = _make_graph_request(
+                    token, endpoint, "GET",
+                    headers=res_config.get("headers"),
+                    base_url=res_config["base_url"], api_label=res_config["label"],
+                    strip_odata=False,
+                )
+            if result["status"] != "success":
+                raise _FastPathUnavailable(result.get("error", "REST error"))
+            data = result["data"]
+            if not all_pages:
+                return data
+            items.extend(data.get("value", []))
+            endpoint = data.get("@odata.nextLink") or data.get("nextLink")
+        return items
+
+
+def _fp_reject_extra(params: dict):
+    if params:
+        raise _FastPathUnavailable(f"parameter -{next(iter(params))} is not translated")
+
+
+def _odata_literal(value: str) -> str:
+    return value.replace("'", "''")
+
+
+def _fp_get_mailbox(params: dict, rest: _RestReader) -> list:
+    """Get-Mailbox -Identity <address> -> Graph user (mailbox-enabled only)."""
+    identity = params.pop("identity", None)
+    params.pop("resultsize", None)
+    _fp_reject_extra(params)
+    if not isinstance(identity, str) or "@" not in identity:
+        raise _FastPathUnavailable("only Get-Mailbox -Identity <address> is translated")
+    # /users/{id} only resolves a UPN or object id; anything else (a proxy
+    # address) is a REST error and goes to the pool
+    user = rest.get("graph", f"/users/{quote(identity)}?$select=id,displayName,userPrincipalName,mail,mailNickname,assignedPlans")
+    # mail alone also covers mail-enabled users and guests, which have no
+    # mailbox; shared and unlicensed mailboxes have no plan and go to the pool too
+    has_mailbox = any(
+        plan.get("service") == "exchange" and plan.get("capabilityStatus") == "Enabled"
+        for plan in user.get("assignedPlans") or []
+    )
+    if not user.get("mail") or not has_mailbox:
+        raise _FastPathUnavailable("no Exchange Online plan on the user")
+    return [{
+        "DisplayName": user.get("displayName"),
+        "Alias": user.get("mailNickname"),
+        "PrimarySmtpAddress": user.get("mail"),
+        "UserPrincipalName": user.get("userPrincipalName"),
+        "ExternalDirectoryObjectId": user.get("id"),
+    }]
+
+
+def _fp_get_team(params: dict, rest: _RestReader) -> list:
+    """Get-Team [-GroupId <id>] [-DisplayName <name>] -> Graph team-enabled groups."""
+    group_id = params.pop("groupid", None)
+    display_name = params.pop("displayname", None)
+    _fp_reject_extra(params)
+    select = "$select=id,displayName,description,visibility,mailNickname"
+    if isinstance(group_id, str):
+        groups = [rest.get("graph", f"/groups/{quote(group_id)}?{select}")]
+    elif group_id is None:
+        team_filter = "resourceProvisioningOptions/Any(x:x eq 'Team')"
+        if isinstance(display_name, str):
+            team_filter += f" and displayName eq '{_odata_literal(display_name)}'"
+        groups = rest.get("graph", f"/groups?$filter={quote(team_filter)}&{select}", all_pages=True)
+    else:
+        raise _FastPathUnavailable("-GroupId needs a value")
+    return [{
+        "GroupId": g.get("id"),
+        "DisplayName": g.get("displayName"),
+        "Visibility": g.get("visibility"),
+        "MailNickName": g.get("mailNickname"),
+        "Description": g.get("description"),
+    } for g in groups]
+
+
+def _fp_get_pnp_list(params: dict, rest: _RestReader) -> list:
+    """Get-PnPList [-Identity <title|guid>] -> SharePoint REST on the tenant root site.
+
+    The pool's PnP session connects to the root site; a session re-pointed with
+    Connect-PnPOnline elsewhere isn't visible from here, which is why only the
+    default root-site form is translated.
+    """
+    identity = params.pop("identity", None)
+    _fp_reject_extra(params)
+    select = "$select=Title,Id,RootFolder/ServerRelativeUrl&$expand=RootFolder"
+    if identity is None:
+        lists = rest.get("sharepoint", f"/_api/web/lists?{select}").get("value", [])
+    elif isinstance(identity, str) and "/" not in identity:
+        if re.fullmatch(r"[0-9a-fA-F-]{36}", identity):
+            path = f"/_api/web/lists(guid'{identity}')"
+        else:
+            path = f"/_api/web/lists/getbytitle('{quote(_odata_literal(identity))}')"
+        lists = [rest.get("sharepoint", f"{path}?{select}")]
+    else:
+        raise _FastPathUnavailable("only list titles and ids are translated for -Identity")
+    return [{
+        "Title": lst.get("Title"),
+        "Id": lst.get("Id"),
+        "Url": (lst.get("RootFolder") or {}).get("ServerRelativeUrl"),
+    } for lst in lists]
+
+
+def _fp_subscription_id(rest: _RestReader) -> str:
+    """Subscription for Az cmdlets: registry "subscriptionId", else the only enabled one."""
+    sub_id = rest.conn_config.get("subscriptionId")
+    if sub_id:
+        return sub_id
+    subs = [s for s in rest.get("arm", "/subscriptions", all_pages=True) if s.get("state") == "Enabled"]
+    if len(subs) != 1:
+        raise _FastPathUnavailable("can't tell which subscription the Az context uses")
+    return subs[0]["subscriptionId"]
+
+
+def _fp_get_az_subscription(params: dict, rest: _RestReader) -> list:
+    """Get-AzSubscription -> ARM /subscriptions."""
+    _fp_reject_extra(params)
+    return [{
+        "Name": s.get("displayName"),
+        "Id": s.get("subscriptionId"),
+        "TenantId": s.get("tenantId"),
+        "State": s.get("state"),
+    } for s in rest.get("arm", "/subscriptions", all_pages=True)]
+
+
+def _fp_get_az_resource_group(params: dict, rest: _RestReader) -> list:
+    """Get-AzResourceGroup [-Name <rg>] -> ARM resource groups in the context subscription."""
+    name = params.pop("name", None)
+    _fp_reject_extra(params)
+    base = f"/subscriptions/{quote(_fp_subscription_id(rest))}/resourcegroups"
+    if isinstance(name, str):
+        groups = [rest.get("arm", f"{base}/{quote(name)}")]
+    elif name is None:
+        groups = rest.get("arm", base, all_pages=True)
+    else:
+        raise _FastPathUnavailable("-Name needs a value")
+    return [{
+        "ResourceGroupName": g.get("name"),
+        "Location": g.get("location"),
+        "ProvisioningState": (g.get("properties") or {}).get("provisioningState"),
+        "Tags": g.get("tags"),
+        "ResourceId": g.get("id"),
+    } for g in groups]
+
+
+# (module, lowercase cmdlet) -> translator(params, rest) -> list of PowerShell-shaped rows
+_FAST_PATH_TRANSLATORS = {
+    ("exo", "get-mailbox"): _fp_get_mailbox,
+    ("teams", "get-team"): _fp_get_team,
+    ("pnp", "get-pnplist"): _fp_get_pnp_list,
+    ("azure", "get-azsubscription"): _fp_get_az_subscription,
+    ("azure", "get-azresourcegroup"): _fp_get_az_resource_group,
+}
+
+
+def _format_ps_value(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "True" if value else "False"
+    if isinstance(value, list):
+        return "{" + ", ".join(_format_ps_value(v) for v in value) + "}"
+    if isinstance(value, dict):
+        return "{" + "; ".join(f"{k}={_format_ps_value(v)}" for k, v in value.items()) + "}"
+    return str(value)
+
+
+def _format_ps_list(rows: list) -> str:
+    """Render rows like PowerShell's Format-List."""
+    blocks = []
+    for row in rows:
+        width = max(len(k) for k in row)
+        blocks.append("\n".join(f"{k.ljust(width)} : {_format_ps_value(v)}" for k, v in row.items()))
+    return "\n\n".join(blocks)
+
+
+def _try_rest_fast_path(connection: str, module: str, command: str, conn_config: dict,
+                        as_json: bool = False) -> tuple:
+    """Serve a simple read cmdlet over REST. Returns (output, resources, fallback_reason).
+
+    output is Format-List text, or the list of row dicts with as_json. It is None
+    when the command isn't a candidate (fallback_reason None) or when translation
+    was attempted but couldn't be done confidently.
+    """
+    if not _REST_FAST_PATH_DEFAULT or conn_config.get("skipRestFastPath") or not conn_config.get("appId"):
+        return None, [], None
+    parsed = _parse_simple_cmdlet(command)
+    if not parsed:
+        return None, [], None
+    cmdlet, params = parsed
+    translator = _FAST_PATH_TRANSLATORS.get((module, cmdlet.lower()))
+    if not translator:
+        return None, [], None
+
+    rest = _RestReader(connection, conn_config)
+    try:
+        rows = translator(params, rest)
+    except _FastPathUnavailable as e:
+        return None, rest.resources, str(e)
+    except SchedulerBusy as e:
+        return None, rest.resources, str(e)
+    if as_json:
+        return rows, rest.resources, None
+    with _phase("serialize"):
+        return _format_ps_list(rows), rest.resources, None
+
+
 # === Session Pool (PowerShell) ===
 
-def call_pool(endpoint: str, method: str = "GET", data: dict = None) -> dict:
-    """Call the session pool API."""
-    url = f"{SESSION_POOL_URL}{endpoint}"
+# Persistent keep-alive client: no TCP/HTTP setup per command. The transport
+# retries only connection failures, so a command is never sent twice.
+_pool_http = httpx.Client(
+    base_url="http://localhost" if SESSION_POOL_UDS else SESSION_POOL_URL,
+    transport=httpx.HTTPTransport(uds=SESSION_POOL_UDS or None, retries=POOL_CONNECT_RETRIES),
+    timeout=httpx.Timeout(POOL_READ_TIMEOUT, connect=POOL_CONNECT_TIMEOUT),
+    limits=httpx.Limits(max_connections=_MAX_CONCURRENCY, max_keepalive_connections=_MAX_CONCURRENCY),
+)
+
+
+def call_pool(endpoint: str, method: str = "GET", data: dict = None, read_timeout: float = None) -> dict:
+    """Call the session pool API. read_timeout overrides MM_POOL_READ_TIMEOUT for slow endpoints."""
+    timeout = httpx.Timeout(read_timeout, connect=POOL_CONNECT_TIMEOUT) if read_timeout else httpx.USE_CLIENT_DEFAULT
     try:
         if method == "GET":
-            resp = httpx.get(url, timeout=120)
+            resp = _pool_http.get(endpoint, timeout=timeout)
+        elif method == "DELETE":
+            resp = _pool_http.delete(endpoint, timeout=timeout)
         else:
-            resp = httpx.post(url, json=data, timeout=120)
-        return resp.json()
+            resp = _pool_http.post(endpoint, json=data, timeout=timeout)
+        _add_call_bytes(
+            request_bytes=len(json.dumps(data).encode()) if data is not None else 0,
+            response_bytes=len(resp.content),
+        )
+        try:
+            return resp.json()
+        except ValueError:
+            return {"status": "error", "error": f"HTTP {resp.status_code} from session pool", "http_status": resp.status_code}
+    except httpx.ConnectError as e:
+        return {"status": "error", "error": f"Session pool unavailable: {e}"}
     except httpx.TimeoutException:
         return {"status": "error", "error": "Request timed out"}
     except Exception as e:
         return {"status": "error", "error": str(e)}
 
 
+def call_pool_ndjson(endpoint: str, data: dict, view: dict) -> dict:
+    """POST to a streaming (NDJSON) pool endpoint, keeping only the requested page.
+
+    Objects outside view's skip/limit (all of them with count_only) are counted
+    but never parsed, so memory stays at one page however large the result set.
+    Returns the stream's _end record plus, on success, the page as "data", the
+    total as "count" and message lines as "output".
+    """
+    skip = max(0, int(view.get("skip") or 0))
+    limit = 0 if view.get("count_only") else max(1, int(view.get("limit") or JSON_PAGE_SIZE))
+    page, messages, end, count, response_bytes = [], [], None, 0, 0
+    timeout = httpx.Timeout(BATCH_READ_TIMEOUT, connect=POOL_CONNECT_TIMEOUT)
+    try:
+        with _pool_http.stream("POST", endpoint, json=data, timeout=timeout) as resp:
+            if resp.status_code != 200:
+                body = resp.read()
+                try:
+                    return json.loads(body)
+                except ValueError:
+                    return {"status": "error", "error": f"HTTP {resp.status_code} from session pool", "http_status": resp.status_code}
+            for line in resp.iter_lines():
+                response_bytes += len(line) + 1
+                if not line:
+                    continue
+                if line.startswith('{"_end"'):
+                    end = json.loads(line)["_end"]
+                elif line.startswith('{"_message"'):
+                    if len(messages) < 50:
+                        messages.append(json.loads(line)["_message"])
+                else:
+                    if skip <= count < skip + limit:
+                        page.append(json.loads(line))
+                    count += 1
+    except httpx.ConnectError as e:
+        return {"status": "error", "error": f"Session pool unavailable: {e}"}
+    except httpx.TimeoutException:
+        return {"status": "error", "error": f"Stream stalled (no output for {BATCH_READ_TIMEOUT:.0f}s) after {count} object(s)"}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+    finally:
+        _add_call_bytes(request_bytes=len(json.dumps(data).encode()), response_bytes=response_bytes)
+
+    if end is None:
+        return {"status": "error", "error": f"Stream ended without a status line after {count} object(s)"}
+    if end.get("status") == "success":
+        end.update(format="json", data=page, count=count, paged=True, output="\n".join(messages))
+    elif end.get("status") == "error":
+        end.setdefault("output", "\n".join(messages))
+    return end
+
+
+def call_pool_sse(endpoint: str, data: dict, report) -> dict:
+    """POST to a Server-Sent Events pool endpoint, reporting output as it arrives.
+
+    New lines are passed to report(lines_so_far, text), batched to at most one
+    call per PROGRESS_INTERVAL. Pool keepalives are reported too, so the
+    client's timeout keeps resetting while pwsh is silent. Returns the end
+    event with the collected lines as "output".
+    """
+    lines, pending, end, event, response_bytes = [], [], None, None, 0
+    last_report = time.monotonic()
+    timeout = httpx.Timeout(BATCH_READ_TIMEOUT, connect=POOL_CONNECT_TIMEOUT)
+    try:
+        with _pool_http.stream("POST", endpoint, json=data, timeout=timeout) as resp:
+            if resp.status_code != 200:
+                body = resp.read()
+                try:
+                    return json.loads(body)
+                except ValueError:
+                    return {"status": "error", "error": f"HTTP {resp.status_code} from session pool", "http_status": resp.status_code}
+            for line in resp.iter_lines():
+                response_bytes += len(line) + 1
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    payload = json.loads(line[len("data: "):])
+                    if event == "end":
+                        end = payload
+                    elif event == "line":
+                        lines.append(payload["line"])
+                        pending.append(payload["line"])
+                now = time.monotonic()
+                if end is None and (pending or line.startswith(":")) and now - last_report >= PROGRESS_INTERVAL:
+                    text = _strip_ansi("\n".join(pending)).strip()
+                    report(len(lines), text[-PROGRESS_MESSAGE_MAX:] or f"Still running ({len(lines)} lines so far)")
+                    pending, last_report = [], now
+    except httpx.ConnectError as e:
+        return {"status": "error", "error": f"Session pool unavailable: {e}"}
+    except httpx.TimeoutException:
+        return {"status": "error", "error": f"Stream stalled (no output for {BATCH_READ_TIMEOUT:.0f}s) after {len(lines)} line(s)"}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+    finally:
+        _add_call_bytes(request_bytes=len(json.dumps(data).encode()), response_bytes=response_bytes)
+
+    if end is None:
+        return {"status": "error", "error": f"Stream ended without an end event after {len(lines)} line(s)"}
+    if end.get("status") == "success":
+        end["output"] = "\n".join(lines)
+    return end
+
+
+# === Predictive Warm-up ===
+
+_warmed = {}  # connection -> time of last warm-up
+_warmed_lock = threading.Lock()
+
+
+def _schedule_warmup(connection: str = None, current_module: str = None):
+    """Warm a connection in the background: after a listing (no connection) the
+    most recently used one, otherwise a tool call's connection the first time it
+    is seen. Later calls on it cost a dict lookup, nothing more.
+
+    current_module is already being started by the call that triggered this.
+    """
+    if not WARMUP_ENABLED:
+        return
+    if connection is not None:
+        with _warmed_lock:
+            if connection in _warmed:
+                return
+    threading.Thread(target=_warmup, args=(connection, current_module), daemon=True, name="mm-warmup").start()
+
+
+def _warmup(connection: str, current_module: str = None):
+    """Silent token refresh plus pool pre-create. Never starts a device code flow."""
+    try:
+        usage = None
+        if connection is None:
+            usage = get_connection_usage("mm")
+            registry = load_registry().get("connections", {})
+            recent = [c for c in usage if c in registry]
+            if not recent:
+                return
+            connection = max(recent, key=lambda c: usage[c]["last"] or "")
+        # Throttle before reading the registry or the activity log
+        with _warmed_lock:
+            if time.time() - _warmed.get(connection, 0) < WARMUP_INTERVAL:
+                return
+            _warmed[connection] = time.time()
+        conn_config = load_registry().get("connections", {}).get(connection)
+        if not conn_config:
+            return
+        if usage is None:
+            usage = get_connection_usage("mm")
+
+        profile = usage.get(connection, {})
+        resource_counts = profile.get("resources") or {"graph": 1}
+        resources = sorted(resource_counts, key=lambda r: -resource_counts[r])
+        module_counts = profile.get("modules", {})
+        modules = [m for m in sorted(module_counts, key=lambda m: -module_counts[m]) if m != current_module]
+        modules = modules[:WARMUP_MODULES]
+
+        warmed = []
+        for resource in resources:
+            if resource not in RESOURCE_CONFIGS:
+                continue
+            res_config, err = _resolve_resource_config(resource, conn_config)
+            if err:
+                continue
+            token = _acquire_graph_token(connection, conn_config, scopes=res_config["scopes"],
+                                         resource=resource, interactive=False)
+            if "access_token" in token:
+                warmed.append(resource)
+        for module in modules:
+            result = call_pool("/warm", "POST", {"connection": connection, "module": module})
+            if result.get("status") in ("warming", "authenticated", "ready"):
+                warmed.append(f"pool:{module}")
+        if warmed:
+            sys.stderr.write(f"[mm] Warmed {connection}: {', '.join(warmed)}\n")
+    except Exception as e:
+        sys.stderr.write(f"[mm] Warm-up for {connection} failed: {e}\n")
+
+
 # === MCP Server ===
 
 server = Server("mm")
@@ -756,7 +1916,7 @@ async def list_tools():
     return [
         Tool(
             name="run",
-            description="Execute a PowerShell command via session pool. Omit all params to list connections. Provide connection+module+command to execute.",
+            description="Execute a PowerShell command via session pool. Omit all params to list connections. Provide connection+module+command to execute. Commands still running after ~25s return a job_id: poll with connection+job_id (and offset), or cancel with cancel=true.",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -777,12 +1937,117 @@ async def list_tools():
                         "type": "boolean",
                         "description": "Set to true to bypass send guards after reviewing the draft preview.",
                     },
+                    "job_id": {
+                        "type": "string",
+                        "description": "Poll a command that was still running (returned by an earlier run). Requires connection.",
+                    },
+                    "offset": {
+                        "type": "integer",
+                        "description": "With job_id: only return output after this many lines (next_offset from the last poll).",
+                    },
+                    "cancel": {
+                        "type": "boolean",
+                        "description": "With job_id: cancel the running command.",
+                    },
+                    "fresh": {
+                        "type": "boolean",
+                        "description": "Re-run a read-only command instead of using the session pool's cached result.",
+                    },
+                    "format": {
+                        "type": "string",
+                        "description": "json returns the command's objects as JSON (paged with skip/limit) instead of formatted text. Don't add Format-*/Out-String.",
+                        "enum": ["text", "json"],
+                        "default": "text",
+                    },
+                    "properties": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "format=json: properties to keep (Select-Object names, wildcards allowed).",
+                    },
+                    "depth": {
+                        "type": "integer",
+                        "description": "format=json: serialization depth for nested objects (1-10, default 2).",
+                    },
+                    "skip": {
+                        "type": "integer",
+                        "description": "format=json: objects to skip (paging).",
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": f"format=json: max objects to return (default {JSON_PAGE_SIZE}).",
+                    },
+                    "count_only": {
+                        "type": "boolean",
+                        "description": "format=json: return only the number of objects.",
+                    },
+                    "stream": {
+                        "type": "boolean",
+                        "description": "For very large results: stream objects from the pool as JSON, keeping only the requested page (skip/limit) or count. Implies format=json; no job handle.",
+                    },
+                    "store": {
+                        "type": "boolean",
+                        "description": "Keep the full result in the session and return a handle with the count and first page (implies format=json). Page, filter or sort it later with handle instead of re-running the query.",
+                    },
+                    "handle": {
+                        "type": "string",
+                        "description": "Query a result stored with store=true (requires connection and module; no command). Use with skip/limit, filter, sort_by, properties, count_only or release.",
+                    },
+                    "filter": {
+                        "type": "string",
+                        "description": "With handle: Where-Object condition, e.g. \"$_.RecipientTypeDetails -eq 'SharedMailbox'\".",
+                    },
+                    "sort_by": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "With handle: properties to sort by.",
+                    },
+                    "descending": {
+                        "type": "boolean",
+                        "description": "With handle and sort_by: sort descending.",
+                    },
+                    "release": {
+                        "type": "boolean",
+                        "description": "With handle: free the stored result.",
+                    },
+                },
+            },
+        ),
+        Tool(
+            name="run_batch",
+            description="Execute several PowerShell commands in order on one session, in a single round trip. Each command's output is returned with its own status (a command fails when it writes errors). Use for multi-step admin tasks instead of separate run calls.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "connection": {
+                        "type": "string",
+                        "description": "Connection name from ~/.m365-connections.json",
+                    },
+                    "module": {
+                        "type": "string",
+                        "description": "exo=Exchange, pnp=SharePoint, azure, teams",
+                        "enum": ["exo", "pnp", "azure", "teams"],
+                    },
+                    "commands": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "PowerShell commands, run in order. Variables persist between them.",
+                    },
+                    "stop_on_error": {
+                        "type": "boolean",
+                        "description": "Skip the remaining commands after the first one that fails.",
+                        "default": False,
+                    },
+                    "confirmed": {
+                        "type": "boolean",
+                        "description": "Set to true to bypass send guards after reviewing the draft preview.",
+                    },
                 },
+                "required": ["connection", "module", "commands"],
             },
         ),
         Tool(
             name="graph_request",
-            description="Microsoft REST API. Omit all params to list connections. Provide connection+endpoint to call Graph.\n\nFor Power Automate: use resource='flow' — this handles auth to https://service.flow.microsoft.com automatically. Do NOT use Get-AzAccessToken or m365 util accesstoken for Flow API tokens.",
+            description="Microsoft REST API. Omit all params to list connections. Provide connection+endpoint to call Graph.\n\nFor Power Automate: use resource='flow' — this handles auth to https://service.flow.microsoft.com automatically. Do NOT use Get-AzAccessToken or m365 util accesstoken for Flow API tokens.\n\nFor Azure: use resource='arm' (management.azure.com, e.g. '/subscriptions/{subId}/resourcegroups'); api-version is added for common providers, otherwise pass api_version. For SharePoint REST: use resource='sharepoint' with a '/_api/...' path (e.g. '/sites/hr/_api/web/lists'); the tenant's SharePoint host is resolved automatically.",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -806,10 +2071,14 @@ async def list_tools():
                     },
                     "resource": {
                         "type": "string",
-                        "description": "Target API: 'graph' (default) for Microsoft Graph, 'flow' for Power Automate",
-                        "enum": ["graph", "flow"],
+                        "description": "Target API: 'graph' (default) for Microsoft Graph, 'flow' for Power Automate, 'arm' for Azure Resource Manager, 'sharepoint' for SharePoint REST (/_api)",
+                        "enum": ["graph", "flow", "arm", "sharepoint"],
                         "default": "graph",
                     },
+                    "api_version": {
+                        "type": "string",
+                        "description": "ARM api-version (resource='arm' only). Defaults are provided for common providers.",
+                    },
                     "confirmed": {
                         "type": "boolean",
                         "description": "Set to true to bypass send guards after reviewing the draft preview.",
@@ -820,23 +2089,58 @@ async def list_tools():
     ]
 
 
+def _dispatch_tool(name: str, arguments: dict) -> list:
+    """Route a tool call to its (blocking) handler."""
+    if name == "run":
+        return _handle_run(arguments)
+    if name == "run_batch":
+        return _handle_run_batch(arguments)
+    if name == "graph_request":
+        return _handle_graph_request(arguments)
+    return [TextContent(type="text", text=f"Unknown tool: {name}")]
+
+
+def _progress_reporter():
+    """Thread-safe MCP progress callback for the current request, or None when
+    the client sent no progressToken (or outside a request, as in the bench)."""
+    try:
+        ctx = server.request_context
+    except LookupError:
+        return None
+    token = ctx.meta.progressToken if ctx.meta else None
+    if token is None:
+        return None
+    loop = asyncio.get_running_loop()
+
+    def report(progress: float, message: str):
+        asyncio.run_coroutine_threadsafe(
+            ctx.session.send_progress_notification(token, progress, message=message, related_request_id=ctx.request_id),
+            loop,
+        )
+    return report
+
+
 @server.call_tool()
 async def call_tool(name: str, arguments: dict):
     start_time = time.time()
     error_msg = None
     result_summary = None
     connection_name = arguments.get("connection")
+    details = {}
+    result_text = None
+    _CALL_DETAILS.set(details)
+    _PROGRESS.set(_progress_reporter())
+    if connection_name:
+        _schedule_warmup(connection_name, arguments.get("module"))
 
     try:
-        if name == "run":
-            result = _handle_run(arguments)
-        elif name == "graph_request":
-            result = _handle_graph_request(arguments)
-        else:
-            result = [TextContent(type="text", text=f"Unknown tool: {name}")]
+        # Handlers do blocking I/O — run them off the event loop so concurrent
+        # tool calls actually overlap (and identical GETs can be coalesced)
+        result = await asyncio.to_thread(_dispatch_tool, name, arguments)
 
         if result and len(result) > 0:
-            text = result[0].text[:100] if hasattr(result[0], 'text') else str(result[0])[:100]
+            result_text = result[0].text if hasattr(result[0], 'text') else str(result[0])
+            text = result_text[:100]
             if "error" in text.lower():
                 error_msg = text
             else:
@@ -846,7 +2150,16 @@ async def call_tool(name: str, arguments: dict):
         error_msg = str(e)
         raise
     finally:
-        duration_ms = int((time.time() - start_time) * 1000)
+        duration_s = time.time() - start_time
+        duration_ms = int(duration_s * 1000)
+        phases = details.get("phases_ms")
+        if phases:
+            details["phases_ms"] = {k: round(v, 2) for k, v in phases.items()}
+            details["queue_wait_ms"] = int(phases.get("queue", 0))
+            details["upstream_ms"] = int(phases.get("io", 0))
+        if result_text is not None:
+            details["result_bytes"] = len(result_text.encode())
+        _record_call_metrics(name, connection_name, details, duration_s, error_msg is None)
         log_tool_call(
             mcp_name="mm",
             tool_name=name,
@@ -855,11 +2168,13 @@ async def call_tool(name: str, arguments: dict):
             result=result_summary,
             error=error_msg,
             duration_ms=duration_ms,
+            details=details or None,
         )
 
 
 def _list_connections() -> list:
     """List connections from registry. Only expose name + description."""
+    _schedule_warmup()
     registry = load_registry()
     connections = registry.get("connections", {})
 
@@ -890,6 +2205,14 @@ def _handle_run(arguments: dict) -> list:
     module = arguments.get("module")
     command = arguments.get("command")
 
+    # Poll or cancel a job started by an earlier run
+    if arguments.get("job_id"):
+        return _handle_run_job(arguments)
+
+    # Page, filter, sort or release a stored result set
+    if arguments.get("handle"):
+        return _handle_run_handle(arguments)
+
     # No params = list connections
     if not connection and not module and not command:
         return _list_connections()
@@ -906,21 +2229,253 @@ def _handle_run(arguments: dict) -> list:
     # Extract confirmed — check top-level args, then look for it embedded in the command string
     confirmed = arguments.get("confirmed", False)
 
+    store = bool(arguments.get("store"))
+    stream = bool(arguments.get("stream")) and not store
+    as_json = arguments.get("format") == "json" or stream or store
+
+    # Simple read cmdlets: try direct REST before paying for a pwsh round trip
+    # (not for store, whose result has to live in the pwsh session)
+    fast_output, fast_resources, fallback_reason = (None, [], None) if store else _try_rest_fast_path(
+        connection, module, command, conn_config, as_json=as_json,
+    )
+    if fast_output is not None:
+        label = ", ".join(RESOURCE_CONFIGS[r]["label"] for r in fast_resources)
+        _record_call_detail(path="rest", rest_resources=fast_resources)
+        if as_json:
+            with _phase("serialize"):
+                fast_output = _format_json_result(_project_properties(fast_output, arguments.get("properties")), arguments)
+        return [TextContent(
+            type="text",
+            text=f"**Note:** Served via {label} REST fast path (no PowerShell session).\n\n"
+                 f"{fast_output or '(no output)'}",
+        )]
+    _record_call_detail(path="pool")
+    if fallback_reason:
+        _record_call_detail(fast_path_fallback=fallback_reason)
+
     # Run hooks (missing module redirects, send guards, etc.)
-    command, run_notes = _run_run_hooks(command, module, conn_config, confirmed=confirmed)
+    with _phase("hooks"):
+        command, run_notes = _run_run_hooks(command, module, conn_config, confirmed=confirmed)
     if command is None:
         # Hook blocked execution — return the notes as the response
         return [TextContent(type="text", text="\n\n".join(run_notes))]
 
-    # Execute command via session pool
-    result = call_pool("/run", "POST", {
-        "connection": connection,
-        "module": module,
-        "command": command,
-        "caller_id": "mm-mcp",
-    })
+    # Execute command via session pool: submit as a job and wait up to
+    # RUN_WAIT_SECONDS, so long commands return a handle instead of timing out
+    # (unless the client takes progress notifications, see call_pool_sse)
+    payload = {"connection": connection, "module": module, "command": command, "caller_id": "mm-mcp"}
+    if arguments.get("fresh"):
+        payload["fresh"] = True
+    if as_json:
+        payload["format"] = "json"
+        for key in ("depth", "properties"):
+            if arguments.get(key) is not None:
+                payload[key] = arguments[key]
+    if store:
+        payload.update(store=True, **_handle_page(arguments))
+    try:
+        with _scheduled(connection, conn_config):
+            result = None
+            if stream:
+                # Streams always run (no cache lookup) and are formatted by the pool per object
+                stream_payload = {k: v for k, v in payload.items() if k not in ("format", "fresh")}
+                result = call_pool_ndjson("/run/ndjson", stream_payload, arguments)
+                if result.get("http_status") == 404:
+                    run_notes.append("Session pool has no streaming endpoint; ran as a regular format=json command.")
+                    result = None
+            elif not as_json and _PROGRESS.get():
+                # The client takes progress notifications: stream the output live
+                result = call_pool_sse("/run/stream", payload, _PROGRESS.get())
+                if result.get("http_status") == 404:
+                    result = None  # Pool image without /run/stream
+                else:
+                    _record_call_detail(pool_stream="sse")
+            if result is None:
+                result = call_pool("/jobs", "POST", {**payload, "wait": RUN_WAIT_SECONDS})
+            if result.get("http_status") == 404:
+                # Pool image without the /jobs API
+                result = call_pool("/run", "POST", payload)
+    except SchedulerBusy as e:
+        return [TextContent(type="text", text=f"Error: {e}")]
+
+    if fallback_reason:
+        run_notes.append(f"Ran in the session pool (REST fast path not used: {fallback_reason}).")
+    return _format_run_result(result, connection, module, command, conn_config, run_notes, view=arguments)
+
+
+def _handle_run_job(arguments: dict) -> list:
+    """Poll (or cancel) a pool job returned by an earlier run."""
+    connection = arguments.get("connection")
+    job_id = arguments["job_id"]
+    if not connection:
+        return [TextContent(type="text", text="Error: connection is required with job_id")]
+
+    conn_config, err = get_connection_config(connection)
+    if err:
+        return [TextContent(type="text", text=err)]
+
+    _record_call_detail(path="pool", job_id=job_id)
+    query = {"connection": connection, "offset": int(arguments.get("offset") or 0)}
+    try:
+        with _scheduled(connection, conn_config):
+            if arguments.get("cancel"):
+                result = call_pool(f"/jobs/{quote(job_id)}/cancel?{urlencode(query)}", "POST")
+            else:
+                result = call_pool(f"/jobs/{quote(job_id)}?{urlencode({**query, 'wait': RUN_WAIT_SECONDS})}")
+    except SchedulerBusy as e:
+        return [TextContent(type="text", text=f"Error: {e}")]
+
+    notes = []
+    if result.get("job_id") and result.get("status") not in ("queued", "running", "cancelled"):
+        notes.append(f"Job {job_id} finished after {result.get('elapsed_s', '?')}s.")
+    return _format_run_result(
+        result, connection, result.get("module", arguments.get("module", "")),
+        result.get("command", ""), conn_config, notes, view=arguments,
+    )
+
+
+def _handle_page(arguments: dict) -> dict:
+    """Pool skip/limit for a handle page (count_only needs no objects)."""
+    return {
+        "skip": max(0, int(arguments.get("skip") or 0)),
+        "limit": 0 if arguments.get("count_only") else max(1, int(arguments.get("limit") or JSON_PAGE_SIZE)),
+    }
+
+
+def _handle_run_handle(arguments: dict) -> list:
+    """Page, filter, sort or release a result set stored by run with store=true."""
+    connection = arguments.get("connection")
+    module = arguments.get("module")
+    handle = arguments["handle"]
+    if not connection or not module:
+        return [TextContent(type="text", text="Error: connection and module are required with handle")]
+
+    conn_config, err = get_connection_config(connection)
+    if err:
+        return [TextContent(type="text", text=err)]
 
+    # The filter runs inside pwsh like a command, so it gets the same run hooks
+    filter_expr = arguments.get("filter")
+    run_notes = []
+    if filter_expr is not None and not arguments.get("release"):
+        with _phase("hooks"):
+            filter_expr, run_notes = _run_run_hooks(filter_expr, module, conn_config,
+                                                    confirmed=arguments.get("confirmed", False))
+        if filter_expr is None:
+            return [TextContent(type="text", text="\n\n".join(run_notes))]
+
+    _record_call_detail(path="pool", handle=handle)
+    try:
+        with _scheduled(connection, conn_config):
+            if arguments.get("release"):
+                result = call_pool(f"/handles/{quote(handle)}?{urlencode({'connection': connection, 'module': module})}", "DELETE")
+            else:
+                body = {"connection": connection, "module": module, "caller_id": "mm-mcp", **_handle_page(arguments)}
+                if filter_expr is not None:
+                    body["filter"] = filter_expr
+                for key in ("sort_by", "descending", "depth", "properties"):
+                    if arguments.get(key) is not None:
+                        body[key] = arguments[key]
+                result = call_pool(f"/handles/{quote(handle)}", "POST", body)
+    except SchedulerBusy as e:
+        return [TextContent(type="text", text=f"Error: {e}")]
+
+    if result.get("status") == "released":
+        return [TextContent(type="text", text=f"Released handle {handle}.")]
+    return _format_run_result(result, connection, module, f"handle {handle}", conn_config, run_notes, view=arguments)
+
+
+def _format_handle_hint(result: dict, connection: str, module: str, view: dict) -> str:
+    """How to query a stored result set further."""
+    handle = result["handle"]
+    total = result.get("total", result.get("count", 0))
+    lines = [f"Handle {handle} keeps {total} object(s) in the {module} session "
+             f"(freed after {result.get('handle_ttl_s', 900) // 60} min unused)."]
+    if view.get("filter"):
+        lines.append(f"Filter matched {result.get('count', 0)} of {total}.")
+    if view.get("handle"):
+        return "\n".join(lines)
+    lines += [
+        f'Query: run(connection="{connection}", module="{module}", handle="{handle}", '
+        f'filter="$_.Name -like \'a*\'", sort_by=["Name"], skip=N)',
+        f'Release: run(connection="{connection}", module="{module}", handle="{handle}", release=true)',
+    ]
+    return "\n".join(lines)
+
+
+def _format_job_pending(result: dict, connection: str) -> str:
+    """Job handle text for a command that is still queued or running."""
+    job_id = result.get("job_id")
+    next_offset = result.get("next_offset", 0)
+    output = _strip_ansi(result.get("output", "")).strip()
+    lines = [
+        f"Job {job_id} is still {result.get('status')} after {result.get('elapsed_s', '?')}s "
+        f"({connection}/{result.get('module', '?')}).",
+    ]
+    if result.get("cancel_requested"):
+        lines.append("Cancellation requested.")
+    if output:
+        lines += ["", "Output so far:", output]
+    lines += [
+        "",
+        f'Poll: run(connection="{connection}", job_id="{job_id}", offset={next_offset})',
+        f'Cancel: run(connection="{connection}", job_id="{job_id}", cancel=true)',
+    ]
+    return "\n".join(lines)
+
+
+def _project_properties(rows: list, properties: list) -> list:
+    """Keep only matching keys (case-insensitive wildcards, like Select-Object -Property)."""
+    if not properties:
+        return rows
+    patterns = [p.lower() for p in properties]
+    return [
+        {k: v for k, v in row.items() if any(fnmatchcase(k.lower(), p) for p in patterns)}
+        for row in rows
+    ]
+
+
+def _format_json_result(data: list, view: dict, total: int = None) -> str:
+    """Page (skip/limit) or count format=json objects for the response.
+
+    total is given when data is already the page at skip (streamed results).
+    """
+    paged = total is not None
+    if not paged:
+        total = len(data)
+    if view.get("count_only"):
+        return f"Count: {total}"
+    skip = max(0, int(view.get("skip") or 0))
+    limit = max(1, int(view.get("limit") or JSON_PAGE_SIZE))
+    page = data if paged else data[skip:skip + limit]
+    header = f"{total} object(s)"
+    if len(page) < total:
+        header += f", showing {skip + 1}-{skip + len(page)}" if page else f", none after skip={skip}"
+    if skip + len(page) < total:
+        header += f". Next page: skip={skip + len(page)}"
+    return f"{header}\n{json.dumps(page, ensure_ascii=False, default=str)}"
+
+
+def _strip_ansi(output: str) -> str:
+    output = re.sub(r'\x1b\[[0-9;]*m', '', output)
+    return re.sub(r'\x1b\[\?[0-9]+[hl]', '', output)
+
+
+def _recycled_note(recycled: dict) -> str:
+    """Note for a response whose worker was recycled since the previous command."""
+    return (f"The session's pwsh process was recycled before this command ran ({recycled.get('reason', 'limit reached')}). "
+            f"Variables and other state from earlier commands are gone, so set them again if needed.")
+
+
+def _format_run_result(result: dict, connection: str, module: str, command: str,
+                       conn_config: dict, run_notes: list, view: dict = None) -> list:
+    """Turn a pool /run or /jobs response into the run tool's text.
+
+    view carries the format=json paging arguments (skip, limit, count_only).
+    """
     status = result.get("status")
+    if result.get("recycled"):
+        run_notes.append(_recycled_note(result["recycled"]))
 
     # Log full pool response for diagnostics
     if status == "error":
@@ -948,14 +2503,61 @@ def _handle_run(arguments: dict) -> list:
     if status == "auth_in_progress":
         return [TextContent(type="text", text="Auth in progress by another caller. Retry in a few seconds.")]
 
+    if status in ("queued", "running"):
+        _record_call_detail(job_id=result.get("job_id"), job_status=status)
+        return [TextContent(type="text", text=_format_job_pending(result, connection))]
+
+    if status == "cancelled":
+        what = f"Job {result['job_id']}" if result.get("job_id") else "Command"
+        if result.get("worker_killed"):
+            text = (f"{what} cancelled. It did not stop when interrupted, so its pwsh process was killed; "
+                    f"the next command may start a fresh {module} session (Teams may ask for a new device code).")
+        else:
+            text = f"{what} cancelled; the {module} session is still signed in."
+        output = _strip_ansi(result.get("output") or "").strip()
+        if output:
+            text += f"\n\nOutput before the cancel:\n{output}"
+        return [TextContent(type="text", text=text)]
+
     if status == "error":
-        return [TextContent(type="text", text=f"Error: {result.get('error', 'Unknown error')}")]
+        text = f"Error: {result.get('error', 'Unknown error')}"
+        # A command that failed in pwsh carries its error text in the output
+        output = _strip_ansi(result.get("output") or "").strip()
+        if output:
+            text += f"\n\n{output}"
+        if result.get("recycled"):
+            text += f"\n\n**Note:** {_recycled_note(result['recycled'])}"
+        return [TextContent(type="text", text=text)]
 
     if status == "success":
         output = result.get("output", "")
-        # Strip ANSI codes
-        output = re.sub(r'\x1b\[[0-9;]*m', '', output)
-        output = re.sub(r'\x1b\[\?[0-9]+[hl]', '', output)
+        cache = result.get("cache") or {}
+        if cache.get("hit"):
+            _record_call_detail(pool_cache="hit")
+            run_notes.append(
+                f"Cached result from {cache.get('age_s', 0):.0f}s ago (read-only command, kept {cache.get('ttl_s')}s). "
+                f"Pass fresh=true to re-run."
+            )
+        if result.get("json_error"):
+            run_notes.append(f"format=json failed ({result['json_error']}); showing text output.")
+        if result.get("handle_error"):
+            run_notes.append(f"Not stored: {result['handle_error']}.")
+        with _phase("serialize"):
+            if result.get("format") == "json":
+                # ConvertTo-Json output has no ANSI codes; only the leftover message lines need stripping
+                messages = _strip_ansi(output).strip()
+                # Streamed and stored results arrive already paged, with the full count
+                paged = result.get("paged") or result.get("handle") or result.get("handle_error")
+                output = _format_json_result(
+                    result.get("data", []), view or {}, total=result.get("count") if paged else None,
+                )
+                if messages:
+                    output += f"\n\nMessages:\n{messages}"
+                if result.get("handle"):
+                    output += "\n\n" + _format_handle_hint(result, connection, module, view or {})
+            else:
+                # Strip ANSI codes
+                output = _strip_ansi(output)
 
         # Check for email mismatch — log it, don't expose details to AI
         authenticated_as = result.get("authenticated_as")
@@ -979,6 +2581,78 @@ def _handle_run(arguments: dict) -> list:
     return [TextContent(type="text", text=json.dumps(result, indent=2))]
 
 
+def _handle_run_batch(arguments: dict) -> list:
+    connection = arguments.get("connection")
+    module = arguments.get("module")
+    commands = arguments.get("commands") or []
+
+    if not connection or not module or not commands:
+        return [TextContent(type="text", text="Error: connection, module, and commands are all required")]
+    if not all(isinstance(c, str) and c.strip() for c in commands):
+        return [TextContent(type="text", text="Error: commands must be non-empty strings")]
+
+    conn_config, err = get_connection_config(connection)
+    if err:
+        return [TextContent(type="text", text=err)]
+
+    # Hooks run per command; any block stops the whole batch before it is sent
+    confirmed = arguments.get("confirmed", False)
+    prepared, notes = [], []
+    with _phase("hooks"):
+        for i, command in enumerate(commands):
+            command, run_notes = _run_run_hooks(command, module, conn_config, confirmed=confirmed)
+            if command is None:
+                return [TextContent(type="text", text=f"Batch not run — command {i + 1} was held:\n\n" + "\n\n".join(run_notes))]
+            prepared.append(command)
+            notes += [f"[{i + 1}] {n}" for n in run_notes]
+
+    _record_call_detail(path="pool", batch_size=len(prepared))
+    try:
+        with _scheduled(connection, conn_config):
+            result = call_pool("/run_batch", "POST", {
+                "connection": connection,
+                "module": module,
+                "commands": prepared,
+                "stop_on_error": bool(arguments.get("stop_on_error")),
+                "caller_id": "mm-mcp",
+            }, read_timeout=BATCH_READ_TIMEOUT)
+    except SchedulerBusy as e:
+        return [TextContent(type="text", text=f"Error: {e}")]
+
+    status = result.get("status")
+    if status == "auth_required":
+        return _format_device_code(result.get("device_code", ""), connection, conn_config, f"Module: {module}")
+    if status == "error" and not result.get("results"):
+        log_tool_call(
+            mcp_name="mm", tool_name="run_batch",
+            arguments={"connection": connection, "module": module, "commands": len(prepared)},
+            error=f"Pool error: {result.get('error', 'unknown')}",
+            duration_ms=0,
+        )
+        return [TextContent(type="text", text=f"Error: {result.get('error', 'Unknown error')}")]
+
+    with _phase("serialize"):
+        results = result.get("results", [])
+        sections = []
+        if status == "error":
+            sections.append(f"Error: {result.get('error', 'Unknown error')} (batch stopped after {len(results)} command(s))")
+        else:
+            sections.append(
+                f"Batch: {result.get('succeeded', 0)} succeeded, {result.get('failed', 0)} failed, "
+                f"{result.get('skipped', 0)} skipped"
+            )
+        sections += [f"**Note:** {n}" for n in notes]
+        if result.get("recycled"):
+            sections.append(f"**Note:** {_recycled_note(result['recycled'])}")
+        for r in results:
+            label = {"success": "OK", "error": f"ERROR ({r.get('error_count', 0)} error(s))", "skipped": "SKIPPED"}.get(r["status"], r["status"])
+            timing = f" {r['elapsed_ms']}ms" if "elapsed_ms" in r else ""
+            header = f"[{r['index'] + 1}/{len(prepared)}] {label}{timing}: {r['command'][:120]}"
+            output = _strip_ansi(r.get("output", "")).strip()
+            sections.append(f"{header}\n{output}" if output else header)
+    return [TextContent(type="text", text="\n\n".join(sections))]
+
+
 # === Graph API (graph_request) ===
 
 def _handle_graph_request(arguments: dict) -> list:
@@ -997,8 +2671,7 @@ def _handle_graph_request(arguments: dict) -> list:
         return [TextContent(type="text", text="Error: endpoint is required (e.g., '/me/messages')")]
 
     # Validate resource
-    res_config = RESOURCE_CONFIGS.get(resource)
-    if not res_config:
+    if resource not in RESOURCE_CONFIGS:
         available = ", ".join(RESOURCE_CONFIGS.keys())
         return [TextContent(type="text", text=f"Error: Unknown resource '{resource}'. Available: {available}")]
 
@@ -1010,14 +2683,23 @@ def _handle_graph_request(arguments: dict) -> list:
     if not conn_config.get("appId"):
         return [TextContent(type="text", text=f"Error: Connection '{connection}' is not configured for API access.")]
 
+    res_config, err = _resolve_resource_config(resource, conn_config)
+    if err:
+        return [TextContent(type="text", text=err)]
+
+    request_endpoint, err = _prepare_endpoint(endpoint, res_config, arguments.get("api_version"))
+    if err:
+        return [TextContent(type="text", text=err)]
+
     # Acquire token with resource-specific scopes
-    token_result = _acquire_graph_token(
-        connection, conn_config,
-        scopes=res_config["scopes"], resource=resource,
-    )
+    with _phase("token"):
+        token_result = _acquire_graph_token(
+            connection, conn_config,
+            scopes=res_config["scopes"], resource=resource,
+        )
 
     if "device_code" in token_result:
-        label = "Graph API" if resource == "graph" else f"Power Automate ({resource})"
+        label = res_config["label"] if resource == "graph" else f"{res_config['label']} ({resource})"
         return _format_device_code(token_result["device_code"], connection, conn_config, f"Tool: {label}")
 
     if "error" in token_result:
@@ -1036,22 +2718,37 @@ def _handle_graph_request(arguments: dict) -> list:
         confirmed = body.pop("confirmed", False)
 
     # Run Graph hooks (send guards, signature stripping, etc.)
-    body, notes = _run_graph_hooks(endpoint, method, body, conn_config, confirmed=confirmed)
+    with _phase("hooks"):
+        body, notes = _run_graph_hooks(endpoint, method, body, conn_config, confirmed=confirmed)
 
     # Guard hook blocked execution — return the draft preview
     if body is _GRAPH_BLOCKED:
         return [TextContent(type="text", text="\n\n".join(notes))]
 
-    result = _make_graph_request(
-        access_token, endpoint, method, body,
-        base_url=base_url,
-    )
+    def do_request():
+        try:
+            with _scheduled(connection, conn_config):
+                return _make_graph_request(
+                    access_token, request_endpoint, method, body,
+                    headers=res_config.get("headers"),
+                    base_url=base_url, api_label=res_config["label"],
+                )
+        except SchedulerBusy as e:
+            return {"status": "error", "error": str(e)}
+
+    if _COALESCE_GETS and method.upper() == "GET":
+        key = (connection, resource, _normalize_url(_build_api_url(request_endpoint, base_url)))
+        result, shared = _graph_singleflight.do(key, do_request)
+        _record_call_detail(coalesced=shared, singleflight=_graph_singleflight.stats())
+    else:
+        result = do_request()
 
     if result["status"] == "error":
         return [TextContent(type="text", text=f"Error: {result['error']}")]
 
     data = result["data"]
-    output = json.dumps(data, indent=2)
+    with _phase("serialize"):
+        output = json.dumps(data, indent=2)
     if notes:
         prefix = "\n".join(f"**Note:** {n}" for n in notes)
         output = f"{prefix}\n\n{output}"
@@ -1060,11 +2757,117 @@ def _handle_graph_request(arguments: dict) -> list:
 
 # === Main ===
 
+def _reload(*_):
+    """SIGHUP: re-read the registry and on-disk token caches on next use.
+
+    HTTP pools, schedulers, coalescing and metrics stay warm; in-flight calls
+    are not interrupted.
+    """
+    global _REGISTRY_CACHE
+    with _REGISTRY_LOCK:
+        _REGISTRY_CACHE = None
+    with _MSAL_APPS_LOCK:
+        _MSAL_APPS.clear()
+    sys.stderr.write("[mm] Reloaded: registry and token caches will be re-read\n")
+
+
+class _MCPEndpoint:
+    """ASGI app for /mcp, handing requests to the MCP transport."""
+
+    def __init__(self, session_manager):
+        self.session_manager = session_manager
+
+    async def __call__(self, scope, receive, send):
+        await self.session_manager.handle_request(scope, receive, send)
+
+
+class _BearerAuth:
+    """ASGI middleware: require "Authorization: Bearer MM_HTTP_TOKEN" except on /health."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] != "/health":
+            supplied = dict(scope.get("headers") or []).get(b"authorization", b"").decode("latin-1")
+            if not hmac.compare_digest(supplied, f"Bearer {HTTP_TOKEN}"):
+                from starlette.responses import JSONResponse
+                response = JSONResponse({"error": "Unauthorized"}, status_code=401,
+                                        headers={"WWW-Authenticate": "Bearer"})
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+async def serve_http(host: str, port: int):
+    """Serve the same tools on the streamable HTTP transport at http://host:port/mcp.
+
+    Stateless: every request is independent (like MCPJungle's stateless mode),
+    but all in-process state lives as long as the service. Also serves /health
+    and /metrics. SIGHUP reloads (see _reload); SIGTERM drains in-flight calls.
+    """
+    from contextlib import asynccontextmanager
+
+    import uvicorn
+    from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, Response
+    from starlette.routing import Route
+
+    session_manager = StreamableHTTPSessionManager(app=server, stateless=True)
+    started = time.time()
+
+    async def health(request):
+        return JSONResponse({
+            "status": "ok",
+            "uptime_s": round(time.time() - started),
+            "scheduler": _scheduler.stats(),
+            "singleflight": _graph_singleflight.stats(),
+        })
+
+    async def metrics(request):
+        return Response(_metrics.render(), media_type="application/openmetrics-text; version=1.0.0; charset=utf-8")
+
+    @asynccontextmanager
+    async def lifespan(app):
+        async with session_manager.run():
+            yield
+
+    app = Starlette(
+        routes=[
+            Route("/mcp", endpoint=_MCPEndpoint(session_manager)),
+            Route("/health", endpoint=health),
+            Route("/metrics", endpoint=metrics),
+        ],
+        lifespan=lifespan,
+    )
+    if hasattr(signal, "SIGHUP"):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, _reload)
+    if HTTP_TOKEN:
+        app = _BearerAuth(app)
+    elif host not in ("127.0.0.1", "localhost", "::1"):
+        sys.stderr.write(f"[mm] Warning: listening on {host} without MM_HTTP_TOKEN\n")
+    sys.stderr.write(f"[mm] Serving streamable HTTP on http://{host}:{port}/mcp\n")
+    config = uvicorn.Config(app, host=host, port=port, log_level="warning", lifespan="on",
+                            timeout_graceful_shutdown=HTTP_GRACEFUL_TIMEOUT)
+    await uvicorn.Server(config).serve()
+
+
 async def main():
+    parser = argparse.ArgumentParser(description="mm MCP server (stdio by default)")
+    parser.add_argument("--http", action="store_true", help="Run as a long-lived streamable HTTP service")
+    parser.add_argument("--host", default=HTTP_HOST, help="--http bind address (MM_HTTP_HOST)")
+    parser.add_argument("--port", type=int, default=HTTP_PORT, help="--http port (MM_HTTP_PORT)")
+    args = parser.parse_args()
+
+    if METRICS_PORT:
+        _start_metrics_server(METRICS_PORT)
+    if args.http:
+        await serve_http(args.host, args.port)
+        return
     async with stdio_server() as (read_stream, write_stream):
         await server.run(read_stream, write_stream, server.create_initialization_options())
 
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
@@ -7,12 +7,15 @@ The session pool does all the heavy lifting - this just exposes it via MCP.
 """
 
 import hashlib
+import http.client
 import json
 import logging
 import os
+import socket
 import sys
-import urllib.request
-import urllib.error
+import threading
+import time
+import urllib.parse
 from datetime import datetime
 
 # Logging to stderr (MCP uses stdout for protocol)
@@ -29,6 +32,8 @@ logger = logging.getLogger("mm_mcp")
 
 # Session pool endpoint
 SESSION_POOL_URL = os.getenv("SESSION_POOL_URL", "http://localhost:5200")
+# Unix domain socket for a co-located pool; overrides the URL's host/port
+SESSION_POOL_UDS = os.getenv("SESSION_POOL_UDS", "")
 
 # Generate caller_id from machine + user for auth coordination
 def get_caller_id() -> str:
@@ -40,44 +45,127 @@ CALLER_ID = get_caller_id()
 logger.info(f"MCP Server starting. Caller ID: {CALLER_ID}, Pool URL: {SESSION_POOL_URL}")
 
 
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a Unix domain socket (gunicorn --bind unix:...)."""
+
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.unix_path)
+        self.sock = sock
+
+
+class PoolClient:
+    """Persistent keep-alive connection to the session pool.
+
+    Connect failures are retried with backoff (pool restarting). When a
+    kept-alive connection turns out to be closed, the request is resent once on
+    a new one, but only if it can't run twice: it failed while being sent, or
+    it is a GET. A POST that was sent is never resent, because the pool may
+    have received it before the connection dropped (a worker dying
+    mid-command). Timeouts are not retried.
+    """
+
+    def __init__(self, base_url: str, uds_path: str = "", connect_timeout: float = 5,
+                 read_timeout: float = 120, connect_retries: int = 5):
+        parts = urllib.parse.urlsplit(base_url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 80
+        self.uds_path = uds_path
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.connect_retries = connect_retries
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> http.client.HTTPConnection:
+        for attempt in range(self.connect_retries + 1):
+            if self.uds_path:
+                conn = _UnixHTTPConnection(self.uds_path, timeout=self.connect_timeout)
+            else:
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=self.connect_timeout)
+            try:
+                conn.connect()
+                conn.sock.settimeout(self.read_timeout)
+                return conn
+            except OSError as e:
+                conn.close()
+                if attempt >= self.connect_retries:
+                    raise ConnectionError(f"Session pool unavailable: {e}") from e
+                delay = min(0.25 * (2 ** attempt), 4.0)
+                logger.warning(f"Pool connect failed ({e}), retrying in {delay}s")
+                time.sleep(delay)
+
+    def close(self):
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+    def request(self, method: str, endpoint: str, data: dict = None) -> tuple:
+        """Send a request. Returns (status, raw body bytes)."""
+        body = json.dumps(data).encode() if data else None
+        headers = {"Content-Type": "application/json"} if body else {}
+        with self._lock:
+            for attempt in range(2):
+                reused = self._conn is not None
+                if not reused:
+                    self._conn = self._connect()
+                sent = False
+                try:
+                    self._conn.request(method, endpoint, body=body, headers=headers)
+                    sent = True
+                    resp = self._conn.getresponse()
+                    raw = resp.read()
+                    if resp.will_close:
+                        self.close()
+                    return resp.status, raw
+                except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                    self.close()
+                    if not reused or attempt or (sent and method != "GET"):
+                        raise
+                    logger.info("Kept-alive pool connection was closed, reconnecting")
+                except Exception:
+                    self.close()
+                    raise
+
+
+_pool = PoolClient(
+    SESSION_POOL_URL,
+    uds_path=SESSION_POOL_UDS,
+    connect_timeout=float(os.getenv("SESSION_POOL_CONNECT_TIMEOUT", "5")),
+    read_timeout=float(os.getenv("SESSION_POOL_READ_TIMEOUT", "120")),
+    connect_retries=int(os.getenv("SESSION_POOL_CONNECT_RETRIES", "5")),
+)
+
+
 def call_pool_api(endpoint: str, method: str = "GET", data: dict = None) -> dict:
     """Call the session pool HTTP API."""
-    url = f"{SESSION_POOL_URL}{endpoint}"
-    logger.info(f"API call: {method} {url}")
+    logger.info(f"API call: {method} {endpoint}")
     if data:
         logger.info(f"Request data: {json.dumps(data)}")
 
     try:
-        if data:
-            req = urllib.request.Request(
-                url,
-                data=json.dumps(data).encode(),
-                headers={"Content-Type": "application/json"},
-                method=method
-            )
-        else:
-            req = urllib.request.Request(url, method=method)
-
-        logger.info(f"Opening connection to {url}...")
-        resp = urllib.request.urlopen(req, timeout=30)
-        logger.info(f"Connection opened, status: {resp.status}")
-        raw = resp.read()
-        logger.info(f"Read {len(raw)} bytes")
-        result = json.loads(raw.decode())
+        status, raw = _pool.request(method, endpoint, data)
+        logger.info(f"API status {status}, read {len(raw)} bytes")
+        try:
+            result = json.loads(raw.decode())
+        except ValueError:
+            if status >= 400:
+                return {"status": "error", "error": f"HTTP {status}"}
+            raise
         logger.info(f"API response: {json.dumps(result)[:500]}")
-        resp.close()
         return result
 
-    except urllib.error.URLError as e:
-        logger.error(f"API URLError: {e.reason}")
-        return {"status": "error", "error": f"Session pool unavailable: {e.reason}"}
-    except urllib.error.HTTPError as e:
-        logger.error(f"API HTTPError: {e.code} {e.reason}")
-        try:
-            body = json.loads(e.read().decode())
-            return body
-        except:
-            return {"status": "error", "error": f"HTTP {e.code}: {e.reason}"}
+    except ConnectionError as e:
+        logger.error(f"API connection error: {e}")
+        return {"status": "error", "error": str(e)}
+    except socket.timeout:
+        logger.error("API read timed out")
+        return {"status": "error", "error": "Request timed out"}
     except Exception as e:
         logger.error(f"API Exception: {e}", exc_info=True)
         return {"status": "error", "error": str(e)}
@@ -131,7 +219,9 @@ def format_result(result: dict) -> str:
     if status == "error":
         error = result.get('error', 'Unknown error')
         logger.error(f"Command error: {error}")
-        return f"Error: {error}"
+        # A command that failed in pwsh carries its error text in the output
+        output = (result.get("output") or "").strip()
+        return f"Error: {error}\n\n{output}" if output else f"Error: {error}"
 
     # Fallback - return as JSON
     return json.dumps(result, indent=2)
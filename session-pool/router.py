@@ -10,7 +10,9 @@ import json
 import os
 import time
 from datetime import datetime
-from flask import Flask, jsonify, request
+from typing import Callable
+from urllib.parse import quote, urlencode
+from flask import Flask, Response, jsonify, request
 import httpx
 
 # Configuration
@@ -54,7 +56,7 @@ def get_container_url(connection: str) -> str:
     return f"http://{container_name}:5200"
 
 
-def proxy_request(connection: str, path: str, method: str = "GET", data: dict = None) -> dict:
+def proxy_request(connection: str, path: str, method: str = "GET", data: dict = None, timeout: float = 120) -> dict:
     """Proxy request to the correct container."""
     url = get_container_url(connection)
     if not url:
@@ -63,9 +65,9 @@ def proxy_request(connection: str, path: str, method: str = "GET", data: dict =
     try:
         full_url = f"{url}{path}"
         if method == "GET":
-            resp = httpx.get(full_url, timeout=120)
+            resp = httpx.get(full_url, timeout=timeout)
         else:
-            resp = httpx.post(full_url, json=data, timeout=120)
+            resp = httpx.post(full_url, json=data, timeout=timeout)
         return resp.json()
     except httpx.TimeoutException:
         return {"status": "error", "error": f"Container timeout for {connection}"}
@@ -73,6 +75,50 @@ def proxy_request(connection: str, path: str, method: str = "GET", data: dict =
         return {"status": "error", "error": str(e)}
 
 
+def _ndjson_error(message: str) -> bytes:
+    return (json.dumps({"_end": {"status": "error", "error": message}}) + "\n").encode()
+
+
+def _sse_error(message: str) -> bytes:
+    return f"event: end\ndata: {json.dumps({'status': 'error', 'error': message})}\n\n".encode()
+
+
+def stream_request(connection: str, path: str, data: dict, timeout: float = 120,
+                   error_trailer: Callable[[str], bytes] = _ndjson_error) -> Response:
+    """Proxy a streaming POST, passing chunks through as they arrive.
+
+    timeout is the connect timeout and the longest gap between chunks, not a
+    limit on the whole stream. error_trailer formats a mid-stream failure in
+    the stream's own format (NDJSON _end line, SSE end event).
+    """
+    url = get_container_url(connection)
+    if not url:
+        return jsonify({"status": "error", "error": f"Unknown connection: {connection}"}), 404
+
+    client = httpx.Client(timeout=httpx.Timeout(timeout, connect=10))
+    try:
+        upstream = client.send(client.build_request("POST", f"{url}{path}", json=data), stream=True)
+    except httpx.TimeoutException:
+        client.close()
+        return jsonify({"status": "error", "error": f"Container timeout for {connection}"}), 504
+    except Exception as e:
+        client.close()
+        return jsonify({"status": "error", "error": str(e)}), 502
+
+    def generate():
+        try:
+            yield from upstream.iter_raw()
+        except httpx.HTTPError as e:
+            yield error_trailer(f"Container stream failed for {connection}: {e}")
+        finally:
+            upstream.close()
+            client.close()
+
+    headers = {k: upstream.headers[k] for k in ("Cache-Control", "X-Accel-Buffering") if k in upstream.headers}
+    return Response(generate(), status=upstream.status_code, headers=headers,
+                    content_type=upstream.headers.get("content-type", "application/x-ndjson"))
+
+
 @app.route("/health", methods=["GET"])
 def health():
     return jsonify({"status": "healthy", "timestamp": datetime.now().isoformat()})
@@ -192,6 +238,7 @@ def run_command():
         "module": module,
         "command": command,
         "caller_id": caller_id,
+        **_run_options(data),
     })
 
     if result.get("status") == "error":
@@ -200,6 +247,199 @@ def run_command():
     return jsonify(result)
 
 
+@app.route("/run_batch", methods=["POST"])
+def run_batch():
+    """Route a command batch to correct container."""
+    global _request_count, _error_count
+    _request_count += 1
+
+    data = request.get_json() or {}
+    connection = data.get("connection")
+    if not all([connection, data.get("module"), data.get("commands")]):
+        _error_count += 1
+        return jsonify({"status": "error", "error": "Missing connection, module, or commands"}), 400
+    unknown = _unknown_connection(connection)
+    if unknown:
+        _error_count += 1
+        return unknown
+
+    # Batches run up to the container's whole-batch COMMAND_TIMEOUT
+    result = proxy_request(connection, "/run_batch", "POST", {
+        "module": data["module"],
+        "commands": data["commands"],
+        "stop_on_error": bool(data.get("stop_on_error")),
+        "caller_id": data.get("caller_id", "anonymous"),
+    }, timeout=330)
+    if result.get("status") == "error":
+        _error_count += 1
+    return jsonify(result)
+
+
+@app.route("/run/ndjson", methods=["POST"])
+def run_ndjson():
+    """Route a streaming NDJSON command to correct container, unbuffered."""
+    global _request_count, _error_count
+    _request_count += 1
+
+    data = request.get_json() or {}
+    connection = data.get("connection")
+    if not all([connection, data.get("module"), data.get("command")]):
+        _error_count += 1
+        return jsonify({"status": "error", "error": "Missing connection, module, or command"}), 400
+    unknown = _unknown_connection(connection)
+    if unknown:
+        _error_count += 1
+        return unknown
+
+    return stream_request(connection, "/run/ndjson", {
+        "module": data["module"],
+        "command": data["command"],
+        "caller_id": data.get("caller_id", "anonymous"),
+        "depth": data.get("depth"),
+        "properties": data.get("properties"),
+    })
+
+
+@app.route("/run/stream", methods=["POST"])
+def run_stream():
+    """Route a Server-Sent Events command to correct container, unbuffered."""
+    global _request_count, _error_count
+    _request_count += 1
+
+    data = request.get_json() or {}
+    connection = data.get("connection")
+    if not all([connection, data.get("module"), data.get("command")]):
+        _error_count += 1
+        return jsonify({"status": "error", "error": "Missing connection, module, or command"}), 400
+    unknown = _unknown_connection(connection)
+    if unknown:
+        _error_count += 1
+        return unknown
+
+    # The container sends keepalive comments, so the gap timeout holds for silent commands
+    return stream_request(connection, "/run/stream", {
+        "module": data["module"],
+        "command": data["command"],
+        "caller_id": data.get("caller_id", "anonymous"),
+        **{k: data[k] for k in ("fresh", "format") if k in data},
+    }, error_trailer=_sse_error)
+
+
+@app.route("/warm", methods=["POST"])
+def warm_session():
+    """Route a session warm-up to correct container."""
+    data = request.get_json() or {}
+    connection = data.get("connection")
+    unknown = _unknown_connection(connection)
+    if unknown:
+        return unknown
+    return jsonify(proxy_request(connection, "/warm", "POST", {"module": data.get("module")}, timeout=10))
+
+
+def _run_options(data: dict) -> dict:
+    """Optional /run and /jobs fields passed through to the container as given."""
+    return {k: data[k] for k in ("fresh", "format", "depth", "properties", "store", "skip", "limit") if k in data}
+
+
+def _unknown_connection(connection: str):
+    """Error response if connection isn't routable, else None."""
+    if not _port_map:
+        load_port_map()
+    if connection in _port_map:
+        return None
+    return jsonify({
+        "status": "error",
+        "error": f"Connection '{connection}' not found in registry. Available: {list(_port_map.keys())}",
+    }), 404
+
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    """Route job submission to correct container."""
+    global _request_count, _error_count
+    _request_count += 1
+
+    data = request.get_json() or {}
+    connection = data.get("connection")
+    if not all([connection, data.get("module"), data.get("command")]):
+        _error_count += 1
+        return jsonify({"status": "error", "error": "Missing connection, module, or command"}), 400
+    unknown = _unknown_connection(connection)
+    if unknown:
+        _error_count += 1
+        return unknown
+
+    result = proxy_request(connection, "/jobs", "POST", {
+        "module": data["module"],
+        "command": data["command"],
+        "caller_id": data.get("caller_id", "anonymous"),
+        "wait": data.get("wait", 0),
+        **_run_options(data),
+    })
+    if result.get("status") == "error":
+        _error_count += 1
+    return jsonify(result)
+
+
+# Job ids are per container, so polls and cancels carry ?connection= for routing
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    connection = request.args.get("connection")
+    unknown = _unknown_connection(connection)
+    if unknown:
+        return unknown
+    query = urlencode({k: v for k, v in request.args.items() if k in ("offset", "wait")})
+    return jsonify(proxy_request(connection, f"/jobs/{quote(job_id)}?{query}"))
+
+
+@app.route("/jobs/<job_id>/cancel", methods=["POST"])
+def cancel_job(job_id):
+    connection = request.args.get("connection")
+    unknown = _unknown_connection(connection)
+    if unknown:
+        return unknown
+    query = urlencode({k: v for k, v in request.args.items() if k == "offset"})
+    return jsonify(proxy_request(connection, f"/jobs/{quote(job_id)}/cancel?{query}", "POST"))
+
+
+@app.route("/cancel", methods=["POST"])
+def cancel_command():
+    """Route a session cancel to correct container."""
+    data = request.get_json() or {}
+    connection = data.get("connection")
+    unknown = _unknown_connection(connection)
+    if unknown:
+        return unknown
+    # The container waits up to its CANCEL_GRACE (10s) for the command to stop
+    return jsonify(proxy_request(connection, "/cancel", "POST", {
+        k: data[k] for k in ("module", "worker") if k in data
+    }, timeout=30))
+
+
+# Result handles live in one container's pwsh process: route by connection
+@app.route("/handles/<handle_id>", methods=["POST"])
+def query_handle(handle_id):
+    data = request.get_json() or {}
+    connection = data.get("connection")
+    unknown = _unknown_connection(connection)
+    if unknown:
+        return unknown
+    return jsonify(proxy_request(connection, f"/handles/{quote(handle_id)}", "POST", data))
+
+
+@app.route("/handles/<handle_id>", methods=["DELETE"])
+def release_handle(handle_id):
+    connection = request.args.get("connection")
+    unknown = _unknown_connection(connection)
+    if unknown:
+        return unknown
+    url = get_container_url(connection)
+    try:
+        resp = httpx.delete(f"{url}/handles/{quote(handle_id)}?{urlencode({'module': request.args.get('module', '')})}", timeout=30)
+        return jsonify(resp.json()), resp.status_code
+    except Exception as e:
+        return jsonify({"status": "error", "error": str(e)}), 502
+
 
 if __name__ == "__main__":
     load_port_map()
@@ -5,27 +5,53 @@ M365 Session Pool - Native device code auth with PowerShell sessions.
 All modules use their native device code flow - no MSAL token juggling.
 """
 
+import base64
+import codecs
 import json
 import logging
 import os
+import queue
 import re
+import signal
 import subprocess
 import threading
 import time
-from collections import defaultdict
+import uuid
+from collections import OrderedDict, defaultdict, deque
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, Dict, Any, List
-from flask import Flask, jsonify, request
+from typing import Optional, Dict, Any, List, Callable, Iterator
+from flask import Flask, Response, jsonify, request
 
 # Metrics
 class Metrics:
+    """Request counters plus fixed-bucket latency histograms per command.
+
+    Histograms are keyed by connection, module, cmdlet verb, outcome and phase
+    (queue: waiting for a free worker, exec: running on it, total: the whole
+    call), so memory stays fixed however many commands run. get_stats() reports
+    p50/p95/p99 estimated from the buckets; render() is OpenMetrics text.
+    """
+
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+               1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+    PHASES = ("queue", "exec", "total")
+    MAX_VERBS = 64  # Distinct verb labels; commands with any other verb count as "other"
+
     def __init__(self):
         self.start_time = datetime.now()
         self.request_count = 0
         self.error_count = 0
         self.auth_count = 0
-        self.response_times: List[float] = []  # Last 100 response times
+        self.response_times = deque(maxlen=100)  # Last 100 response times
+        self.cancel_count = 0
+        self.cancel_kills = 0  # Cancels that had to kill the worker
+        self.cancel_latencies = deque(maxlen=100)  # Last 100 interrupt-to-end-frame times
+        self.gc_count = 0
+        self.gc_reclaimed_mb = 0.0
+        self.gc_recent = deque(maxlen=20)  # Last 20 collections
+        self.histograms: Dict[str, Dict[str, Any]] = {}  # json([connection, module, verb, outcome, phase]) -> buckets/sum/count
+        self.verbs = set()
         self.lock = threading.Lock()
 
     def record_request(self, duration: float, error: bool = False):
@@ -34,13 +60,74 @@ class Metrics:
             if error:
                 self.error_count += 1
             self.response_times.append(duration)
-            if len(self.response_times) > 100:
-                self.response_times.pop(0)
+
+    def record_command(self, connection: str, module: str, verb: str, outcome: str,
+                       queue_s: float, exec_s: float, total_s: float):
+        """Add one command's phase timings to its histograms."""
+        with self.lock:
+            if verb not in self.verbs:
+                if len(self.verbs) >= self.MAX_VERBS:
+                    verb = "other"
+                else:
+                    self.verbs.add(verb)
+            for phase, seconds in zip(self.PHASES, (queue_s, exec_s, total_s)):
+                key = json.dumps([connection, module, verb, outcome, phase])
+                hist = self.histograms.setdefault(key, {"buckets": [0] * len(self.BUCKETS), "sum": 0.0, "count": 0})
+                for i, bound in enumerate(self.BUCKETS):
+                    if seconds <= bound:
+                        hist["buckets"][i] += 1
+                hist["sum"] += seconds
+                hist["count"] += 1
 
     def record_auth(self):
         with self.lock:
             self.auth_count += 1
 
+    def record_cancel(self, latency: float, killed: bool = False):
+        with self.lock:
+            self.cancel_count += 1
+            if killed:
+                self.cancel_kills += 1
+            self.cancel_latencies.append(latency)
+
+    def record_gc(self, session_id: str, pid: int, rss_before_mb: float, rss_after_mb: float, duration: float):
+        with self.lock:
+            reclaimed = rss_before_mb - rss_after_mb
+            self.gc_count += 1
+            self.gc_reclaimed_mb += max(0.0, reclaimed)
+            self.gc_recent.append({
+                "session": session_id, "pid": pid, "at": datetime.now().isoformat(timespec="seconds"),
+                "rss_before_mb": round(rss_before_mb, 1), "rss_after_mb": round(rss_after_mb, 1),
+                "reclaimed_mb": round(reclaimed, 1), "ms": round(duration * 1000),
+            })
+
+    def _percentile(self, hist: Dict[str, Any], q: float) -> float:
+        """Estimate a quantile (seconds) by linear interpolation inside its bucket."""
+        if not hist["count"]:
+            return 0.0
+        rank = q * hist["count"]
+        lower, below = 0.0, 0
+        for bound, cumulative in zip(self.BUCKETS, hist["buckets"]):
+            if cumulative >= rank:
+                inside = cumulative - below
+                return lower + (bound - lower) * ((rank - below) / inside if inside else 1.0)
+            lower, below = bound, cumulative
+        return self.BUCKETS[-1]  # In the +Inf bucket: report the largest finite bound
+
+    def _latency_stats(self) -> List[Dict[str, Any]]:
+        """Per connection/module/verb/outcome: count and p50/p95/p99 of each phase (lock held)."""
+        series = {}
+        for key in sorted(self.histograms):
+            connection, module, verb, outcome, phase = json.loads(key)
+            hist = self.histograms[key]
+            entry = series.setdefault((connection, module, verb, outcome), {
+                "connection": connection, "module": module, "verb": verb, "outcome": outcome, "count": hist["count"],
+            })
+            entry[f"{phase}_ms"] = {
+                f"p{round(q * 100)}": round(self._percentile(hist, q) * 1000, 1) for q in (0.5, 0.95, 0.99)
+            }
+        return list(series.values())
+
     def get_stats(self) -> dict:
         with self.lock:
             uptime = (datetime.now() - self.start_time).total_seconds()
@@ -54,8 +141,57 @@ class Metrics:
                 "total_auths": self.auth_count,
                 "avg_response_ms": round(avg_response * 1000, 1),
                 "last_100_responses": len(self.response_times),
+                "latency": self._latency_stats(),
+                "cancels": {
+                    "total": self.cancel_count,
+                    "killed": self.cancel_kills,
+                    "avg_latency_ms": round(sum(self.cancel_latencies) / len(self.cancel_latencies) * 1000, 1)
+                    if self.cancel_latencies else 0,
+                    "max_latency_ms": round(max(self.cancel_latencies, default=0) * 1000, 1),
+                },
+                "gc": {
+                    "collections": self.gc_count,
+                    "reclaimed_mb_total": round(self.gc_reclaimed_mb, 1),
+                    "recent": list(self.gc_recent),
+                },
             }
 
+    def render(self) -> str:
+        """OpenMetrics text exposition."""
+        def esc(value: str) -> str:
+            return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        lines = [
+            "# TYPE session_pool_command_seconds histogram",
+            "# UNIT session_pool_command_seconds seconds",
+            "# HELP session_pool_command_seconds Command latency per phase (queue: waiting for a worker, exec: running, total: whole call).",
+        ]
+        with self.lock:
+            for key in sorted(self.histograms):
+                connection, module, verb, outcome, phase = json.loads(key)
+                hist = self.histograms[key]
+                labels = (f'connection="{esc(connection)}",module="{esc(module)}",verb="{esc(verb)}",'
+                          f'outcome="{esc(outcome)}",phase="{esc(phase)}"')
+                for bound, count in zip(self.BUCKETS, hist["buckets"]):
+                    lines.append(f'session_pool_command_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'session_pool_command_seconds_bucket{{{labels},le="+Inf"}} {hist["count"]}')
+                lines.append(f"session_pool_command_seconds_count{{{labels}}} {hist['count']}")
+                lines.append(f"session_pool_command_seconds_sum{{{labels}}} {hist['sum']:.6f}")
+
+            counters = (
+                ("session_pool_requests", "HTTP requests handled.", self.request_count),
+                ("session_pool_request_errors", "HTTP requests that returned an error.", self.error_count),
+                ("session_pool_auths", "Requests answered with a device code.", self.auth_count),
+                ("session_pool_cancels", "Cancelled commands.", self.cancel_count),
+                ("session_pool_gc_collections", "In-process pwsh garbage collections.", self.gc_count),
+            )
+            for family, help_text, value in counters:
+                lines.append(f"# TYPE {family} counter")
+                lines.append(f"# HELP {family} {help_text}")
+                lines.append(f"{family}_total {value}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
 metrics = Metrics()
 
 # Configuration
@@ -65,7 +201,34 @@ PORT = int(os.getenv("SESSION_POOL_PORT", "5200"))
 SINGLE_CONNECTION = os.getenv("M365_CONNECTION", "")
 LOG_LEVEL = os.getenv("SESSION_POOL_LOG_LEVEL", "INFO")
 COMMAND_TIMEOUT = int(os.getenv("COMMAND_TIMEOUT", "300"))
-LOCK_TIMEOUT = COMMAND_TIMEOUT + 30  # How long to wait for process_lock before giving up
+LOCK_TIMEOUT = COMMAND_TIMEOUT + 30  # How long to wait for a free worker before giving up
+# A cancelled command is interrupted in pwsh (Ctrl+C) and gets this long to
+# reach its end frame before its worker is killed
+CANCEL_GRACE = float(os.getenv("CANCEL_GRACE", "10"))
+# A worker's pwsh gets a full in-process GC (once idle) when a command leaves
+# its RSS above this; below it, commands are followed by nothing at all
+GC_RSS_THRESHOLD_MB = int(os.getenv("GC_RSS_THRESHOLD_MB", "300"))
+GC_MIN_GROWTH_MB = 32  # Growth since the last collection needed before another one
+# A worker past any of these limits (0 disables one) is recycled: a fresh pwsh
+# is authenticated from the module's cached tokens and swapped in between commands
+RECYCLE_RSS_MB = int(os.getenv("RECYCLE_RSS_MB", "450"))
+RECYCLE_MAX_COMMANDS = int(os.getenv("RECYCLE_MAX_COMMANDS", "0"))
+RECYCLE_MAX_AGE = int(os.getenv("RECYCLE_MAX_AGE", "0"))  # Seconds
+# Workers per session: commands run on whichever pwsh process is free. Extra
+# workers authenticate from the module's persisted token cache, are started
+# while commands queue and retired by the keepalive when the load drops.
+SESSION_WORKERS_MIN = max(1, int(os.getenv("SESSION_WORKERS_MIN", "1")))
+SESSION_WORKERS_MAX = max(SESSION_WORKERS_MIN, int(os.getenv("SESSION_WORKERS_MAX", "1")))
+# Spare pwsh processes with the module already imported, handed to new sessions
+# and workers. Kept for modules in SPARE_PWSH_MODULES and any module used since
+# startup, refilled in the background while the container has memory to spare.
+SPARE_PWSH_PER_MODULE = int(os.getenv("SPARE_PWSH_PER_MODULE", "1"))
+SPARE_PWSH_MODULES = [m.strip() for m in os.getenv("SPARE_PWSH_MODULES", "").split(",") if m.strip()]
+SPARE_PWSH_MIN_FREE_MB = int(os.getenv("SPARE_PWSH_MIN_FREE_MB", "400"))
+# Saved sessions restored at startup at once; requests for one still being
+# restored wait up to RESTORE_WAIT seconds for it instead of starting another
+RESTORE_PARALLELISM = max(1, int(os.getenv("RESTORE_PARALLELISM", "4")))
+RESTORE_WAIT = 60
 
 # Logging — dual output: stdout (docker logs) + persistent file (/app/logs/)
 LOG_DIR = os.getenv("SESSION_POOL_LOG_DIR", "/app/logs")
@@ -102,13 +265,18 @@ STATE_FILE = os.path.join(STATE_DIR, f"sessions-{SINGLE_CONNECTION or 'unified'}
 MODULES = {
     "exo": {
         "name": "Exchange Online",
+        "import_module": "ExchangeOnlineManagement",
         "connect_cmd": "Connect-ExchangeOnline -Device -ShowBanner:$false -SkipLoadingCmdletHelp",
         "health_cmd": "Get-ConnectionInformation | Select-Object -First 1 | ConvertTo-Json",
         "health_pattern": r"(Organization|TenantId)",
         "device_code_pattern": r"code\s+([A-Z0-9]{8,})",
+        # EXO keeps its tokens inside the pwsh that signed in: another process
+        # can't connect without a new device code, so no extra workers
+        "process_bound_auth": True,
     },
     "azure": {
         "name": "Azure PowerShell",
+        "import_module": "Az.Accounts",
         # Disable interactive subscription picker (Az.Accounts v2+ prompts for selection)
         "connect_cmd": "Update-AzConfig -LoginExperienceV2 Off -ErrorAction SilentlyContinue | Out-Null; Connect-AzAccount -UseDeviceAuthentication -TenantId {tenant_id}",
         "health_cmd": "(Get-AzContext) | Select-Object Name, Account | ConvertTo-Json",
@@ -117,6 +285,7 @@ MODULES = {
     },
     "teams": {
         "name": "Microsoft Teams",
+        "import_module": "MicrosoftTeams",
         "connect_cmd": "Connect-MicrosoftTeams -UseDeviceAuthentication -TenantId {tenant_id}",
         "health_cmd": "Get-CsTenant | Select-Object TenantId, DisplayName | ConvertTo-Json",
         "health_pattern": r"(TenantId|DisplayName)",
@@ -125,10 +294,14 @@ MODULES = {
     },
     "pnp": {
         "name": "PnP PowerShell",
+        "import_module": "PnP.PowerShell",
         "connect_cmd": 'Connect-PnPOnline -Url "https://{sharepoint_host}.sharepoint.com" -DeviceLogin -ClientId "{app_id}" -Tenant "{tenant}"',
         "health_cmd": "Get-PnPConnection | Select-Object Url, ConnectionType | ConvertTo-Json",
         "health_pattern": r"(Url|ConnectionType)",
         "device_code_pattern": r"code\s+([A-Z0-9]{8,})",
+        # No tested silent reconnect yet: the interactive one opens a browser
+        # flow on a headless host, so PnP doesn't scale or recycle
+        "process_bound_auth": True,
     },
     # Power Platform disabled - PAC CLI device code only works with its first-party app
     # To re-enable, would need service principal auth (--applicationId + --clientSecret + --tenant)
@@ -191,8 +364,496 @@ def check_command_guardrails(command: str, session_id: str) -> Optional[str]:
     return None
 
 
-# Command marker for PowerShell output sync
-MARKER = "___M365_DONE___"
+# Read-only result cache — repeated Get-* commands within a few minutes are served
+# without touching pwsh. Only commands that verb analysis classifies as read-only
+# are cached; any other command on the same connection/module clears its entries.
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE", "true").lower() not in ("false", "0", "no")
+RESULT_CACHE_DEFAULT_TTL = int(os.getenv("RESULT_CACHE_TTL", "120"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESULT_CACHE_MAX_ENTRY_BYTES = int(os.getenv("RESULT_CACHE_MAX_ENTRY_BYTES", str(8 * 1024 * 1024)))
+
+# Verbs of cmdlets that only read state
+READ_ONLY_VERBS = {
+    "get", "test", "find", "search", "measure", "resolve", "compare",
+    "select", "where", "sort", "group", "format", "convertto", "convertfrom",
+}
+# Read-only pipeline helpers that may appear without a verb (aliases)
+READ_ONLY_ALIASES = {"select", "where", "sort", "group", "measure", "fl", "ft", "?"}
+# Read-only cmdlets whose output must not be reused (clock, randomness, session/auth state)
+UNCACHEABLE_CMDLETS = {
+    "get-date", "get-random", "get-job", "get-history", "get-variable",
+    "get-connectioninformation", "get-pnpconnection", "get-azcontext",
+    "get-azaccesstoken", "get-pnpaccesstoken",
+}
+# Per-cmdlet TTLs in seconds; a command gets the shortest TTL among its cmdlets
+RESULT_CACHE_TTLS = {
+    # Directory objects change rarely
+    "get-mailbox": 300,
+    "get-recipient": 300,
+    "get-user": 300,
+    "get-distributiongroup": 300,
+    "get-unifiedgroup": 300,
+    "get-organizationconfig": 600,
+    "get-accepteddomain": 600,
+    "get-pnpsite": 300,
+    "get-pnptenantsite": 300,
+    "get-pnpweb": 300,
+    "get-team": 300,
+    "get-teamchannel": 300,
+    "get-cstenant": 600,
+    "get-azsubscription": 600,
+    "get-azresourcegroup": 300,
+    # Membership and permissions
+    "get-distributiongroupmember": 120,
+    "get-unifiedgrouplinks": 120,
+    "get-mailboxpermission": 120,
+    "get-recipientpermission": 120,
+    "get-teamuser": 120,
+    "get-pnplist": 120,
+    "get-azresource": 120,
+    # Fast-moving data
+    "get-mailboxstatistics": 60,
+    "get-mailboxfolderstatistics": 60,
+    "get-pnplistitem": 30,
+    "get-messagetrace": 30,
+    "get-messagetracev2": 30,
+    "get-quarantinemessage": 30,
+}
+
+_QUOTED_RE = re.compile(r"""('(?:[^']|'')*'|"(?:[^"`]|`.)*")""", re.DOTALL)
+_CMDLET_RE = re.compile(r"(?<![\w$.-])([A-Za-z]+)-([A-Za-z][A-Za-z0-9]*)\b")
+_SAFE_VARIABLES = {"_", "true", "false", "null", "psitem"}
+# Parameters that turn a read verb destructive (Search-Mailbox -DeleteContent)
+_MUTATING_PARAM_RE = re.compile(r"(?<![\w$])-(delete|remove|purge)\w*", re.IGNORECASE)
+
+
+def classify_read_only(command: str) -> Optional[List[str]]:
+    """Return the cmdlets of a read-only command (lowercase), or None if it may have side effects.
+
+    Conservative: anything not provably read-only (unknown statement heads, variables,
+    method calls, redirection, sub-expressions, script invocation) is not cacheable.
+    """
+    if "$(" in command or "@(" in command:
+        return None
+    code = " ".join(part for i, part in enumerate(_QUOTED_RE.split(command)) if i % 2 == 0)
+    if re.search(r"[>&]|::|\.\w+\s*\(|\[\w", code) or _MUTATING_PARAM_RE.search(code):
+        return None
+    for var in re.findall(r"\$(\w*)", code):
+        if var.lower() not in _SAFE_VARIABLES:
+            return None
+
+    cmdlets = []
+    for verb, noun in _CMDLET_RE.findall(code):
+        if verb.lower() not in READ_ONLY_VERBS:
+            return None
+        cmdlets.append(f"{verb}-{noun}".lower())
+    if not cmdlets or any(c in UNCACHEABLE_CMDLETS for c in cmdlets):
+        return None
+
+    # Every statement head must be a read-only cmdlet, alias or expression
+    for head in re.findall(r"(?:^|[|;{(\n])\s*([^\s|;{}()]+)", code):
+        lowered = head.lower()
+        if head.startswith(("$", "-")) or lowered in READ_ONLY_ALIASES or re.fullmatch(r"[\d.]+", head):
+            continue
+        if "-" in head and lowered.split("-", 1)[0] in READ_ONLY_VERBS:
+            continue
+        return None
+    return cmdlets
+
+
+def command_verb(command: str) -> str:
+    """The verb of a command's first cmdlet (Get-Mailbox -> "Get"), the latency
+    histogram label; "other" when it doesn't start with a cmdlet call."""
+    code = " ".join(part for i, part in enumerate(_QUOTED_RE.split(command)) if i % 2 == 0)
+    match = _CMDLET_RE.search(code)
+    return match.group(1).capitalize() if match else "other"
+
+
+def failed_response(output: str, end: Dict[str, int]) -> Dict[str, Any]:
+    """Response for a command whose end frame reported failure ($? false or a
+    terminating error). Its output, which carries the error text, is kept."""
+    errors = max(end.get("errors", 0), 1)
+    return {"status": "error", "error": f"Command failed ({errors} error(s))", "output": output, "error_count": errors}
+
+
+def command_outcome(response: Dict[str, Any]) -> str:
+    """Classify a response for the latency histograms: success, error,
+    auth_required, timeout or cancelled."""
+    status = response.get("status")
+    if status in ("auth_required", "cancelled"):
+        return status
+    if status == "error":
+        return "timeout" if str(response.get("error", "")).startswith("Timeout") else "error"
+    if response.get("error_count") or response.get("failed"):
+        return "error"
+    return "success"
+
+
+def is_pure_filter(filter: str) -> bool:
+    """Whether a handle filter only reads the current object: no commands, method
+    or static calls, sub-expressions, script blocks, assignments or variables
+    other than $_/$true/$false/$null."""
+    if "$(" in filter or "@(" in filter:
+        return False
+    code = " ".join(part for i, part in enumerate(_QUOTED_RE.split(filter)) if i % 2 == 0)
+    if re.search(r"[{};|&=`\n]|::|\.\w+\s*\(", code) or _CMDLET_RE.search(code):
+        return False
+    return all(var.lower() in _SAFE_VARIABLES for var in re.findall(r"\$(\w*)", code))
+
+
+def normalize_command(command: str) -> str:
+    """Cache key form: whitespace collapsed, cmdlet and parameter names lowercased, quoted text untouched."""
+    parts = _QUOTED_RE.split(command.strip().rstrip(";"))
+    for i in range(0, len(parts), 2):
+        code = re.sub(r"\s*\n\s*", "; ", parts[i])  # Newlines separate statements
+        code = re.sub(r"\s+", " ", code)
+        code = _CMDLET_RE.sub(lambda m: m.group(0).lower(), code)
+        code = re.sub(
+            r"((?:^|[|;{(])\s*)([A-Za-z?]+)(?=\s|$)",
+            lambda m: m.group(1) + m.group(2).lower() if m.group(2).lower() in READ_ONLY_ALIASES else m.group(0),
+            code,
+        )
+        parts[i] = re.sub(r"(?<![\w$])-[A-Za-z]\w*", lambda m: m.group(0).lower(), code)
+    return "".join(parts).strip()
+
+
+class ResultCache:
+    """LRU, size-bounded cache of read-only command output per (connection, module)."""
+
+    def __init__(self, max_bytes: int = RESULT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict = OrderedDict()  # (connection, module, command) -> (output, stored_at, ttl, size)
+        self.generations: Dict[tuple, int] = defaultdict(int)  # (connection, module) -> bumped on invalidation
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.invalidations = 0
+
+    def ttl_for(self, cmdlets: List[str]) -> int:
+        ttls = [RESULT_CACHE_TTLS[c] for c in cmdlets if c in RESULT_CACHE_TTLS]
+        return min(ttls) if ttls else RESULT_CACHE_DEFAULT_TTL
+
+    def generation(self, connection_name: str, module: str) -> int:
+        with self.lock:
+            return self.generations[(connection_name, module)]
+
+    def get(self, connection_name: str, module: str, command: str) -> Optional[Dict[str, Any]]:
+        key = (connection_name, module, command)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry:
+                output, stored_at, ttl, _ = entry
+                age = time.time() - stored_at
+                if age < ttl:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return {"output": output, "age_s": round(age, 1), "ttl_s": ttl}
+                self._drop(key)
+            self.misses += 1
+            return None
+
+    def put(self, connection_name: str, module: str, command: str, output: str, ttl: int, generation: int) -> bool:
+        """Store output unless the bucket was invalidated since `generation` was read."""
+        size = len(output.encode())
+        if size > RESULT_CACHE_MAX_ENTRY_BYTES:
+            return False
+        key = (connection_name, module, command)
+        with self.lock:
+            if self.generations[(connection_name, module)] != generation:
+                return False
+            self._drop(key)
+            self.entries[key] = (output, time.time(), ttl, size)
+            self.size += size
+            self.stores += 1
+            while self.size > self.max_bytes and self.entries:
+                self._drop(next(iter(self.entries)))
+            return True
+
+    def invalidate(self, connection_name: str, module: Optional[str] = None) -> int:
+        """Drop entries for a connection (optionally one module). Returns the number dropped."""
+        with self.lock:
+            keys = [k for k in self.entries if k[0] == connection_name and (module is None or k[1] == module)]
+            for key in keys:
+                self._drop(key)
+            # Bump generations so reads already in flight don't store pre-mutation output
+            if module:
+                self.generations[(connection_name, module)] += 1
+            else:
+                for bucket in [b for b in self.generations if b[0] == connection_name]:
+                    self.generations[bucket] += 1
+            self.invalidations += 1
+            return len(keys)
+
+    def _drop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry:
+            self.size -= entry[3]
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": RESULT_CACHE_ENABLED,
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups * 100, 2) if lookups else 0,
+                "stores": self.stores,
+                "invalidations": self.invalidations,
+            }
+
+
+result_cache = ResultCache()
+
+
+# Command framing for PowerShell output sync: every command is sent between
+# begin/end frames carrying its own id, and the end frame reports whether the
+# command's last statement succeeded ($?) and how many errors it added to $Error.
+# Output outside a command's frames (late async output) is never attributed to it.
+FRAME_BEGIN = "___M365_BEGIN___"
+FRAME_END = "___M365_END___"
+_FRAME_END_RE = re.compile(re.escape(FRAME_END) + r"(\w+) (\d+) (\d+)")
+BATCH_MAX_COMMANDS = int(os.getenv("BATCH_MAX_COMMANDS", "50"))
+
+# Structured results (format=json): the command's objects are serialized by
+# ConvertTo-Json in pwsh and returned parsed, instead of Format-Table text
+JSON_RESULT_MARKER = "___M365_JSON___"
+JSON_DEFAULT_DEPTH = 2
+JSON_MAX_DEPTH = 10
+_JSON_PROPERTY_RE = re.compile(r"^[A-Za-z_*][\w*]*$")
+
+
+def validate_json_options(command: str, depth, properties) -> Optional[str]:
+    """Check format=json options. Returns an error message, or None if valid."""
+    if re.search(r"\b(Format-\w+|Out-String|Out-Host)\b|(?:^|\|)\s*(ft|fl|fw|fc)\b", command, re.IGNORECASE):
+        return "format=json returns objects; remove Format-*/Out-String from the command"
+    if depth is not None and (not isinstance(depth, int) or isinstance(depth, bool) or not 1 <= depth <= JSON_MAX_DEPTH):
+        return f"depth must be an integer from 1 to {JSON_MAX_DEPTH}"
+    if properties is not None and (
+        not isinstance(properties, list) or not all(isinstance(p, str) and _JSON_PROPERTY_RE.match(p) for p in properties)
+    ):
+        return "properties must be a list of property names (wildcards allowed)"
+    return None
+
+
+def wrap_json_command(command: str, depth: Optional[int] = None, properties: Optional[List[str]] = None) -> str:
+    """Wrap a command so its output objects come back as one compressed JSON array line."""
+    select = f" | Select-Object -Property {', '.join(properties)}" if properties else ""
+    return (
+        f'Write-Output ("{JSON_RESULT_MARKER}" + '
+        f'(ConvertTo-Json -InputObject @(@({command}){select}) -Depth {depth or JSON_DEFAULT_DEPTH} -Compress))'
+    )
+
+
+def apply_json_format(response: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace a successful response's output with parsed data; other lines stay in output."""
+    if response.get("status") != "success":
+        return response
+    data = None
+    messages = []
+    for line in response.get("output", "").split("\n"):
+        if line.startswith(JSON_RESULT_MARKER) and data is None:
+            try:
+                data = json.loads(line[len(JSON_RESULT_MARKER):])
+            except ValueError as e:
+                response["json_error"] = f"Could not parse JSON result: {e}"
+                return response
+        else:
+            messages.append(line)
+    if data is None:
+        response["json_error"] = "No JSON result in output (the command may have thrown)"
+        return response
+    if not isinstance(data, list):
+        data = [data]
+    response.update(format="json", data=data, count=len(data), output="\n".join(messages).strip())
+    return response
+
+
+# NDJSON streaming (/run/ndjson): each pipeline object is written by pwsh as
+# one compressed JSON line as soon as it is produced, and forwarded as-is
+NDJSON_OBJECT_MARKER = "___M365_OBJ___"
+_NDJSON_END_PREFIX = '{"_end"'
+
+
+def wrap_ndjson_command(command: str, depth: Optional[int] = None, properties: Optional[List[str]] = None) -> str:
+    """Wrap a command so every output object comes back as its own JSON line.
+
+    The command is dot-sourced in a script block, so multi-statement commands
+    stream too and variables still land in the session scope.
+    """
+    select = f" | Select-Object -Property {', '.join(properties)}" if properties else ""
+    return (
+        f'. {{ {command} }}{select} | ForEach-Object {{ Write-Output ("{NDJSON_OBJECT_MARKER}" + '
+        f'(ConvertTo-Json -InputObject $_ -Depth {depth or JSON_DEFAULT_DEPTH} -Compress)) }}'
+    )
+
+
+def ndjson_end(response: Dict[str, Any]) -> str:
+    """The trailer line of an NDJSON stream, carrying the status."""
+    return json.dumps({"_end": response}) + "\n"
+
+
+# Server-Sent Events (/run/stream): text output lines are forwarded as "line"
+# events as pwsh writes them, then one "end" event carries the /run response
+SSE_HEARTBEAT = float(os.getenv("SSE_HEARTBEAT", "15"))  # Seconds of silence before a keepalive comment
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """One Server-Sent Events message with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# In-process memory reclaim (see Session._check_memory): drop finished
+# background jobs, then a blocking, compacting full collection including the
+# large object heap, so freed pages actually go back to the OS
+GC_COMMAND = (
+    "Get-Job | Where-Object { $_.State -in 'Completed', 'Failed', 'Stopped' } | Remove-Job -Force; "
+    "[System.Runtime.GCSettings]::LargeObjectHeapCompactionMode = 'CompactOnce'; "
+    "[System.GC]::Collect(2, [System.GCCollectionMode]::Forced, $true, $true); "
+    "[System.GC]::WaitForPendingFinalizers()"
+)
+
+
+# Result handles (store=true): the whole result set stays in a global pwsh
+# variable, so later calls can page, filter and sort it without re-querying.
+# Handles die with their pwsh process and are evicted by TTL and memory budget.
+HANDLE_MARKER = "___M365_HANDLE___"
+HANDLE_TTL = int(os.getenv("HANDLE_TTL", "900"))  # Seconds since last use
+HANDLE_MAX_PER_SESSION = int(os.getenv("HANDLE_MAX_PER_SESSION", "8"))
+HANDLE_MAX_BYTES = int(os.getenv("HANDLE_MAX_BYTES", str(256 * 1024 * 1024)))  # Per session, estimated
+HANDLE_PAGE_SIZE = 50
+_HANDLE_ID_RE = re.compile(r"^h[0-9a-f]{12}$")
+
+
+def _handle_variable(handle_id: str) -> str:
+    return f"__m365h_{handle_id}"
+
+
+def _json_page(source: str, skip: int, limit: int, depth: Optional[int], properties: Optional[List[str]]) -> str:
+    """pwsh that writes objects skip..skip+limit of a collection variable as a format=json line."""
+    select = f" | Select-Object -Property {', '.join(properties)}" if properties else ""
+    return (
+        f'Write-Output ("{JSON_RESULT_MARKER}" + (ConvertTo-Json -InputObject '
+        f'@({source} | Select-Object -Skip {skip} -First {limit}{select}) -Depth {depth or JSON_DEFAULT_DEPTH} -Compress))'
+    )
+
+
+def wrap_handle_command(command: str, handle_id: str, skip: int = 0, limit: int = HANDLE_PAGE_SIZE,
+                        depth: Optional[int] = None, properties: Optional[List[str]] = None) -> str:
+    """Wrap a command so its objects are kept in the handle's variable; returns count,
+    estimated size (managed heap growth) and one JSON page."""
+    var = f"$global:{_handle_variable(handle_id)}"
+    return (
+        f"$__m365mem = [GC]::GetTotalMemory($false); {var} = @(. {{ {command} }}); "
+        f'Write-Output ("{HANDLE_MARKER}" + {var}.Count + " " + ([GC]::GetTotalMemory($false) - $__m365mem)); '
+        + _json_page(var, skip, limit, depth, properties)
+    )
+
+
+def wrap_handle_query(handle_id: str, filter: Optional[str] = None, sort_by: Optional[List[str]] = None,
+                      descending: bool = False, skip: int = 0, limit: int = HANDLE_PAGE_SIZE,
+                      depth: Optional[int] = None, properties: Optional[List[str]] = None) -> str:
+    """pwsh that filters/sorts a handle's objects and returns the match count and one JSON page.
+
+    The filter is never pasted into the script: it arrives base64-encoded, must
+    parse as exactly one expression (so it can't close the block and run
+    statements of its own) and only then becomes the Where-Object script block.
+    """
+    pipeline = f"$global:{_handle_variable(handle_id)}"
+    check = ""
+    if filter:
+        encoded = base64.b64encode(filter.encode()).decode()
+        check = (
+            f"$__m365f = [Text.Encoding]::UTF8.GetString([Convert]::FromBase64String('{encoded}')); $__m365pe = $null; "
+            "$__m365ast = [System.Management.Automation.Language.Parser]::ParseInput($__m365f, [ref]$null, [ref]$__m365pe); "
+            "$__m365st = $__m365ast.EndBlock.Statements; "
+            "if ($__m365pe -or $__m365ast.ParamBlock -or $__m365ast.BeginBlock -or $__m365ast.ProcessBlock "
+            "-or $__m365st.Count -ne 1 -or $__m365st[0] -isnot [System.Management.Automation.Language.PipelineAst] "
+            "-or $__m365st[0].PipelineElements.Count -ne 1 "
+            "-or $__m365st[0].PipelineElements[0] -isnot [System.Management.Automation.Language.CommandExpressionAst]) "
+            "{ throw 'filter must be a single expression' }; "
+        )
+        pipeline += " | Where-Object ([scriptblock]::Create($__m365f))"
+    if sort_by:
+        pipeline += f" | Sort-Object -Property {', '.join(sort_by)}" + (" -Descending" if descending else "")
+    return (
+        check +
+        f'$__m365q = @({pipeline}); Write-Output ("{HANDLE_MARKER}" + $__m365q.Count + " 0"); '
+        + _json_page("$__m365q", skip, limit, depth, properties)
+        + "; Remove-Variable __m365q"
+    )
+
+
+def apply_handle_result(response: Dict[str, Any], skip: int) -> tuple:
+    """Parse a handle command's output into a format=json page.
+
+    Returns (response, object count, estimated bytes). count is the stored
+    (or, for queries, matching) total rather than the page length.
+    """
+    if response.get("status") != "success":
+        return response, 0, 0
+    count, size = 0, 0
+    lines = response.get("output", "").split("\n")
+    for i, line in enumerate(lines):
+        match = re.match(re.escape(HANDLE_MARKER) + r"(\d+) (-?\d+)", line)
+        if match:
+            count, size = int(match.group(1)), max(0, int(match.group(2)))
+            del lines[i]
+            break
+    else:
+        response["json_error"] = "No handle result in output (the command may have thrown)"
+        return response, 0, 0
+    response["output"] = "\n".join(lines)
+    response = apply_json_format(response)
+    if not response.get("json_error"):
+        response.update(count=count, skip=skip)
+    return response, count, size
+
+
+def validate_handle_query(data: dict) -> Optional[str]:
+    """Check /handles query options. Returns an error message, or None if valid."""
+    sort_by = data.get("sort_by")
+    if sort_by is not None and (
+        not isinstance(sort_by, list) or not all(isinstance(p, str) and _JSON_PROPERTY_RE.match(p) for p in sort_by)
+    ):
+        return "sort_by must be a list of property names"
+    if data.get("filter") is not None and not isinstance(data["filter"], str):
+        return "filter must be a PowerShell condition string, e.g. $_.Name -like 'a*'"
+    for key in ("skip", "limit"):
+        if data.get(key) is not None and (not isinstance(data[key], int) or isinstance(data[key], bool) or data[key] < 0):
+            return f"{key} must be a non-negative integer"
+    return validate_json_options(data.get("filter") or "", data.get("depth"), data.get("properties"))
+
+
+def frame_command(command: str, frame_id: str) -> str:
+    """One stdin line that runs command between begin/end frames.
+
+    The end frame is written from a finally block, so it appears even when the
+    command throws. A terminating error is caught and written inside the frame,
+    where it would otherwise surface only after the end frame. Errors are
+    counted back to the newest $Error entry from before the command, which
+    keeps $Error intact for later commands.
+    """
+    return (
+        f'Write-Host "{FRAME_BEGIN}{frame_id}"; $__m365e = $Error[0]; $__m365ok = $false; '
+        f'try {{ {command}; $__m365ok = $? }} '
+        f'catch {{ $__m365ok = $false; $_ | Out-String | Write-Host }} '
+        f'finally {{ $__m365n = $Error.IndexOf($__m365e); if ($__m365n -lt 0) {{ $__m365n = $Error.Count }}; '
+        f'[Console]::Out.Flush(); Write-Host "{FRAME_END}{frame_id} $([int]$__m365ok) $__m365n" }}\n'
+    )
+
+
+def _new_frame_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def _shares_cached_auth(module_config: Dict[str, Any]) -> bool:
+    """Whether a new pwsh can sign in from the module's persisted tokens (extra workers)."""
+    return not (module_config.get("use_pac") or module_config.get("no_cached_auth")
+                or module_config.get("process_bound_auth"))
 
 
 def load_connection_registry() -> Dict[str, Any]:
@@ -212,6 +873,358 @@ def get_connection_config(connection_name: str) -> Optional[Dict[str, Any]]:
     return registry.get("connections", {}).get(connection_name)
 
 
+@dataclass
+class ResultHandle:
+    """A result set kept in a session's pwsh process (see wrap_handle_command)."""
+
+    handle_id: str
+    command: str
+    pid: int  # pwsh process holding the variable
+    count: int
+    bytes: int  # Estimated from managed heap growth while it was built
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "handle": self.handle_id,
+            "command": self.command,
+            "count": self.count,
+            "bytes": self.bytes,
+            "age_s": round(time.time() - self.created_at),
+            "expires_in_s": max(0, round(self.last_used + HANDLE_TTL - time.time())),
+        }
+
+
+class PwshProcess(subprocess.Popen):
+    """A pwsh child whose stdout is owned by a single reader thread.
+
+    The thread reads stdout in large chunks, decodes it and queues complete
+    lines, so commands, auth and keepalive all consume one ordered stream
+    (read_line) instead of polling the pipe themselves.
+    """
+
+    def __init__(self, args: List[str]):
+        super().__init__(
+            args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+        )
+        self.lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        threading.Thread(target=self._read_stdout, daemon=True).start()
+
+    def _read_stdout(self):
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        fd = self.stdout.fileno()  # Raw reads; the text wrapper's buffer is never used
+        partial = ""
+        while True:
+            try:
+                chunk = os.read(fd, 65536)
+            except OSError:
+                chunk = b""
+            if not chunk:
+                break
+            pieces = decoder.decode(chunk).split("\n")
+            if len(pieces) == 1:
+                partial += pieces[0]
+                continue
+            pieces[0] = partial + pieces[0]
+            partial = pieces.pop()
+            for line in pieces:
+                self.lines.put(line.rstrip("\r"))
+        partial += decoder.decode(b"", final=True)
+        if partial:
+            self.lines.put(partial.rstrip("\r"))
+        self.lines.put(None)  # EOF
+
+    def read_line(self, timeout: float) -> Optional[str]:
+        """Next stdout line, or None if none arrives within timeout. Raises once
+        the process has exited and its output is consumed."""
+        try:
+            line = self.lines.get(timeout=max(timeout, 0))
+        except queue.Empty:
+            return None
+        if line is None:
+            self.lines.put(None)  # Stay at EOF for any later reader
+            try:
+                self.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                pass
+            raise RuntimeError(f"PowerShell process exited (code {self.returncode})")
+        return line
+
+
+def _read_frame(process: PwshProcess, frame_id: str, timeout: int, label: str,
+                end: Optional[Dict[str, int]] = None) -> Iterator[str]:
+    """Yield the output lines of frame frame_id from a pwsh process.
+
+    Lines before its begin frame (late output of an earlier command, frames
+    pipelined without a reader) are logged and dropped. end, if given,
+    receives the end frame's ok flag and error count.
+    """
+    head = []  # first lines, for the timeout log
+    dropped = []
+    deadline = time.time() + timeout
+    inside = False
+
+    while True:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            logger.error(f"[{label}] Command timed out after {timeout}s. Output so far: {head}")
+            raise TimeoutError(f"Command timed out after {timeout}s")
+
+        line = process.read_line(remaining)
+        if line is None:
+            continue  # Loop back to raise the timeout
+
+        logger.debug(f"[{label}] Output line: {line[:100]}")
+        if not inside:
+            if line.endswith(FRAME_BEGIN + frame_id):
+                inside = True
+                if dropped:
+                    logger.info(f"[{label}] Dropped {len(dropped)} late line(s) before frame {frame_id}: {dropped[0][:100]}")
+            elif line.strip() and FRAME_BEGIN not in line and FRAME_END not in line:
+                dropped.append(line)
+            continue
+        match = _FRAME_END_RE.search(line) if FRAME_END in line else None
+        if match and match.group(1) == frame_id:
+            if end is not None:
+                end.update(ok=int(match.group(2)), errors=int(match.group(3)))
+            return
+        if len(head) < 5:
+            head.append(line)
+        yield line
+
+
+def _spawn_pwsh() -> PwshProcess:
+    """Start a bare pwsh reading commands from stdin."""
+    # Use stdbuf to force line-buffered stdout, or pwsh will buffer in non-interactive mode
+    return PwshProcess(["stdbuf", "-oL", "pwsh", "-NoLogo", "-NoProfile", "-NoExit", "-Command", "-"])
+
+
+def _memory_free_mb() -> Optional[int]:
+    """Memory left under the container's cgroup limit, else the host's MemAvailable."""
+    for limit_path, usage_path in (
+        ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current"),  # cgroup v2
+        ("/sys/fs/cgroup/memory/memory.limit_in_bytes", "/sys/fs/cgroup/memory/memory.usage_in_bytes"),  # v1
+    ):
+        try:
+            with open(limit_path) as f:
+                limit = f.read().strip()
+            with open(usage_path) as f:
+                usage = int(f.read())
+        except (OSError, ValueError):
+            continue
+        if limit.isdigit() and int(limit) < 2**60:
+            return (int(limit) - usage) // 2**20
+        break  # No limit set — the host's memory is what's left
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _process_rss_mb(pid: Optional[int]) -> Optional[float]:
+    """Resident set size of a process from /proc, or None if it can't be read."""
+    if not pid:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class SparePool:
+    """Idle pwsh processes with a module already imported.
+
+    Starting pwsh and importing ExchangeOnlineManagement, MicrosoftTeams or PnP
+    takes seconds; a spare turns that into a hand-over. Spares carry no
+    connection state — sessions still run their own setup and auth on them.
+    """
+
+    def __init__(self, per_module: int = SPARE_PWSH_PER_MODULE):
+        self.per_module = per_module
+        self.spares: Dict[str, List[PwshProcess]] = {}
+        self.wanted = set(m for m in SPARE_PWSH_MODULES if m in MODULES)
+        self.filling = set()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.started = 0
+        self.failed = 0
+        self.skipped_memory = 0
+
+    def start(self):
+        for module in list(self.wanted):
+            self.refill(module)
+
+    def take(self, module: str) -> Optional[PwshProcess]:
+        """Hand over a warm process for module, or None. Starts a refill either way."""
+        process = None
+        with self.lock:
+            spares = self.spares.get(module, [])
+            while spares and process is None:
+                candidate = spares.pop(0)
+                if candidate.poll() is None:
+                    process = candidate
+            if process:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self.wanted.add(module)
+        self.refill(module)
+        return process
+
+    def refill(self, module: str):
+        """Top up module's spares on a background thread (one filler per module)."""
+        module_config = MODULES.get(module, {})
+        if self.per_module <= 0 or module_config.get("use_pac"):
+            return
+        with self.lock:
+            if module in self.filling:
+                return
+            self.filling.add(module)
+        threading.Thread(target=self._fill, args=(module,), daemon=True).start()
+
+    def _fill(self, module: str):
+        try:
+            while True:
+                with self.lock:
+                    if len(self.spares.get(module, [])) >= self.per_module:
+                        return
+                free_mb = _memory_free_mb()
+                if free_mb is not None and free_mb < SPARE_PWSH_MIN_FREE_MB:
+                    with self.lock:
+                        self.skipped_memory += 1
+                    logger.info(f"[spare/{module}] Not starting a spare: {free_mb} MB free "
+                                f"(SPARE_PWSH_MIN_FREE_MB={SPARE_PWSH_MIN_FREE_MB})")
+                    return
+                process = self._warm(module)
+                if not process:
+                    return
+                with self.lock:
+                    self.spares.setdefault(module, []).append(process)
+        finally:
+            with self.lock:
+                self.filling.discard(module)
+
+    def _warm(self, module: str) -> Optional[PwshProcess]:
+        """Start pwsh and import module, waiting until the import finished."""
+        start = time.time()
+        process = None
+        try:
+            process = _spawn_pwsh()
+            import_module = MODULES[module].get("import_module")
+            setup = '$ErrorActionPreference = "Continue"; function prompt { "" }'
+            if import_module:
+                setup += f"; Import-Module {import_module} -ErrorAction SilentlyContinue"
+            frame_id = _new_frame_id()
+            process.stdin.write(frame_command(setup, frame_id))
+            process.stdin.flush()
+            for _ in _read_frame(process, frame_id, 120, f"spare/{module}"):
+                pass
+            with self.lock:
+                self.started += 1
+            logger.info(f"[spare/{module}] Spare pwsh ready in {time.time() - start:.1f}s (PID: {process.pid})")
+            return process
+        except Exception as e:
+            with self.lock:
+                self.failed += 1
+            logger.warning(f"[spare/{module}] Could not start a spare pwsh: {e}")
+            if process:
+                process.kill()
+            return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "per_module": self.per_module,
+                "idle": {m: len(p) for m, p in self.spares.items()},
+                "hits": self.hits,
+                "misses": self.misses,
+                "started": self.started,
+                "failed": self.failed,
+                "skipped_low_memory": self.skipped_memory,
+            }
+
+
+spare_pool = SparePool()
+
+
+@dataclass
+class Worker:
+    """One pwsh process of a session (see Session._acquire_worker)."""
+
+    index: int
+    process: Optional[PwshProcess]  # None for PAC sessions
+    busy: bool = False
+    healthy: bool = True
+    commands: int = 0  # Caller commands run (not keepalive pings or maintenance)
+    failures: int = 0
+    busy_seconds: float = 0.0
+    busy_since: float = 0.0
+    started_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+
+    # Cancel event of the command running on this worker, and when it was interrupted
+    cancel: Optional[threading.Event] = None
+    cancel_at: float = 0.0
+
+    rss_mb: Optional[float] = None  # As of the last command
+    gc_floor_mb: float = 0.0  # RSS right after the last collection
+    gc_pending: bool = False
+    recycling: bool = False  # A replacement is being started
+    retiring: bool = False  # Replaced; takes no new commands
+    recycled_from: Optional[Dict[str, Any]] = None  # Notice for the first caller command after a recycle
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid if self.process else None
+
+    def alive(self) -> bool:
+        return self.process is None or self.process.poll() is None
+
+    def kill(self):
+        if self.process:
+            try:
+                self.process.kill()
+            except Exception:
+                pass
+
+    def stop(self):
+        if self.process:
+            try:
+                self.process.terminate()
+                self.process.wait(timeout=5)
+            except:
+                self.process.kill()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "worker": self.index,
+            "pid": self.pid,
+            "busy": self.busy,
+            "healthy": self.healthy and self.alive(),
+            "commands": self.commands,
+            "failures": self.failures,
+            "busy_s": round(self.busy_seconds, 1),
+            "age_s": round(time.time() - self.started_at),
+            "rss_mb": round(self.rss_mb, 1) if self.rss_mb is not None else None,
+            **({"retiring": True} if self.retiring else {}),
+        }
+
+
 @dataclass
 class Session:
     """A PowerShell session with native device code auth."""
@@ -221,9 +1234,18 @@ class Session:
     connection_name: str
     app_id: str
 
-    # Process
+    # Process — the primary worker's pwsh, which runs auth. Commands run on any
+    # healthy worker; workers_cond guards workers, their busy flags and handles.
     process: Optional[subprocess.Popen] = None
-    process_lock: threading.Lock = field(default_factory=threading.Lock)
+    workers: List[Worker] = field(default_factory=list)
+    workers_cond: threading.Condition = field(default_factory=threading.Condition)
+    workers_waiting: int = 0  # Callers queued for a free worker
+    workers_starting: int = 0
+    workers_peak: int = 0  # Most workers busy at once since the last scale-down check
+    next_worker_index: int = 1
+    scale_error: Optional[str] = None  # Why extra workers can't be added
+    recycle_error: Optional[str] = None  # Why workers can't be replaced
+    recycled: int = 0
 
     # State
     state: str = "initializing"  # initializing, ready, auth_pending, authenticated, error
@@ -241,8 +1263,12 @@ class Session:
     # Callback when auth completes (set by pool for state persistence)
     on_auth_complete: Optional[object] = None
 
-    def __post_init__(self):
-        self.process_lock = threading.Lock()
+    # Startup restore: set once this placeholder's restore has finished
+    restore_done: Optional[threading.Event] = None
+    restore_s: Optional[float] = None
+
+    # Result handles across this session's workers, least recently used first
+    handles: "OrderedDict[str, ResultHandle]" = field(default_factory=OrderedDict)
 
     @property
     def session_id(self) -> str:
@@ -258,39 +1284,17 @@ class Session:
                 return False
 
             if module_config.get("use_pac"):
+                self.workers = [Worker(0, None)]
                 self.state = "ready"
                 return True
 
-            # Use stdbuf to force line-buffered stdout, or pwsh will buffer in non-interactive mode
-            self.process = subprocess.Popen(
-                ["stdbuf", "-oL", "pwsh", "-NoLogo", "-NoProfile", "-NoExit", "-Command", "-"],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-            )
-
-            self._send_raw('$ErrorActionPreference = "Continue"')
-            self._send_raw('function prompt { "" }')
-
-            # In unified mode, isolate Azure contexts to prevent cross-tenant contamination
-            # 1. Disable autosave so this process won't overwrite shared ~/.Azure
-            # 2. Select the correct context by matching the expected account email
-            if self.module == "azure" and not SINGLE_CONNECTION:
-                self._send_raw('Disable-AzContextAutosave -Scope Process -ErrorAction SilentlyContinue | Out-Null')
-                conn_config = get_connection_config(self.connection_name)
-                expected_email = conn_config.get("expectedEmail", "") if conn_config else ""
-                if expected_email:
-                    select_cmd = (
-                        f'$ctx = Get-AzContext -ListAvailable | Where-Object {{ $_.Account.Id -eq "{expected_email}" }} | Select-Object -First 1; '
-                        f'if ($ctx) {{ $ctx | Select-AzContext | Out-Null; Write-Host "Selected: $($ctx.Account.Id)" }} '
-                        f'else {{ Write-Host "No context found for {expected_email}" }}'
-                    )
-                    result = self._send_raw(select_cmd, timeout=15)
-                    logger.info(f"[{self.session_id}] Azure context isolation: {result.strip()}")
-                else:
-                    logger.info(f"[{self.session_id}] Azure context isolated (no expectedEmail to pin)")
+            worker = self._launch_worker(0)
+            self.process = worker.process
+            with self.workers_cond:
+                self.workers = [worker]
+                self.next_worker_index = 1
+                self.scale_error = None
+                self.recycle_error = None
 
             # Verify cached auth before falling through to ready state.
             # Docker volume tokens (e.g. ~/.Azure) survive container restarts,
@@ -299,8 +1303,7 @@ class Session:
             # Skip for modules that never cache tokens (e.g. Teams) — the health
             # check hangs and corrupts the process's stdout, causing broken pipes
             # on the subsequent Connect-* command.
-            module_config = MODULES.get(self.module)
-            if module_config and not module_config.get("use_pac") and not module_config.get("no_cached_auth"):
+            if not module_config.get("no_cached_auth"):
                 try:
                     health_output = self._send_raw(module_config["health_cmd"], timeout=15)
                     if re.search(module_config["health_pattern"], health_output):
@@ -328,57 +1331,355 @@ class Session:
             logger.error(f"[{self.session_id}] Failed to start: {e}")
             return False
 
-    def _send_raw(self, command: str, timeout: int = 30) -> str:
-        """Send command and read output until marker."""
-        import select
+    def _launch_worker(self, index: int) -> Worker:
+        """Start a pwsh process with this session's per-process setup."""
+        process = spare_pool.take(self.module)
+        if process:
+            logger.info(f"[{self.session_id}] Using spare pwsh for worker {index} (PID: {process.pid})")
+        worker = Worker(index, process or _spawn_pwsh())
+        self._send_raw('$ErrorActionPreference = "Continue"', worker=worker)
+        self._send_raw('function prompt { "" }', worker=worker)
+
+        # In unified mode, isolate Azure contexts to prevent cross-tenant contamination
+        # 1. Disable autosave so this process won't overwrite shared ~/.Azure
+        # 2. Select the correct context by matching the expected account email
+        if self.module == "azure" and not SINGLE_CONNECTION:
+            self._send_raw('Disable-AzContextAutosave -Scope Process -ErrorAction SilentlyContinue | Out-Null', worker=worker)
+            conn_config = get_connection_config(self.connection_name)
+            expected_email = conn_config.get("expectedEmail", "") if conn_config else ""
+            if expected_email:
+                select_cmd = (
+                    f'$ctx = Get-AzContext -ListAvailable | Where-Object {{ $_.Account.Id -eq "{expected_email}" }} | Select-Object -First 1; '
+                    f'if ($ctx) {{ $ctx | Select-AzContext | Out-Null; Write-Host "Selected: $($ctx.Account.Id)" }} '
+                    f'else {{ Write-Host "No context found for {expected_email}" }}'
+                )
+                result = self._send_raw(select_cmd, timeout=15, worker=worker)
+                logger.info(f"[{self.session_id}] Azure context isolation: {result.strip()}")
+            else:
+                logger.info(f"[{self.session_id}] Azure context isolated (no expectedEmail to pin)")
+        return worker
+
+    def _acquire_worker(self, pid: Optional[int] = None, timing: Optional[Dict[str, Any]] = None) -> tuple:
+        """Wait for a free worker and mark it busy. Returns (worker, None), or
+        (None, error response). timing gets the wait ("queue"), the time the
+        worker was acquired ("acquired") and, on the first command after the
+        worker replaced a recycled one, the notice for the caller ("recycled").
+
+        Dispatch is least-busy first: the idle healthy worker with the least
+        accumulated busy time. pid pins the command to one process (handles
+        live there). While callers queue, more workers are started up to
+        SESSION_WORKERS_MAX.
+        """
+        queued_at = time.time()
+        deadline = queued_at + LOCK_TIMEOUT
+        with self.workers_cond:
+            self.workers_waiting += 1
+            try:
+                while True:
+                    self._reap_dead_workers()
+                    if self.state == "error":
+                        return None, {"status": "error", "error": "All PowerShell workers for this session exited. Retry to start a fresh session."}
+                    if pid is not None and not any(w.pid == pid for w in self.workers):
+                        return None, {"status": "error", "error": "The worker holding this handle has exited."}
+
+                    idle = [w for w in self.workers
+                            if not w.busy and w.healthy and not w.retiring and (pid is None or w.pid == pid)]
+                    if idle:
+                        worker = min(idle, key=lambda w: (w.busy_seconds, w.index))
+                        break
+                    if pid is None:
+                        self._scale_up(queued=self.workers_waiting)
 
-        if not self.process or self.process.poll() is not None:
-            raise RuntimeError("Process not running")
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        logger.error(f"[{self.session_id}] No free worker after {LOCK_TIMEOUT}s — commands are stuck")
+                        self.state = "error"
+                        self.last_error = "Lock timeout — session stuck"
+                        for stuck in self.workers:
+                            stuck.kill()
+                        return None, {"status": "error", "error": f"No free worker after {LOCK_TIMEOUT}s (commands hung). All workers were killed — retry to start a fresh session."}
+                    self.workers_cond.wait(min(remaining, 1.0))
+
+                worker.busy = True
+                worker.busy_since = time.time()
+                if timing is not None:
+                    timing.update(queue=worker.busy_since - queued_at, acquired=worker.busy_since)
+                    if worker.recycled_from:
+                        timing["recycled"], worker.recycled_from = worker.recycled_from, None
+                self.workers_peak = max(self.workers_peak, sum(1 for w in self.workers if w.busy))
+                self._scale_up(queued=0)
+                return worker, None
+            finally:
+                self.workers_waiting -= 1
+
+    def _try_acquire_worker(self, worker: Worker) -> bool:
+        """Mark a specific worker busy if it is idle (background maintenance)."""
+        with self.workers_cond:
+            if worker.busy or worker not in self.workers:
+                return False
+            worker.busy = True
+            worker.busy_since = time.time()
+            return True
 
-        # Force flush stdout after command to prevent buffering issues
-        full_cmd = f'{command}; [Console]::Out.Flush(); Write-Host "{MARKER}"\n'
-        logger.info(f"[{self.session_id}] Sending command: {command[:80]}")
-        self.process.stdin.write(full_cmd)
-        self.process.stdin.flush()
+    def _release_worker(self, worker: Worker):
+        """Return a worker to the pool and wake the next queued caller."""
+        with self.workers_cond:
+            now = time.time()
+            worker.busy = False
+            worker.cancel = None
+            worker.cancel_at = 0.0
+            worker.busy_seconds += now - worker.busy_since
+            worker.last_used = now
+            self._reap_dead_workers()
+            self.workers_cond.notify_all()
+
+    def _reap_dead_workers(self):
+        """Drop idle workers whose process exited (workers_cond held). The
+        session errors out (and is recreated on next use) once none are left."""
+        for worker in [w for w in self.workers if not w.busy and not w.alive()]:
+            self.workers.remove(worker)
+            logger.error(f"[{self.session_id}] Worker {worker.index} exited (code {worker.process.returncode}), removed")
+        if self.workers:
+            self.process = self.workers[0].process
+        elif self.state not in ("initializing", "error", "stopped") and not self.workers_starting:
+            self.state = "error"
+            self.last_error = self.last_error or "PowerShell process exited"
+
+    def _fail_worker(self, worker: Worker, reason: str):
+        """Kill a worker whose output can't be trusted any more (timeout, cancel).
+        Other workers keep serving; the session errors out if none are left."""
+        worker.kill()
+        worker.healthy = False
+        worker.failures += 1
+        self.last_error = reason
+        with self.workers_cond:
+            if not any(w.alive() for w in self.workers if w is not worker):
+                self.state = "error"
 
-        output_lines = []
-        start = time.time()
+    def _can_scale(self) -> bool:
+        module_config = MODULES.get(self.module, {})
+        return (self.state == "authenticated" and not self.scale_error and _shares_cached_auth(module_config))
 
-        while True:
-            if time.time() - start > timeout:
-                logger.error(f"[{self.session_id}] Command timed out after {timeout}s. Output so far: {output_lines[:5]}")
-                raise TimeoutError(f"Command timed out after {timeout}s")
-
-            # Use select to avoid blocking indefinitely on readline
-            ready, _, _ = select.select([self.process.stdout], [], [], 1.0)
-            if not ready:
-                continue  # No data yet, loop back to check timeout
-
-            line = self.process.stdout.readline()
-            if not line:
-                time.sleep(0.01)
-                continue
+    def _scale_up(self, queued: int):
+        """Start another worker when queued callers outnumber the workers
+        already starting, or the pool is below SESSION_WORKERS_MIN (workers_cond held)."""
+        total = len(self.workers) + self.workers_starting
+        if total >= SESSION_WORKERS_MAX or not self._can_scale():
+            return
+        if total >= SESSION_WORKERS_MIN and queued <= self.workers_starting:
+            return
+        index = self.next_worker_index
+        self.next_worker_index += 1
+        self.workers_starting += 1
+        threading.Thread(target=self._add_worker, args=(index,), daemon=True).start()
+
+    def _authenticate_worker(self, worker: Worker) -> Optional[str]:
+        """Sign a new worker in from the module's persisted token cache, never
+        with a prompt. Returns why that failed, or None once its health check passes."""
+        module_config = MODULES[self.module]
+        reconnect_cmd = module_config.get("reconnect_cmd")
+        if reconnect_cmd:
+            def refuse_prompt(line: str):
+                if re.search(module_config["device_code_pattern"], line):
+                    raise RuntimeError("the token cache needs a new sign-in (device code requested)")
+            self._send_raw(self._connect_command(reconnect_cmd), timeout=60, on_line=refuse_prompt, worker=worker)
+        health_output = self._send_raw(module_config["health_cmd"], timeout=30, worker=worker)
+        if not re.search(module_config["health_pattern"], health_output):
+            return "cached tokens not accepted by a new pwsh process"
+        return None
 
-            line = line.rstrip('\n\r')
-            logger.debug(f"[{self.session_id}] Output line: {line[:100]}")
-            if MARKER in line:
-                break
+    def _add_worker(self, index: int):
+        """Start worker `index` and admit it once it has signed in from the
+        persisted token cache. A worker that would need a device code disables
+        scaling for this session instead."""
+        logger.info(f"[{self.session_id}] Starting worker {index}")
+        worker = None
+        error = None
+        try:
+            worker = self._launch_worker(index)
+            error = self._authenticate_worker(worker)
+        except Exception as e:
+            error = str(e)
+
+        with self.workers_cond:
+            self.workers_starting -= 1
+            admitted = error is None and self.state == "authenticated"
+            if admitted:
+                self.workers.append(worker)
+            elif error:
+                self.scale_error = error
+            self.workers_cond.notify_all()
+
+        if admitted:
+            logger.info(f"[{self.session_id}] Worker {index} ready (PID: {worker.pid}), {len(self.workers)} worker(s)")
+        else:
+            if error:
+                logger.warning(f"[{self.session_id}] Worker {index} not added, scaling disabled: {error}")
+            if worker:
+                worker.stop()
+
+    def scale_down(self) -> List[int]:
+        """Stop idle extra workers the last interval's peak load didn't need.
+        Workers holding result handles are kept. Returns the stopped indexes."""
+        with self.workers_cond:
+            keep = max(SESSION_WORKERS_MIN, self.workers_peak)
+            self.workers_peak = sum(1 for w in self.workers if w.busy)
+            pinned = {h.pid for h in self.handles.values()}
+            retired = []
+            for worker in sorted(self.workers[1:], key=lambda w: w.last_used):
+                if len(self.workers) <= keep:
+                    break
+                if worker.busy or worker.pid in pinned:
+                    continue
+                self.workers.remove(worker)
+                retired.append(worker)
+        for worker in retired:
+            worker.stop()
+            logger.info(f"[{self.session_id}] Retired idle worker {worker.index} ({len(self.workers)} left)")
+        return [w.index for w in retired]
+
+    def _recycle_reason(self, worker: Worker) -> Optional[str]:
+        if RECYCLE_RSS_MB and worker.rss_mb and worker.rss_mb >= RECYCLE_RSS_MB:
+            return f"RSS {worker.rss_mb:.0f} MB"
+        if RECYCLE_MAX_COMMANDS and worker.commands >= RECYCLE_MAX_COMMANDS:
+            return f"{worker.commands} commands"
+        age = time.time() - worker.started_at
+        if RECYCLE_MAX_AGE and age >= RECYCLE_MAX_AGE:
+            return f"age {age / 3600:.1f}h"
+        return None
+
+    def check_recycle(self, worker: Worker) -> bool:
+        """Start replacing worker if it is past a RECYCLE_* limit. Returns True
+        if a replacement is (already) being started.
+
+        Workers holding result handles wait for them to go, unless the RSS limit
+        is hit: losing handles beats an OOM kill mid-command.
+        """
+        module_config = MODULES.get(self.module, {})
+        if (worker.recycling or self.state != "authenticated" or self.recycle_error
+                or not _shares_cached_auth(module_config)):
+            return worker.recycling
+        reason = self._recycle_reason(worker)
+        if not reason:
+            return False
+        with self.workers_cond:
+            pinned = any(h.pid == worker.pid for h in self.handles.values())
+            if worker not in self.workers or (pinned and not reason.startswith("RSS")):
+                return False
+            worker.recycling = True
+        threading.Thread(target=self._recycle_worker, args=(worker, reason), daemon=True,
+                         name=f"recycle-{self.session_id}-{worker.index}").start()
+        return True
+
+    def _recycle_worker(self, old: Worker, reason: str):
+        """Replace old with a fresh worker authenticated from the cached tokens.
+
+        The replacement starts (on a spare pwsh when there is one) and passes the
+        health check while old keeps serving. It then takes old's place in one
+        step under workers_cond, so the next command already goes to it. old
+        takes no new commands, finishes the one it is running, if any, and is
+        stopped. If the new process would need a device code, old stays and
+        recycling is turned off for this session.
+        """
+        with self.workers_cond:
+            index = self.next_worker_index
+            self.next_worker_index += 1
+        logger.info(f"[{self.session_id}] Recycling worker {old.index} ({reason}), starting worker {index}")
+        new = None
+        error = None
+        try:
+            new = self._launch_worker(index)
+            error = self._authenticate_worker(new)
+        except Exception as e:
+            error = str(e)
+
+        with self.workers_cond:
+            swapped = error is None and self.state == "authenticated" and old in self.workers
+            if swapped:
+                self.workers[self.workers.index(old)] = new
+                self.workers.append(old)  # Still cancellable until its command ends
+                old.retiring = True
+                new.recycled_from = {
+                    "reason": reason,
+                    "at": datetime.now().isoformat(),
+                    "message": "The session's pwsh process was replaced before this command; "
+                               "variables and other state set by earlier commands are gone.",
+                }
+                self.process = self.workers[0].process
+                self.recycled += 1
+                self.workers_cond.notify_all()
+            else:
+                old.recycling = False
+                if error:
+                    self.recycle_error = error
+
+        if not swapped:
+            if error:
+                logger.warning(f"[{self.session_id}] Worker {old.index} not recycled, recycling disabled: {error}")
+            if new:
+                new.stop()
+            return
+
+        logger.info(f"[{self.session_id}] Worker {index} (PID: {new.pid}) replaced worker {old.index} ({reason})")
+        with self.workers_cond:
+            self.workers_cond.wait_for(lambda: not old.busy, timeout=COMMAND_TIMEOUT + 30)
+            if old in self.workers:
+                self.workers.remove(old)
+        self._drop_stale_handles()
+        old.stop()
+
+    def _send_raw(self, command: str, timeout: int = 30, on_line: Optional[Callable[[str], None]] = None,
+                  worker: Optional[Worker] = None, end: Optional[Dict[str, int]] = None) -> str:
+        """Send command and read its framed output. on_line is called with each output line as it arrives.
+
+        Runs on worker's process, or the primary process when worker is None.
+        end, if given, receives the end frame's ok flag and error count.
+        """
+        output_lines = []
+        for line in self._iter_raw(command, timeout, worker, end):
             output_lines.append(line)
+            if on_line:
+                on_line(line)
 
         logger.info(f"[{self.session_id}] Command completed, {len(output_lines)} lines")
         return '\n'.join(output_lines)
 
+    def _iter_raw(self, command: str, timeout: int = 30, worker: Optional[Worker] = None,
+                  end: Optional[Dict[str, int]] = None) -> Iterator[str]:
+        """Send command and yield its output lines as they arrive, without keeping them."""
+        process = worker.process if worker else self.process
+        if not process or process.poll() is not None:
+            raise RuntimeError("Process not running")
+
+        frame_id = _new_frame_id()
+        logger.info(f"[{self.session_id}] Sending command {frame_id}: {command[:80]}")
+        process.stdin.write(frame_command(command, frame_id))
+        process.stdin.flush()
+
+        yield from _read_frame(process, frame_id, timeout, self.session_id, end)
+
+    def _connect_command(self, template: str) -> str:
+        """Fill a module's connect command placeholders for this connection."""
+        conn_config = get_connection_config(self.connection_name)
+        sharepoint_host = conn_config.get("sharepoint_host", self.tenant.split('.')[0]) if conn_config else self.tenant.split('.')[0]
+        tenant_id = conn_config.get("tenantId", self.tenant) if conn_config else self.tenant
+        return template.format(
+            tenant=self.tenant,
+            tenant_id=tenant_id,
+            sharepoint_host=sharepoint_host,
+            app_id=self.app_id,
+        )
+
     def initiate_auth(self, caller_id: str) -> Dict[str, Any]:
         """Start native device code authentication.
 
-        The auth reader thread owns stdout exclusively through the entire auth lifecycle:
+        The auth reader thread is the only consumer of the process's output through
+        the entire auth lifecycle (commands wait for the authenticated state):
         1. Sends connect command, captures device code
-        2. Waits for auth completion (MARKER)
+        2. Waits for auth completion (the command's end frame)
         3. Runs health check to verify and transition to authenticated state
-        This avoids the non-thread-safe TextIOWrapper corruption from multiple readers.
         """
         module_config = MODULES.get(self.module)
-        conn_config = get_connection_config(self.connection_name)
 
         self.state = "auth_pending"
         self.auth_initiated_by = caller_id
@@ -386,15 +1687,7 @@ class Session:
         self.device_code = None
 
         try:
-            # Build connect command with placeholders
-            sharepoint_host = conn_config.get("sharepoint_host", self.tenant.split('.')[0]) if conn_config else self.tenant.split('.')[0]
-            tenant_id = conn_config.get("tenantId", self.tenant) if conn_config else self.tenant
-            connect_cmd = module_config["connect_cmd"].format(
-                tenant=self.tenant,
-                tenant_id=tenant_id,
-                sharepoint_host=sharepoint_host,
-                app_id=self.app_id,
-            )
+            connect_cmd = self._connect_command(module_config["connect_cmd"])
 
             logger.info(f"[{self.session_id}] Starting auth: {connect_cmd}")
 
@@ -405,18 +1698,18 @@ class Session:
             output_buffer = []
 
             def reader_thread():
-                """Owns stdout exclusively: auth -> health check -> state transition."""
+                """Sole output consumer: auth -> health check -> state transition."""
                 nonlocal device_code
                 try:
                     # Phase 1: Send connect command, capture device code, wait for auth
-                    self.process.stdin.write(f'{connect_cmd}; Write-Host "{MARKER}"\n')
+                    frame_id = _new_frame_id()
+                    self.process.stdin.write(frame_command(connect_cmd, frame_id))
                     self.process.stdin.flush()
 
                     start = time.time()
                     while time.time() - start < 900:  # 15 min = device code lifetime
-                        line = self.process.stdout.readline()
-                        if not line:
-                            time.sleep(0.1)
+                        line = self.process.read_line(timeout=1.0)
+                        if line is None:
                             continue
 
                         line = line.strip()
@@ -432,7 +1725,7 @@ class Session:
                                 self.device_code = device_code
                                 logger.info(f"[{self.session_id}] Device code: {device_code}")
 
-                        if MARKER in line:
+                        if line.startswith(FRAME_END + frame_id):
                             if device_code:
                                 logger.info(f"[{self.session_id}] Auth connect completed, running health check...")
                             break
@@ -586,11 +1879,12 @@ class Session:
             pass
         return False
 
-    def run_command(self, command: str, caller_id: str, timeout: int = COMMAND_TIMEOUT) -> Dict[str, Any]:
-        """Execute a command."""
-        module_config = MODULES.get(self.module)
-        logger.info(f"[{self.session_id}] run_command called, state={self.state}, caller={caller_id}")
+    def _check_ready(self, caller_id: str) -> Optional[Dict[str, Any]]:
+        """Wait out startup and resolve auth state before running commands.
 
+        Returns the response to send instead (auth_required, error), or None when
+        the session is authenticated.
+        """
         # Wait briefly if session is still starting up (start_process running outside pool lock)
         if self.state == "initializing":
             for _ in range(30):  # Wait up to 30 seconds
@@ -629,39 +1923,133 @@ class Session:
             logger.info(f"[{self.session_id}] State is {self.state}, initiating auth")
             return self.initiate_auth(caller_id)
 
+        return None
+
+    def run_command(self, command: str, caller_id: str, **options) -> Dict[str, Any]:
+        """Execute a command (see _run_command) and record its latency."""
+        timing = {}
+        start = time.time()
+        response = self._run_command(command, caller_id, timing=timing, **options)
+        self._record_latency(command_verb(command), response, start, timing)
+        if "recycled" in timing:
+            response["recycled"] = timing["recycled"]
+        return response
+
+    def _record_latency(self, verb: str, response: Dict[str, Any], start: float, timing: Dict[str, Any]):
+        """Feed a finished command into the latency histograms. Commands that
+        never reached a worker (cache hits, auth, guardrails) have no queue or
+        exec time."""
+        now = time.time()
+        acquired = timing.get("acquired")
+        metrics.record_command(self.connection_name, self.module, verb, command_outcome(response),
+                               timing.get("queue", 0.0), now - acquired if acquired else 0.0, now - start)
+
+    def _run_command(self, command: str, caller_id: str, timing: Dict[str, Any],
+                     timeout: int = COMMAND_TIMEOUT,
+                     on_line: Optional[Callable[[str], None]] = None,
+                     cancel_event: Optional[threading.Event] = None,
+                     fresh: bool = False, output_format: str = "text",
+                     json_depth: Optional[int] = None,
+                     properties: Optional[List[str]] = None,
+                     store: bool = False, skip: int = 0,
+                     limit: int = HANDLE_PAGE_SIZE) -> Dict[str, Any]:
+        """Execute a command.
+
+        on_line receives output lines as they arrive (jobs use it for incremental output).
+        cancel_event is checked once a worker is acquired; while the command runs it is
+        kept on the worker so cancel_running() and cancel() can interrupt it. An
+        interrupted command returns status "cancelled" with its output so far.
+        fresh skips the read-only result cache lookup (the new result is still cached).
+        output_format="json" serializes the output objects in pwsh (json_depth, optional
+        properties allow-list) and returns them parsed as "data".
+        store (with output_format="json") keeps the whole result set in the pwsh
+        process as a handle and returns its id, count and the skip/limit page.
+        """
+        module_config = MODULES.get(self.module)
+        logger.info(f"[{self.session_id}] run_command called, state={self.state}, caller={caller_id}")
+
+        not_ready = self._check_ready(caller_id)
+        if not_ready:
+            return not_ready
+
         # Guardrails — check command before executing
         blocked = check_command_guardrails(command, self.session_id)
         if blocked:
             return {"status": "error", "error": blocked}
 
-        # Execute command — acquire lock (blocks if another command is in progress)
-        if not self.process_lock.acquire(timeout=LOCK_TIMEOUT):
-            logger.error(f"[{self.session_id}] Lock timeout after {LOCK_TIMEOUT}s — another command is stuck")
-            self.state = "error"
-            self.last_error = "Lock timeout — session stuck"
-            if self.process:
-                try:
-                    self.process.kill()
-                except Exception:
-                    pass
-            return {"status": "error", "error": "Session busy (another command hung). Session reset — retry will create a fresh session."}
+        if store and module_config.get("use_pac"):
+            return {"status": "error", "error": f"store is not supported for module {self.module}"}
+
+        as_json = output_format == "json"
+        handle_id = f"h{uuid.uuid4().hex[:12]}" if store else None
+        if store:
+            exec_command = wrap_handle_command(command, handle_id, skip, limit, json_depth, properties)
+        elif as_json:
+            exec_command = wrap_json_command(command, json_depth, properties)
+        else:
+            exec_command = command
+
+        # Read-only result cache — hits skip the worker queue entirely; any other
+        # command invalidates this session's cached results before it runs
+        cache_cmdlets = classify_read_only(command) if RESULT_CACHE_ENABLED else None
+        cache_key = normalize_command(command) if cache_cmdlets and not store else None
+        if cache_key and as_json:
+            cache_key += f" #json depth={json_depth or JSON_DEFAULT_DEPTH} properties={','.join(properties or [])}"
+        cache_generation = 0
+        if RESULT_CACHE_ENABLED and not cache_cmdlets:
+            dropped = result_cache.invalidate(self.connection_name, self.module)
+            if dropped:
+                logger.info(f"[{self.session_id}] Non-read-only command, dropped {dropped} cached result(s)")
+        elif cache_key:
+            cached = None if fresh else result_cache.get(self.connection_name, self.module, cache_key)
+            if cached:
+                logger.info(f"[{self.session_id}] Cache hit (age {cached['age_s']}s, ttl {cached['ttl_s']}s): {command[:80]}")
+                response = {
+                    "status": "success",
+                    "output": cached["output"],
+                    "cache": {"hit": True, "age_s": cached["age_s"], "ttl_s": cached["ttl_s"]},
+                }
+                if self.authenticated_as:
+                    response["authenticated_as"] = self.authenticated_as
+                return apply_json_format(response) if as_json else response
+            cache_generation = result_cache.generation(self.connection_name, self.module)
+
+        # Execute command — wait for a free worker (blocks while all are busy)
+        worker, busy = self._acquire_worker(timing=timing)
+        if busy:
+            return busy
         try:
-            logger.info(f"[{self.session_id}] Executing command (lock acquired)")
-            # Check process is alive before sending anything
-            if self.process and self.process.poll() is not None:
-                logger.error(f"[{self.session_id}] Process dead (exit code {self.process.returncode}), marking error")
-                self.state = "error"
-                self.last_error = f"Process exited with code {self.process.returncode}"
-                return {"status": "error", "error": "PowerShell process died. Session reset — retry will create a fresh session."}
+            logger.info(f"[{self.session_id}] Executing command on worker {worker.index}")
+            if cancel_event and cancel_event.is_set():
+                return {"status": "cancelled", "error": "Cancelled before it started"}
+            worker.cancel = cancel_event or threading.Event()
+            worker.commands += 1
 
+            end = {}
             if module_config.get("use_pac"):
                 result = subprocess.run(command, shell=True, capture_output=True, text=True, timeout=timeout)
                 output = result.stdout + result.stderr
+                end["ok"] = int(result.returncode == 0)
             else:
-                output = self._send_raw(command, timeout=timeout)
+                output = self._send_raw(exec_command, timeout=timeout, on_line=on_line, worker=worker, end=end)
 
             self.last_command = datetime.now()
+            cancel_ms = self._cancel_finished(worker)
+            if cancel_ms is not None:
+                if store:
+                    self._send_raw(f"Remove-Variable -Name {_handle_variable(handle_id)} -Scope Global "
+                                   f"-ErrorAction SilentlyContinue", worker=worker)
+                return {"status": "cancelled", "error": "Cancelled by caller", "output": output, "cancel_ms": cancel_ms}
+            if not end.get("ok", 1):
+                if store:
+                    self._send_raw(f"Remove-Variable -Name {_handle_variable(handle_id)} -Scope Global "
+                                   f"-ErrorAction SilentlyContinue", worker=worker)
+                logger.warning(f"[{self.session_id}] Command failed: {output[:500].replace(chr(10), ' | ')}")
+                self._check_memory(worker)
+                return failed_response(output, end)
             response = {"status": "success", "output": output}
+            if end.get("errors"):
+                response["error_count"] = end["errors"]
             if self.authenticated_as:
                 response["authenticated_as"] = self.authenticated_as
 
@@ -673,48 +2061,521 @@ class Session:
             else:
                 logger.info(f"[{self.session_id}] Command succeeded ({len(output)} chars): {output_preview}")
 
-            # GC to reduce memory pressure between commands.
-            # Run as a fire-and-forget background job so it can't capture late-arriving
-            # output from EXO cmdlets (which flush asynchronously after the marker).
-            # Previous approach used _send_raw which waited for a marker — any EXO output
-            # that arrived late got swallowed into the GC read, losing real command output.
-            try:
-                if self.process and self.process.poll() is None and not module_config.get("use_pac"):
-                    self.process.stdin.write("Start-Job { [System.GC]::Collect() } | Out-Null\n")
-                    self.process.stdin.flush()
-            except Exception:
-                pass  # Non-critical — don't fail the response over GC
+            # Cache clean read-only results (never ones that look like or report errors)
+            if cache_key and not error_patterns and not end.get("errors") and end.get("ok", 1):
+                ttl = result_cache.ttl_for(cache_cmdlets)
+                if result_cache.put(self.connection_name, self.module, cache_key, output, ttl, cache_generation):
+                    response["cache"] = {"hit": False, "stored": True, "ttl_s": ttl}
 
-            return response
+            if store:
+                return self._register_handle(worker, handle_id, command, response, skip)
+            self._check_memory(worker)
+            return apply_json_format(response) if as_json else response
 
         except TimeoutError as e:
             # Kill the hung process — subsequent commands to a stuck process
             # will also hang, cascading into total thread starvation
-            logger.error(f"[{self.session_id}] Command timed out, killing process: {e}")
-            self.state = "error"
-            self.last_error = f"Timeout: {e}"
-            if self.process:
-                try:
-                    self.process.kill()
-                except Exception:
-                    pass
-            return {"status": "error", "error": f"Timeout: {e}. Session reset — retry will create a fresh session."}
+            logger.error(f"[{self.session_id}] Command timed out, killing worker {worker.index}: {e}")
+            self._fail_worker(worker, f"Timeout: {e}")
+            return {"status": "error", "error": f"Timeout: {e}. The worker running it was killed — retry runs on a fresh one."}
         except Exception as e:
+            if worker.cancel.is_set():
+                logger.warning(f"[{self.session_id}] Cancelled command ended with the worker killed: {e}")
+                return {"status": "cancelled", "error": "Cancelled by caller (the command did not stop, so its worker was killed)",
+                        "worker_killed": True}
             self.last_error = str(e)
             logger.error(f"[{self.session_id}] Command failed: {e}")
             return {"status": "error", "error": str(e)}
         finally:
-            self.process_lock.release()
+            self._release_worker(worker)
+
+    def _check_memory(self, worker: Worker):
+        """Read worker's RSS after a command and queue a GC if it is over
+        GC_RSS_THRESHOLD_MB and has grown since the last one (worker held). The
+        collection waits for the worker to be released, so it never holds up
+        the response."""
+        rss = _process_rss_mb(worker.pid)
+        if rss is None:
+            return
+        worker.rss_mb = rss
+        if self.check_recycle(worker):
+            return  # The replacement starts clean; no point collecting
+        if rss < max(GC_RSS_THRESHOLD_MB, worker.gc_floor_mb + GC_MIN_GROWTH_MB) or worker.gc_pending:
+            return
+        worker.gc_pending = True
+        threading.Thread(target=self._collect, args=(worker,), daemon=True,
+                         name=f"gc-{self.session_id}-{worker.index}").start()
+
+    def _collect(self, worker: Worker):
+        """Run GC_COMMAND on worker once it is idle and record what it reclaimed.
+
+        If a queued command takes the worker first, the collection is dropped;
+        that command's own _check_memory queues it again.
+        """
+        try:
+            with self.workers_cond:
+                self.workers_cond.wait_for(lambda: not worker.busy or worker not in self.workers,
+                                           timeout=COMMAND_TIMEOUT)
+            if not self._try_acquire_worker(worker):
+                return
+            try:
+                before = _process_rss_mb(worker.pid)
+                start = time.time()
+                self._send_raw(GC_COMMAND, timeout=60, worker=worker)
+                after = _process_rss_mb(worker.pid)
+                if before is not None and after is not None:
+                    worker.rss_mb = worker.gc_floor_mb = after
+                    metrics.record_gc(self.session_id, worker.pid, before, after, time.time() - start)
+                    logger.info(f"[{self.session_id}] GC on worker {worker.index}: RSS {before:.0f} -> {after:.0f} MB "
+                                f"in {(time.time() - start) * 1000:.0f}ms")
+            finally:
+                self._release_worker(worker)
+        except Exception as e:
+            logger.warning(f"[{self.session_id}] GC on worker {worker.index} failed: {e}")
+        finally:
+            worker.gc_pending = False
+
+    def run_batch(self, commands: List[str], caller_id: str, **options) -> Dict[str, Any]:
+        """Run a batch (see _run_batch) and record its latency under verb "batch"."""
+        timing = {}
+        start = time.time()
+        response = self._run_batch(commands, caller_id, timing=timing, **options)
+        self._record_latency("batch", response, start, timing)
+        if "recycled" in timing:
+            response["recycled"] = timing["recycled"]
+        return response
+
+    def _run_batch(self, commands: List[str], caller_id: str, timing: Dict[str, Any],
+                   stop_on_error: bool = False, timeout: int = COMMAND_TIMEOUT) -> Dict[str, Any]:
+        """Run commands in order on a single worker.
+
+        Each command gets its own output and status; a command fails when it adds
+        to $Error or throws. With stop_on_error, commands after the first failure are skipped.
+        A cancel (Session.cancel) interrupts the running command and skips the rest.
+        timeout applies to the whole batch. Batches bypass the result cache (but
+        still invalidate it unless every command is read-only).
+        """
+        logger.info(f"[{self.session_id}] run_batch called ({len(commands)} commands), state={self.state}, caller={caller_id}")
+        not_ready = self._check_ready(caller_id)
+        if not_ready:
+            return not_ready
+
+        # Guardrails for every command before anything runs — no half-applied batches
+        for i, command in enumerate(commands):
+            blocked = check_command_guardrails(command, self.session_id)
+            if blocked:
+                return {"status": "error", "error": f"Command {i + 1}: {blocked}"}
+
+        if RESULT_CACHE_ENABLED and any(classify_read_only(c) is None for c in commands):
+            result_cache.invalidate(self.connection_name, self.module)
+
+        worker, busy = self._acquire_worker(timing=timing)
+        if busy:
+            return busy
+
+        results = []
+        deadline = time.time() + timeout
+        failed = None
+        worker.cancel = threading.Event()
+        try:
+            logger.info(f"[{self.session_id}] Executing batch on worker {worker.index}")
+            for i, command in enumerate(commands):
+                if (failed is not None and stop_on_error) or worker.cancel.is_set():
+                    results.append({"index": i, "command": command, "status": "skipped"})
+                    continue
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise TimeoutError(f"Batch timed out after {timeout}s")
+
+                start = time.time()
+                end = {}
+                worker.commands += 1
+                output = self._send_raw(command, timeout=remaining, worker=worker, end=end)
+                error_count = end.get("errors", 0)
+                # A terminating error fails the command before $Error records it
+                status = "error" if error_count or not end.get("ok", 1) else "success"
+                results.append({
+                    "index": i,
+                    "command": command,
+                    "status": status,
+                    "error_count": error_count,
+                    "output": output,
+                    "elapsed_ms": round((time.time() - start) * 1000),
+                })
+                if status == "error" and failed is None:
+                    failed = i
+                    logger.warning(f"[{self.session_id}] Batch command {i + 1} reported {error_count} error(s): {command[:80]}")
+
+            self.last_command = datetime.now()
+            cancel_ms = self._cancel_finished(worker)
+            response = {
+                "status": "success" if cancel_ms is None else "cancelled",
+                "results": results,
+                "succeeded": sum(1 for r in results if r["status"] == "success"),
+                "failed": sum(1 for r in results if r["status"] == "error"),
+                "skipped": sum(1 for r in results if r["status"] == "skipped"),
+            }
+            if cancel_ms is not None:
+                response["cancel_ms"] = cancel_ms
+            if self.authenticated_as:
+                response["authenticated_as"] = self.authenticated_as
+            logger.info(f"[{self.session_id}] Batch done: {response['succeeded']} ok, "
+                        f"{response['failed']} failed, {response['skipped']} skipped")
+            self._check_memory(worker)
+            return response
+
+        except TimeoutError as e:
+            logger.error(f"[{self.session_id}] Batch timed out, killing worker {worker.index}: {e}")
+            self._fail_worker(worker, f"Timeout: {e}")
+            return {"status": "error", "error": f"Timeout: {e}. The worker running it was killed — retry runs on a fresh one.",
+                    "results": results}
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"[{self.session_id}] Batch failed: {e}")
+            return {"status": "error", "error": str(e), "results": results}
+        finally:
+            self._release_worker(worker)
+
+    def stream_command(self, command: str, caller_id: str, **options) -> Iterator[str]:
+        """Stream a command (see _stream_command) and record its latency. A
+        consumer that goes away before the end line counts as cancelled."""
+        timing = {}
+        start = time.time()
+        last = ""
+        try:
+            for last in self._stream_command(command, caller_id, timing=timing, **options):
+                yield last
+        finally:
+            # The end line is always last (json.dumps spacing sets it apart from pwsh's compressed objects)
+            response = json.loads(last)["_end"] if last.startswith('{"_end": ') else {"status": "cancelled"}
+            self._record_latency(command_verb(command), response, start, timing)
+
+    def _stream_command(self, command: str, caller_id: str, timing: Dict[str, Any],
+                        json_depth: Optional[int] = None, properties: Optional[List[str]] = None,
+                        timeout: int = COMMAND_TIMEOUT) -> Iterator[str]:
+        """Run a command and yield NDJSON lines as pwsh produces them.
+
+        Each output object is one line of compressed JSON; other output lines
+        become {"_message": ...} records. The last line is always
+        {"_end": {"status": ..., "count": ...}}. Nothing is accumulated, so
+        memory stays at one object however large the result set.
+
+        The worker stays busy until the generator finishes. If the consumer
+        goes away mid-stream, the rest of the output is read and discarded so
+        the next command starts in sync. Streams bypass the result cache (but
+        still invalidate it for commands that are not read-only).
+        """
+        logger.info(f"[{self.session_id}] stream_command called, state={self.state}, caller={caller_id}")
+        not_ready = self._check_ready(caller_id)
+        if not_ready:
+            yield ndjson_end(not_ready)
+            return
+        if MODULES.get(self.module, {}).get("use_pac"):
+            yield ndjson_end({"status": "error", "error": f"Streaming is not supported for module {self.module}"})
+            return
+
+        blocked = check_command_guardrails(command, self.session_id)
+        if blocked:
+            yield ndjson_end({"status": "error", "error": blocked})
+            return
+
+        if RESULT_CACHE_ENABLED and classify_read_only(command) is None:
+            result_cache.invalidate(self.connection_name, self.module)
+
+        worker, busy = self._acquire_worker(timing=timing)
+        if busy:
+            yield ndjson_end(busy)
+            return
+
+        start = time.time()
+        count = 0
+        in_sync = False
+        worker.cancel = threading.Event()
+        worker.commands += 1
+        try:
+            logger.info(f"[{self.session_id}] Streaming command on worker {worker.index}")
+            end = {}
+            for line in self._iter_raw(wrap_ndjson_command(command, json_depth, properties), timeout, worker, end):
+                if line.startswith(NDJSON_OBJECT_MARKER):
+                    count += 1
+                    yield line[len(NDJSON_OBJECT_MARKER):] + "\n"
+                elif line.strip():
+                    yield json.dumps({"_message": line}) + "\n"
+            in_sync = True
+
+            self.last_command = datetime.now()
+            response = {"status": "success", "count": count, "elapsed_ms": round((time.time() - start) * 1000)}
+            cancel_ms = self._cancel_finished(worker)
+            if cancel_ms is not None:
+                response.update(status="cancelled", cancel_ms=cancel_ms)
+            elif not end.get("ok", 1):
+                response.update({k: v for k, v in failed_response("", end).items() if k != "output"})
+            if end.get("errors"):
+                response.setdefault("error_count", end["errors"])
+            if self.authenticated_as:
+                response["authenticated_as"] = self.authenticated_as
+            if "recycled" in timing:
+                response["recycled"] = timing["recycled"]
+            logger.info(f"[{self.session_id}] Stream completed, {count} objects")
+            self._check_memory(worker)
+            yield ndjson_end(response)
+
+        except TimeoutError as e:
+            logger.error(f"[{self.session_id}] Stream timed out, killing worker {worker.index}: {e}")
+            in_sync = True  # nothing left to drain
+            self._fail_worker(worker, f"Timeout: {e}")
+            yield ndjson_end({"status": "error", "count": count,
+                              "error": f"Timeout: {e}. The worker running it was killed — retry runs on a fresh one."})
+        except Exception as e:
+            in_sync = True
+            self.last_error = str(e)
+            logger.error(f"[{self.session_id}] Stream failed: {e}")
+            yield ndjson_end({"status": "error", "count": count, "error": str(e)})
+        finally:
+            if not in_sync:
+                self._drain_output(worker, timeout)
+            self._release_worker(worker)
+
+    def _drain_output(self, worker: Worker, timeout: int):
+        """Discard the rest of an abandoned command's output (worker held).
+
+        A no-op frame is queued behind it; reading that frame drops everything before.
+        """
+        logger.warning(f"[{self.session_id}] Stream consumer went away, draining remaining output")
+        try:
+            self._send_raw("$null", timeout=timeout, worker=worker)
+        except Exception as e:
+            logger.error(f"[{self.session_id}] Drain failed, killing worker {worker.index}: {e}")
+            self._fail_worker(worker, f"Drain failed: {e}")
+
+    def _register_handle(self, worker: Worker, handle_id: str, command: str, response: Dict[str, Any],
+                         skip: int) -> Dict[str, Any]:
+        """Record a stored result set and enforce the handle budget (worker held)."""
+        response, count, size = apply_handle_result(response, skip)
+        if response.get("json_error"):
+            self._send_raw(f"Remove-Variable -Name {_handle_variable(handle_id)} -Scope Global -ErrorAction SilentlyContinue",
+                           worker=worker)
+            return response
+        if size > HANDLE_MAX_BYTES:
+            self._send_raw(f"Remove-Variable -Name {_handle_variable(handle_id)} -Scope Global; [System.GC]::Collect()",
+                           worker=worker)
+            response["handle_error"] = (f"Result too large to keep as a handle (~{size // 2**20} MB, "
+                                        f"budget {HANDLE_MAX_BYTES // 2**20} MB)")
+            return response
+
+        self._drop_stale_handles()
+        with self.workers_cond:
+            self.handles[handle_id] = ResultHandle(handle_id, command, worker.pid, count, size)
+        evicted = self._evict_handles(worker, keep=handle_id)
+        logger.info(f"[{self.session_id}] Stored handle {handle_id} on worker {worker.index}: {count} objects, "
+                    f"~{size // 1024} KB" + (f", evicted {', '.join(evicted)}" if evicted else ""))
+        response.update(handle=handle_id, handle_ttl_s=HANDLE_TTL)
+        return response
+
+    def _drop_stale_handles(self):
+        """Forget handles whose pwsh process has exited or been replaced."""
+        with self.workers_cond:
+            pids = {w.pid for w in self.workers if w.alive()}
+            for handle_id in [h for h, info in self.handles.items() if info.pid not in pids]:
+                del self.handles[handle_id]
+
+    def _evict_handles(self, worker: Worker, keep: Optional[str] = None) -> List[str]:
+        """Remove worker's expired handles, then its least recently used ones while
+        over HANDLE_MAX_PER_SESSION or HANDLE_MAX_BYTES. The budget is per pwsh
+        process, since that is where the memory goes. worker must be held."""
+        now = time.time()
+        with self.workers_cond:
+            owned = [(h, info) for h, info in self.handles.items() if info.pid == worker.pid]
+        victims = [h for h, info in owned if h != keep and now - info.last_used > HANDLE_TTL]
+        count = len(owned) - len(victims)
+        total = sum(info.bytes for h, info in owned if h not in victims)
+        for handle_id, info in owned:
+            if count <= HANDLE_MAX_PER_SESSION and total <= HANDLE_MAX_BYTES:
+                break
+            if handle_id == keep or handle_id in victims:
+                continue
+            victims.append(handle_id)
+            count -= 1
+            total -= info.bytes
+        if victims:
+            names = ", ".join(_handle_variable(h) for h in victims)
+            self._send_raw(f"Remove-Variable -Name {names} -Scope Global -ErrorAction SilentlyContinue; [System.GC]::Collect()",
+                           worker=worker)
+            with self.workers_cond:
+                for handle_id in victims:
+                    self.handles.pop(handle_id, None)
+        return victims
+
+    def _handle_worker(self, handle_id: str) -> tuple:
+        """Acquire the worker holding a handle. Returns (worker, info, None), or
+        (None, None, error response)."""
+        self._drop_stale_handles()
+        with self.workers_cond:
+            info = self.handles.get(handle_id)
+        if not info:
+            return None, None, {"status": "error", "error": f"Unknown or expired handle: {handle_id}. Run the command again with store=true."}
+        worker, busy = self._acquire_worker(pid=info.pid)
+        if busy:
+            return None, None, busy
+        with self.workers_cond:
+            if self.handles.get(handle_id) is not info:  # Released while we waited
+                self._release_worker(worker)
+                return None, None, {"status": "error", "error": f"Unknown or expired handle: {handle_id}. Run the command again with store=true."}
+        return worker, info, None
+
+    def query_handle(self, handle_id: str, caller_id: str, filter: Optional[str] = None,
+                     sort_by: Optional[List[str]] = None, descending: bool = False,
+                     skip: int = 0, limit: int = HANDLE_PAGE_SIZE, json_depth: Optional[int] = None,
+                     properties: Optional[List[str]] = None,
+                     timeout: int = COMMAND_TIMEOUT) -> Dict[str, Any]:
+        """Page, filter (a Where-Object condition) or sort a stored result set.
+
+        Runs on the worker holding the handle. Returns a format=json response
+        whose count is the number of matching objects.
+        """
+        not_ready = self._check_ready(caller_id)
+        if not_ready:
+            return not_ready
+        if filter:
+            blocked = check_command_guardrails(filter, self.session_id)
+            if blocked:
+                return {"status": "error", "error": blocked}
+            # A filter that does more than read the objects may change the tenant
+            if RESULT_CACHE_ENABLED and not is_pure_filter(filter):
+                result_cache.invalidate(self.connection_name, self.module)
+
+        worker, info, error = self._handle_worker(handle_id)
+        if error:
+            return error
+        worker.commands += 1
+        try:
+            end = {}
+            output = self._send_raw(
+                wrap_handle_query(handle_id, filter, sort_by, descending, skip, limit, json_depth, properties),
+                timeout=timeout, worker=worker, end=end,
+            )
+            self.last_command = datetime.now()
+            with self.workers_cond:
+                info.last_used = time.time()
+                if handle_id in self.handles:
+                    self.handles.move_to_end(handle_id)
+            if not end.get("ok", 1):
+                return failed_response(output, end)
+            response, _, _ = apply_handle_result({"status": "success", "output": output}, skip)
+            response.update(handle=handle_id, total=info.count, handle_ttl_s=HANDLE_TTL)
+            self._evict_handles(worker, keep=handle_id)
+            return response
+
+        except TimeoutError as e:
+            logger.error(f"[{self.session_id}] Handle query timed out, killing worker {worker.index}: {e}")
+            self._fail_worker(worker, f"Timeout: {e}")
+            return {"status": "error", "error": f"Timeout: {e}. Worker reset — its stored handles are gone."}
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"[{self.session_id}] Handle query failed: {e}")
+            return {"status": "error", "error": str(e)}
+        finally:
+            self._release_worker(worker)
+
+    def release_handle(self, handle_id: str) -> bool:
+        """Free a stored result set. Returns False if the handle is unknown."""
+        worker, _, error = self._handle_worker(handle_id)
+        if error:
+            return False
+        try:
+            with self.workers_cond:
+                self.handles.pop(handle_id, None)
+            self._send_raw(f"Remove-Variable -Name {_handle_variable(handle_id)} -Scope Global "
+                           f"-ErrorAction SilentlyContinue; [System.GC]::Collect()", worker=worker)
+            return True
+        finally:
+            self._release_worker(worker)
+
+    def cancel_running(self, cancel_event: threading.Event) -> bool:
+        """Interrupt the command started with cancel_event (see _interrupt).
+        Returns False if no worker runs it."""
+        with self.workers_cond:
+            worker = next((w for w in self.workers if w.busy and w.cancel is cancel_event), None)
+        if not worker:
+            return False
+        return self._interrupt(worker, cancel_event)
+
+    def cancel(self, worker_index: Optional[int] = None) -> List[int]:
+        """Interrupt every running command (or only worker_index's). Returns the
+        workers interrupted; background maintenance is never targeted."""
+        with self.workers_cond:
+            running = [(w, w.cancel) for w in self.workers
+                       if w.busy and w.cancel and (worker_index is None or w.index == worker_index)]
+        return [w.index for w, cancel_event in running if self._interrupt(w, cancel_event)]
+
+    def _interrupt(self, worker: Worker, cancel_event: threading.Event) -> bool:
+        """Stop worker's pipeline with SIGINT, pwsh's Ctrl+C, keeping the process
+        and its auth.
+
+        The frame's finally block still writes the end frame, so the command's
+        reader drains to it and returns what was output so far. A command that
+        doesn't stop within CANCEL_GRACE (stuck in a blocking .NET call) gets its
+        worker killed, as a timeout would.
+        """
+        if MODULES.get(self.module, {}).get("use_pac"):
+            return False  # pac runs as its own subprocess, not in the worker
+        with self.workers_cond:
+            if not worker.busy or worker.cancel is not cancel_event or worker.cancel_at:
+                return False
+            worker.cancel_at = time.time()
+        cancel_event.set()
+        logger.warning(f"[{self.session_id}] Cancelling running command on worker {worker.index}")
+        try:
+            os.kill(worker.pid, signal.SIGINT)
+        except OSError as e:
+            logger.error(f"[{self.session_id}] Could not interrupt worker {worker.index}: {e}")
+        timer = threading.Timer(CANCEL_GRACE, self._escalate_cancel, args=(worker, cancel_event))
+        timer.daemon = True
+        timer.start()
+        return True
+
+    def wait_cancelled(self, worker_indexes: List[int], timeout: float) -> bool:
+        """Block until the interrupted commands on worker_indexes have stopped."""
+        with self.workers_cond:
+            return self.workers_cond.wait_for(
+                lambda: not any(w.cancel_at for w in self.workers if w.index in worker_indexes), timeout=timeout)
+
+    def _escalate_cancel(self, worker: Worker, cancel_event: threading.Event):
+        """Kill a worker whose interrupted command hasn't reached its end frame."""
+        with self.workers_cond:
+            cancel_at = worker.cancel_at if worker.busy and worker.cancel is cancel_event else 0.0
+        if not cancel_at:
+            return
+        logger.error(f"[{self.session_id}] Command on worker {worker.index} ignored the interrupt "
+                     f"for {CANCEL_GRACE:.0f}s, killing the worker")
+        metrics.record_cancel(time.time() - cancel_at, killed=True)
+        self._fail_worker(worker, "Cancelled (command did not stop)")
+
+    def _cancel_finished(self, worker: Worker) -> Optional[int]:
+        """Record how long an interrupted command took to reach its end frame.
+        Returns the latency in ms, or None if the worker wasn't interrupted."""
+        with self.workers_cond:
+            cancel_at, worker.cancel_at = worker.cancel_at, 0.0
+        if not cancel_at:
+            return None
+        latency = time.time() - cancel_at
+        metrics.record_cancel(latency)
+        logger.info(f"[{self.session_id}] Worker {worker.index} stopped {latency * 1000:.0f}ms after the interrupt")
+        return round(latency * 1000)
 
     def stop(self):
-        """Stop the session."""
-        if self.process:
+        """Stop the session and all of its workers."""
+        with self.workers_cond:
+            self.state = "stopped"  # Workers still starting are discarded
+            workers = list(self.workers)
+        for worker in workers:
+            worker.stop()
+        if self.process and not any(w.process is self.process for w in workers):
             try:
                 self.process.terminate()
                 self.process.wait(timeout=5)
             except:
                 self.process.kill()
-        self.state = "stopped"
 
 
 class SessionPool:
@@ -724,6 +2585,7 @@ class SessionPool:
         self.sessions: Dict[str, Session] = {}
         self.lock = threading.Lock()
         self.restoring = False
+        self.restore_progress: Dict[str, Any] = {}
         # Restore in background so Flask starts serving immediately
         threading.Thread(target=self._restore_sessions_background, daemon=True).start()
 
@@ -762,6 +2624,10 @@ class SessionPool:
         PowerShell module tokens are persisted in Docker volumes (.Azure, .config, .local).
         We re-launch pwsh and run a health check — if the cached token is still valid,
         the session comes back authenticated without needing a device code.
+
+        Every session is registered as an "initializing" placeholder first, so
+        get_or_create_session waits for it instead of starting a duplicate. Up to
+        RESTORE_PARALLELISM restores then run at once.
         """
         if not os.path.exists(STATE_FILE):
             return
@@ -776,51 +2642,87 @@ class SessionPool:
         if not saved:
             return
 
-        logger.info(f"Restoring {len(saved)} session(s) from saved state...")
-
-        for entry in saved:
-            conn_name = entry["connection_name"]
-            module = entry["module"]
-            session_id = f"{conn_name}/{module}"
+        pending = queue.Queue()
+        with self.lock:
+            for entry in saved:
+                conn_name = entry["connection_name"]
+                module = entry["module"]
+                session_id = f"{conn_name}/{module}"
 
-            # Skip if module not configured or doesn't cache tokens
-            module_config = MODULES.get(module)
-            if not module_config or module_config.get("use_pac") or module_config.get("no_cached_auth"):
-                logger.info(f"[{session_id}] Skipping restore — module not supported for restore")
-                continue
+                # Skip if module not configured or doesn't cache tokens
+                module_config = MODULES.get(module)
+                if not module_config or module_config.get("use_pac") or module_config.get("no_cached_auth"):
+                    logger.info(f"[{session_id}] Skipping restore — module not supported for restore")
+                    continue
+                if session_id in self.sessions:
+                    continue
 
-            try:
                 session = Session(
                     tenant=entry["tenant"],
                     module=module,
                     connection_name=conn_name,
                     app_id=entry["app_id"],
+                    restore_done=threading.Event(),
                 )
+                self.sessions[session_id] = session
+                pending.put((session, entry))
+            self.restore_progress = {"total": pending.qsize(), "restored": 0, "expired": 0, "failed": 0,
+                                     "started_at": time.time(), "finished_at": None}
 
-                if not session.start_process():
-                    logger.warning(f"[{session_id}] Restore failed — could not start pwsh")
-                    continue
+        logger.info(f"Restoring {pending.qsize()} session(s) from saved state, {RESTORE_PARALLELISM} at a time...")
 
-                # Run health check — if cached tokens are valid, this succeeds
-                logger.info(f"[{session_id}] Verifying cached auth tokens...")
+        def restore_next():
+            while True:
                 try:
-                    health_output = session._send_raw(module_config["health_cmd"], timeout=30)
-                    if re.search(module_config["health_pattern"], health_output):
-                        session.state = "authenticated"
-                        session.authenticated_at = time.time()
-                        session.authenticated_as = session._extract_identity(health_output) or entry.get("authenticated_as")
-                        session.on_auth_complete = self.save_state
-                        self.sessions[session_id] = session
-                        logger.info(f"[{session_id}] Restored! Identity: {session.authenticated_as}")
-                    else:
-                        session.stop()
-                        logger.info(f"[{session_id}] Cached tokens expired — will re-auth on next use")
-                except Exception as e:
-                    session.stop()
-                    logger.info(f"[{session_id}] Restore health check failed: {e} — will re-auth on next use")
+                    session, entry = pending.get_nowait()
+                except queue.Empty:
+                    return
+                self._restore_session(session, entry)
+
+        threads = [threading.Thread(target=restore_next, daemon=True, name=f"restore-{n}")
+                   for n in range(min(RESTORE_PARALLELISM, pending.qsize()))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
 
-            except Exception as e:
-                logger.warning(f"[{session_id}] Restore error: {e}")
+        with self.lock:
+            progress = self.restore_progress
+            progress["finished_at"] = time.time()
+        logger.info(f"Restore finished in {progress['finished_at'] - progress['started_at']:.1f}s: "
+                    f"{progress['restored']} restored, {progress['expired']} expired, {progress['failed']} failed")
+
+    def _restore_session(self, session: Session, entry: Dict[str, Any]):
+        """Start one placeholder's pwsh and keep it if the cached tokens pass the
+        health check (start_process runs it). Otherwise the placeholder is dropped,
+        and waiting callers create a fresh session that will re-auth."""
+        session_id = session.session_id
+        start = time.time()
+        outcome = "failed"
+        try:
+            logger.info(f"[{session_id}] Verifying cached auth tokens...")
+            if not session.start_process():
+                logger.warning(f"[{session_id}] Restore failed — could not start pwsh")
+            elif session.state == "authenticated":
+                session.authenticated_at = time.time()
+                session.authenticated_as = session.authenticated_as or entry.get("authenticated_as")
+                session.on_auth_complete = self.save_state
+                outcome = "restored"
+                logger.info(f"[{session_id}] Restored in {time.time() - start:.1f}s! Identity: {session.authenticated_as}")
+            else:
+                outcome = "expired"
+                logger.info(f"[{session_id}] Cached tokens expired — will re-auth on next use")
+        except Exception as e:
+            logger.warning(f"[{session_id}] Restore error: {e}")
+
+        session.restore_s = round(time.time() - start, 1)
+        with self.lock:
+            self.restore_progress[outcome] += 1
+            if outcome != "restored" and self.sessions.get(session_id) is session:
+                del self.sessions[session_id]
+        if outcome != "restored":
+            session.stop()
+        session.restore_done.set()
 
     def get_or_create_session(self, connection_name: str, module: str) -> Session:
         """Get or create a session.
@@ -833,6 +2735,13 @@ class SessionPool:
         session_id = f"{connection_name}/{module}"
         new_session = None
 
+        with self.lock:
+            existing = self.sessions.get(session_id)
+        if existing and existing.restore_done and not existing.restore_done.is_set():
+            # Still being restored at startup — wait rather than start a duplicate
+            logger.info(f"[{session_id}] Waiting for startup restore")
+            existing.restore_done.wait(RESTORE_WAIT)
+
         with self.lock:
             # Evict dead sessions (killed after timeout or process crash)
             existing = self.sessions.get(session_id)
@@ -882,14 +2791,43 @@ class SessionPool:
 
         return new_session
 
-    def run_command(self, connection_name: str, module: str, command: str, caller_id: str) -> Dict[str, Any]:
-        """Run a command."""
+    def run_command(self, connection_name: str, module: str, command: str, caller_id: str,
+                    **options) -> Dict[str, Any]:
+        """Run a command. options are passed to Session.run_command (fresh, output_format, ...)."""
+        try:
+            session = self.get_or_create_session(connection_name, module)
+            return session.run_command(command, caller_id, **options)
+        except Exception as e:
+            return {"status": "error", "error": str(e)}
+
+    def run_batch(self, connection_name: str, module: str, commands: List[str], caller_id: str,
+                  stop_on_error: bool = False) -> Dict[str, Any]:
+        """Run a batch of commands on one session."""
         try:
             session = self.get_or_create_session(connection_name, module)
-            return session.run_command(command, caller_id)
+            return session.run_batch(commands, caller_id, stop_on_error=stop_on_error)
         except Exception as e:
             return {"status": "error", "error": str(e)}
 
+    def stream_command(self, connection_name: str, module: str, command: str, caller_id: str,
+                       **options) -> Iterator[str]:
+        """Stream a command's objects as NDJSON lines (see Session.stream_command)."""
+        try:
+            session = self.get_or_create_session(connection_name, module)
+        except Exception as e:
+            yield ndjson_end({"status": "error", "error": str(e)})
+            return
+        yield from session.stream_command(command, caller_id, **options)
+
+    def query_handle(self, connection_name: str, module: str, handle_id: str, caller_id: str,
+                     **options) -> Dict[str, Any]:
+        """Query a stored result set (see Session.query_handle)."""
+        with self.lock:
+            session = self.sessions.get(f"{connection_name}/{module}")
+        if not session:
+            return {"status": "error", "error": f"Unknown or expired handle: {handle_id} (no {module} session)"}
+        return session.query_handle(handle_id, caller_id, **options)
+
     def reset_connection(self, connection_name: str, module: str = None) -> Dict[str, Any]:
         """Reset sessions for a connection. If module specified, reset only that session."""
         with self.lock:
@@ -904,6 +2842,7 @@ class SessionPool:
                     reset.append(session_id)
             for sid in to_remove:
                 del self.sessions[sid]
+        result_cache.invalidate(connection_name, module)
 
         # Save state outside lock to avoid deadlock
         if reset:
@@ -920,17 +2859,300 @@ class SessionPool:
                         "state": s.state,
                         "authenticated": s.state == "authenticated",
                         "last_command": s.last_command.isoformat() if s.last_command else None,
+                        "handles": len(s.handles),
+                        "workers": [w.to_dict() for w in list(s.workers)],
+                        "queued": s.workers_waiting,
+                        **({"scale_error": s.scale_error} if s.scale_error else {}),
+                        **({"recycled": s.recycled} if s.recycled else {}),
+                        **({"restore_s": s.restore_s} if s.restore_s is not None else {}),
+                        **({"recycle_error": s.recycle_error} if s.recycle_error else {}),
                     }
                     for s in self.sessions.values()
                 ]
             }
             if self.restoring:
                 result["restoring"] = True
+            if self.restore_progress:
+                progress = dict(self.restore_progress)
+                progress["done"] = progress["restored"] + progress["expired"] + progress["failed"]
+                progress["elapsed_s"] = round((progress.pop("finished_at") or time.time()) - progress.pop("started_at"), 1)
+                result["restore"] = progress
             return result
 
 
 # Global pool
 pool = SessionPool()
+spare_pool.start()
+
+
+# Async jobs — long commands outlive a single HTTP request (callers time out
+# well before COMMAND_TIMEOUT). Finished jobs are kept in memory and on disk
+# for JOB_TTL seconds so results survive a lost poll or a pool restart.
+JOB_TTL = int(os.getenv("JOB_TTL", "3600"))
+JOB_MAX_ACTIVE = int(os.getenv("JOB_MAX_ACTIVE", "64"))
+JOB_MAX_WAIT = 60  # Cap on ?wait= long-polls, below callers' read timeouts
+JOB_DIR = os.path.join(STATE_DIR, "jobs")
+os.makedirs(JOB_DIR, exist_ok=True)
+
+
+@dataclass
+class Job:
+    """A command submitted through /jobs."""
+
+    job_id: str
+    connection_name: str
+    module: str
+    command: str
+    caller_id: str
+    fresh: bool = False  # Bypass the read-only result cache
+    output_format: str = "text"
+    json_depth: Optional[int] = None
+    properties: Optional[List[str]] = None
+    store: bool = False  # Keep the result set as a handle
+    skip: int = 0
+    limit: int = HANDLE_PAGE_SIZE
+
+    # queued, running, then the run_command result status (success, error,
+    # auth_required) or cancelled
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    output_lines: List[str] = field(default_factory=list)
+    result: Dict[str, Any] = field(default_factory=dict)  # Extra result fields (error, device_code, ...)
+
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    changed: threading.Condition = field(default_factory=threading.Condition)
+
+    @property
+    def done(self) -> bool:
+        return self.status not in ("queued", "running")
+
+    def to_dict(self, offset: int = 0) -> Dict[str, Any]:
+        """API view: /run-style result plus job fields, with output from line `offset` on."""
+        with self.changed:
+            lines = self.output_lines[offset:]
+            end = self.finished_at or time.time()
+            data = {
+                **self.result,
+                "status": self.status,
+                "job_id": self.job_id,
+                "connection": self.connection_name,
+                "module": self.module,
+                "command": self.command,
+                "output": "\n".join(lines),
+                "offset": offset,
+                "next_offset": offset + len(lines),
+                "elapsed_s": round(end - self.created_at, 1),
+            }
+            if self.cancel_event.is_set() and not self.done:
+                data["cancel_requested"] = True
+            return data
+
+    def to_record(self) -> Dict[str, Any]:
+        with self.changed:
+            return {
+                "job_id": self.job_id,
+                "connection_name": self.connection_name,
+                "module": self.module,
+                "command": self.command,
+                "caller_id": self.caller_id,
+                "fresh": self.fresh,
+                "output_format": self.output_format,
+                "json_depth": self.json_depth,
+                "properties": self.properties,
+                "store": self.store,
+                "skip": self.skip,
+                "limit": self.limit,
+                "status": self.status,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "output_lines": list(self.output_lines),
+                "result": dict(self.result),
+            }
+
+
+class JobStore:
+    """Runs /jobs commands on background threads and retains their results."""
+
+    def __init__(self, pool: SessionPool):
+        self.pool = pool
+        self.jobs: Dict[str, Job] = {}
+        self.lock = threading.Lock()
+        self.last_sweep = 0.0
+
+    def submit(self, connection_name: str, module: str, command: str, caller_id: str,
+               **options) -> Optional[Job]:
+        """Start a job. Returns None if JOB_MAX_ACTIVE jobs are already queued or running.
+
+        options are the Session.run_command options a Job stores (fresh, output_format, ...).
+        """
+        self._sweep()
+        with self.lock:
+            if sum(1 for j in self.jobs.values() if not j.done) >= JOB_MAX_ACTIVE:
+                return None
+            job = Job(
+                job_id=uuid.uuid4().hex[:16],
+                connection_name=connection_name,
+                module=module,
+                command=command,
+                caller_id=caller_id,
+                **options,
+            )
+            self.jobs[job.job_id] = job
+        self._persist(job)
+        logger.info(f"[{connection_name}/{module}] Job {job.job_id} submitted: {command[:80]}")
+        threading.Thread(target=self._run, args=(job,), daemon=True, name=f"job-{job.job_id}").start()
+        return job
+
+    def _run(self, job: Job):
+        start = time.time()
+        with job.changed:
+            job.status = "running"
+            job.started_at = start
+            job.changed.notify_all()
+
+        def on_line(line: str):
+            with job.changed:
+                job.output_lines.append(line)
+                job.changed.notify_all()
+
+        if job.cancel_event.is_set():
+            result = {"status": "cancelled", "error": "Cancelled before it started"}
+        else:
+            try:
+                session = self.pool.get_or_create_session(job.connection_name, job.module)
+                result = session.run_command(
+                    job.command, job.caller_id, on_line=on_line, cancel_event=job.cancel_event,
+                    fresh=job.fresh, output_format=job.output_format,
+                    json_depth=job.json_depth, properties=job.properties,
+                    store=job.store, skip=job.skip, limit=job.limit,
+                )
+            except Exception as e:
+                result = {"status": "error", "error": str(e)}
+            if job.cancel_event.is_set() and result.get("status") not in ("success", "cancelled"):
+                result = {"status": "cancelled", "error": "Cancelled by caller"}
+
+        self._finish(job, result)
+        metrics.record_request(time.time() - start, error=job.status == "error")
+        if job.status == "auth_required":
+            metrics.record_auth()
+
+    def _finish(self, job: Job, result: Dict[str, Any]):
+        result = dict(result)
+        output = result.pop("output", None)
+        status = result.pop("status", "error")
+        with job.changed:
+            # The final output is authoritative (PAC commands don't stream lines)
+            if output is not None:
+                job.output_lines = output.split("\n") if output else []
+            job.result = result
+            job.status = status
+            job.finished_at = time.time()
+            job.changed.notify_all()
+        self._persist(job)
+        logger.info(f"[{job.connection_name}/{job.module}] Job {job.job_id} finished: "
+                    f"status={status} elapsed={job.finished_at - job.created_at:.1f}s")
+
+    def get(self, job_id: str) -> Optional[Job]:
+        if not re.fullmatch(r"[0-9a-f]{16}", job_id or ""):
+            return None
+        with self.lock:
+            job = self.jobs.get(job_id)
+        return job or self._load(job_id)
+
+    def wait(self, job: Job, timeout: float):
+        """Block until the job finishes or timeout elapses."""
+        with job.changed:
+            job.changed.wait_for(lambda: job.done, timeout=min(timeout, JOB_MAX_WAIT))
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Request cancellation. A running command is interrupted; a queued one never starts."""
+        job = self.get(job_id)
+        if not job or job.done:
+            return job
+        job.cancel_event.set()
+        with self.pool.lock:
+            session = self.pool.sessions.get(f"{job.connection_name}/{job.module}")
+        if session:
+            session.cancel_running(job.cancel_event)
+        logger.info(f"[{job.connection_name}/{job.module}] Job {job_id} cancel requested")
+        return job
+
+    def summaries(self, connection_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Job states without output, newest first."""
+        with self.lock:
+            jobs = list(self.jobs.values())
+        summaries = []
+        for job in sorted(jobs, key=lambda j: j.created_at, reverse=True):
+            if connection_name and job.connection_name != connection_name:
+                continue
+            summary = job.to_dict(offset=len(job.output_lines))
+            summary.pop("output")
+            summaries.append(summary)
+        return summaries
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.lock:
+            counts = defaultdict(int)
+            for job in self.jobs.values():
+                counts[job.status] += 1
+            return dict(counts)
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(JOB_DIR, f"{job_id}.json")
+
+    def _persist(self, job: Job):
+        path = self._path(job.job_id)
+        try:
+            tmp = f"{path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(job.to_record(), f)
+            os.replace(tmp, path)
+        except Exception as e:
+            logger.warning(f"Failed to persist job {job.job_id}: {e}")
+
+    def _load(self, job_id: str) -> Optional[Job]:
+        """Load a job retained on disk (e.g. from before a pool restart)."""
+        try:
+            with open(self._path(job_id)) as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        job = Job(**record)
+        if job.finished_at and time.time() - job.finished_at > JOB_TTL:
+            return None
+        if not job.done:
+            # Not in memory but never finished — the pool restarted under it
+            job.status = "error"
+            job.result = {"error": "Session pool restarted while the job was running"}
+            job.finished_at = time.time()
+            self._persist(job)
+        with self.lock:
+            return self.jobs.setdefault(job_id, job)
+
+    def _sweep(self):
+        """Drop finished jobs older than JOB_TTL from memory and disk (at most once a minute)."""
+        now = time.time()
+        if now - self.last_sweep < 60:
+            return
+        self.last_sweep = now
+        with self.lock:
+            expired = [jid for jid, j in self.jobs.items() if j.done and now - j.finished_at > JOB_TTL]
+            for jid in expired:
+                del self.jobs[jid]
+        try:
+            for name in os.listdir(JOB_DIR):
+                path = os.path.join(JOB_DIR, name)
+                if now - os.path.getmtime(path) > JOB_TTL:
+                    os.remove(path)
+        except OSError as e:
+            logger.warning(f"Job sweep failed: {e}")
+
+
+jobs = JobStore(pool)
 
 
 # Keepalive thread - pings authenticated sessions to prevent token expiry
@@ -955,7 +3177,10 @@ class SessionKeepalive:
         while self.running:
             time.sleep(self.interval)
             self._reap_stale_sessions()
+            self._expire_handles()
             self._ping_sessions()
+            self._scale_down_workers()
+            self._recycle_workers()
 
     def _reap_stale_sessions(self):
         """Clean up sessions stuck in auth_pending or error for too long."""
@@ -972,6 +3197,28 @@ class SessionKeepalive:
                 session.stop()
                 logger.info(f"[{sid}] Reaped stale session (state={session.state})")
 
+    def _expire_handles(self):
+        """Free result handles past HANDLE_TTL (skips workers with a command in progress)."""
+        with self.pool.lock:
+            sessions = [s for s in self.pool.sessions.values() if s.handles]
+
+        for session in sessions:
+            session._drop_stale_handles()
+            with session.workers_cond:
+                pids = {h.pid for h in session.handles.values()}
+                workers = [w for w in session.workers if w.pid in pids]
+            for worker in workers:
+                if not session._try_acquire_worker(worker):
+                    continue
+                try:
+                    evicted = session._evict_handles(worker)
+                    if evicted:
+                        logger.info(f"[{session.session_id}] Expired handle(s): {', '.join(evicted)}")
+                except Exception as e:
+                    logger.error(f"[{session.session_id}] Handle expiry failed: {e}")
+                finally:
+                    session._release_worker(worker)
+
     def _ping_sessions(self):
         with self.pool.lock:
             sessions = list(self.pool.sessions.values())
@@ -979,32 +3226,62 @@ class SessionKeepalive:
         for session in sessions:
             if session.state != "authenticated":
                 continue
+            module_config = MODULES.get(session.module)
+            if not module_config or module_config.get("use_pac") or module_config.get("no_cached_auth"):
+                continue
+            with session.workers_cond:
+                workers = list(session.workers)
 
-            try:
-                module_config = MODULES.get(session.module)
-                if not module_config or module_config.get("use_pac") or module_config.get("no_cached_auth"):
-                    continue
-
-                # Non-blocking lock — skip sessions with a command in progress
-                if not session.process_lock.acquire(blocking=False):
-                    logger.debug(f"[{session.session_id}] Keepalive skipped — command in progress")
+            for worker in workers:
+                # Skip workers with a command in progress
+                if not session._try_acquire_worker(worker):
+                    logger.debug(f"[{session.session_id}] Keepalive skipped worker {worker.index} — command in progress")
                     continue
                 try:
-                    health_output = session._send_raw(module_config["health_cmd"], timeout=30)
-                finally:
-                    session.process_lock.release()
+                    health_output = session._send_raw(module_config["health_cmd"], timeout=30, worker=worker)
+                    ok = bool(re.search(module_config["health_pattern"], health_output))
+                    detail = health_output[:100]
+                except Exception as e:
+                    ok, detail = False, str(e)
 
-                if re.search(module_config["health_pattern"], health_output):
+                if ok:
                     self.last_ping[session.session_id] = datetime.now()
                     self.ping_count += 1
-                    logger.debug(f"[{session.session_id}] Keepalive OK")
+                    logger.debug(f"[{session.session_id}] Keepalive OK (worker {worker.index})")
                 else:
                     self.ping_failures += 1
-                    logger.warning(f"[{session.session_id}] Keepalive failed: {health_output[:100]}")
-
+                    worker.failures += 1
+                    logger.warning(f"[{session.session_id}] Keepalive failed on worker {worker.index}: {detail}")
+                    # An unhealthy extra worker is dropped and replaced on demand; the
+                    # last one keeps serving as before so auth errors still surface
+                    if len(session.workers) > 1:
+                        session._fail_worker(worker, "Keepalive health check failed")
+                session._release_worker(worker)
+
+    def _scale_down_workers(self):
+        """Retire extra workers that were idle through the last interval."""
+        with self.pool.lock:
+            sessions = [s for s in self.pool.sessions.values() if len(s.workers) > SESSION_WORKERS_MIN]
+        for session in sessions:
+            try:
+                session.scale_down()
             except Exception as e:
-                self.ping_failures += 1
-                logger.error(f"[{session.session_id}] Keepalive error: {e}")
+                logger.error(f"[{session.session_id}] Worker scale-down failed: {e}")
+
+    def _recycle_workers(self):
+        """Recycle idle workers past a RECYCLE_* limit (busy ones are checked
+        when their command finishes)."""
+        with self.pool.lock:
+            sessions = [s for s in self.pool.sessions.values() if s.state == "authenticated"]
+        for session in sessions:
+            with session.workers_cond:
+                workers = [w for w in session.workers if not w.busy]
+            for worker in workers:
+                worker.rss_mb = _process_rss_mb(worker.pid) or worker.rss_mb
+                try:
+                    session.check_recycle(worker)
+                except Exception as e:
+                    logger.error(f"[{session.session_id}] Worker recycle check failed: {e}")
 
     def get_stats(self) -> dict:
         return {
@@ -1039,6 +3316,55 @@ def list_connections():
     return jsonify({"connections": registry.get("connections", {})})
 
 
+def _validate_run_request(data: dict) -> tuple:
+    """Resolve the connection for /run, /run/ndjson, /run/stream and /jobs. Returns (connection, error)."""
+    # Single-connection mode: use env var, ignore request connection
+    connection = SINGLE_CONNECTION or data.get("connection")
+    if not all([connection, data.get("module"), data.get("command")]):
+        return connection, "Missing connection, module, or command"
+    if not isinstance(data["command"], str):
+        return connection, "command must be a string"
+    if data["module"] not in MODULES:
+        return connection, f"Unknown module: {data['module']}"
+    return connection, None
+
+
+def _validate_batch_request(data: dict) -> tuple:
+    """Resolve the connection for /run_batch and check its commands. Returns (connection, error)."""
+    connection = SINGLE_CONNECTION or data.get("connection")
+    commands = data.get("commands")
+    if not all([connection, data.get("module")]):
+        return connection, "Missing connection or module"
+    if data["module"] not in MODULES:
+        return connection, f"Unknown module: {data['module']}"
+    if not isinstance(commands, list) or not commands or not all(isinstance(c, str) and c.strip() for c in commands):
+        return connection, "commands must be a non-empty list of command strings"
+    if len(commands) > BATCH_MAX_COMMANDS:
+        return connection, f"Too many commands ({len(commands)}); the limit is {BATCH_MAX_COMMANDS}"
+    return connection, None
+
+
+def _run_options(data: dict) -> tuple:
+    """Session.run_command options from a /run or /jobs body. Returns (options, error)."""
+    options = {"fresh": bool(data.get("fresh"))}
+    # Handles always return JSON pages
+    output_format = "json" if data.get("store") else data.get("format", "text")
+    if output_format not in ("text", "json"):
+        return options, f"Unknown format: {output_format} (use text or json)"
+    if output_format == "json":
+        error = validate_json_options(data["command"], data.get("depth"), data.get("properties"))
+        if error:
+            return options, error
+        options.update(output_format="json", json_depth=data.get("depth"), properties=data.get("properties"))
+    if data.get("store"):
+        for key in ("skip", "limit"):
+            if data.get(key) is not None and (not isinstance(data[key], int) or isinstance(data[key], bool) or data[key] < 0):
+                return options, f"{key} must be a non-negative integer"
+        options.update(store=True, skip=data.get("skip") or 0,
+                       limit=HANDLE_PAGE_SIZE if data.get("limit") is None else data["limit"])
+    return options, None
+
+
 @app.route("/run", methods=["POST"])
 def run_command():
     start = time.time()
@@ -1046,30 +3372,18 @@ def run_command():
     module = data.get("module")
     command = data.get("command")
     caller_id = data.get("caller_id", "anonymous")
-
-    # Single-connection mode: use env var, ignore request connection
-    if SINGLE_CONNECTION:
-        connection = SINGLE_CONNECTION
-    else:
-        connection = data.get("connection")
+    connection, error = _validate_run_request(data)
+    if not error:
+        options, error = _run_options(data)
 
     logger.info(f"[HTTP] POST /run connection={connection} module={module} caller={caller_id} command={command[:60] if command else 'None'}")
 
-    if not all([connection, module, command]):
-        metrics.record_request(time.time() - start, error=True)
-        logger.warning(f"[HTTP] POST /run rejected: missing params (connection={connection}, module={module}, command={'yes' if command else 'None'})")
-        return jsonify({"status": "error", "error": "Missing connection, module, or command"}), 400
-
-    # In single-connection mode, reject requests for other connections
-    if SINGLE_CONNECTION and connection != SINGLE_CONNECTION:
-        metrics.record_request(time.time() - start, error=True)
-        return jsonify({"status": "error", "error": f"This container only handles {SINGLE_CONNECTION}"}), 400
-
-    if module not in MODULES:
+    if error:
         metrics.record_request(time.time() - start, error=True)
-        return jsonify({"status": "error", "error": f"Unknown module: {module}"}), 400
+        logger.warning(f"[HTTP] POST /run rejected: {error}")
+        return jsonify({"status": "error", "error": error}), 400
 
-    result = pool.run_command(connection, module, command, caller_id)
+    result = pool.run_command(connection, module, command, caller_id, **options)
     elapsed = time.time() - start
     is_error = result.get("status") == "error"
     is_auth = result.get("status") == "auth_required"
@@ -1083,6 +3397,317 @@ def run_command():
     return jsonify(result)
 
 
+@app.route("/warm", methods=["POST"])
+def warm_session():
+    """Pre-create a session in the background so the next /run skips pwsh start-up.
+
+    Only restores cached auth. A device code flow is never started: a session
+    without usable cached tokens stays "ready" until a real command runs.
+    """
+    data = request.get_json() or {}
+    connection = SINGLE_CONNECTION or data.get("connection")
+    module = data.get("module")
+    if not connection or module not in MODULES:
+        return jsonify({"status": "error", "error": "Missing connection or unknown module"}), 400
+    if MODULES[module].get("use_pac") or MODULES[module].get("no_cached_auth"):
+        return jsonify({"status": "skipped", "reason": f"{module} has no cached auth to restore"})
+
+    with pool.lock:
+        existing = pool.sessions.get(f"{connection}/{module}")
+    if existing and existing.state != "error":
+        return jsonify({"status": existing.state})
+
+    def warm():
+        try:
+            session = pool.get_or_create_session(connection, module)
+            logger.info(f"[{session.session_id}] Warmed up, state={session.state}")
+        except Exception as e:
+            logger.warning(f"[{connection}/{module}] Warm-up failed: {e}")
+
+    logger.info(f"[HTTP] POST /warm connection={connection} module={module}")
+    threading.Thread(target=warm, daemon=True, name=f"warm-{connection}-{module}").start()
+    return jsonify({"status": "warming"}), 202
+
+
+@app.route("/run_batch", methods=["POST"])
+def run_batch():
+    """Run an ordered list of commands on one session under one lock acquisition."""
+    start = time.time()
+    data = request.get_json() or {}
+    commands = data.get("commands")
+    connection, error = _validate_batch_request(data)
+    if error:
+        metrics.record_request(time.time() - start, error=True)
+        logger.warning(f"[HTTP] POST /run_batch rejected: {error}")
+        return jsonify({"status": "error", "error": error}), 400
+
+    module = data["module"]
+    logger.info(f"[HTTP] POST /run_batch connection={connection} module={module} commands={len(commands)}")
+    result = pool.run_batch(connection, module, commands, data.get("caller_id", "anonymous"),
+                            stop_on_error=bool(data.get("stop_on_error")))
+    elapsed = time.time() - start
+    metrics.record_request(elapsed, error=result.get("status") == "error")
+    if result.get("status") == "auth_required":
+        metrics.record_auth()
+    logger.info(f"[HTTP] POST /run_batch connection={connection} module={module} -> status={result.get('status')} elapsed={elapsed:.1f}s")
+    return jsonify(result)
+
+
+@app.route("/run/ndjson", methods=["POST"])
+def run_ndjson():
+    """Run a command and stream its output objects as NDJSON (chunked).
+
+    Body as for /run, plus optional depth and properties as in format=json.
+    """
+    start = time.time()
+    data = request.get_json() or {}
+    module = data.get("module")
+    command = data.get("command")
+    caller_id = data.get("caller_id", "anonymous")
+    connection, error = _validate_run_request(data)
+    if not error:
+        error = validate_json_options(command, data.get("depth"), data.get("properties"))
+
+    logger.info(f"[HTTP] POST /run/ndjson connection={connection} module={module} caller={caller_id} command={command[:60] if command else 'None'}")
+
+    if error:
+        metrics.record_request(time.time() - start, error=True)
+        logger.warning(f"[HTTP] POST /run/ndjson rejected: {error}")
+        return jsonify({"status": "error", "error": error}), 400
+
+    def generate():
+        status = "error"
+        try:
+            for chunk in pool.stream_command(connection, module, command, caller_id,
+                                             json_depth=data.get("depth"), properties=data.get("properties")):
+                if chunk.startswith(_NDJSON_END_PREFIX):
+                    status = json.loads(chunk)["_end"].get("status")
+                yield chunk
+        finally:
+            elapsed = time.time() - start
+            metrics.record_request(elapsed, error=status == "error")
+            if status == "auth_required":
+                metrics.record_auth()
+            logger.info(f"[HTTP] POST /run/ndjson connection={connection} module={module} -> status={status} elapsed={elapsed:.1f}s")
+
+    return Response(generate(), mimetype="application/x-ndjson")
+
+
+@app.route("/run/stream", methods=["POST"])
+def run_stream():
+    """Run a command and stream its text output as Server-Sent Events.
+
+    Body as for /run (text format only). Every output line is sent as a "line"
+    event as soon as pwsh writes it; the last event is "end", carrying the /run
+    response without "output". Idle gaps get a keepalive comment every
+    SSE_HEARTBEAT seconds. If the client goes away the command still runs to
+    its end frame, so the worker stays in sync.
+    """
+    start = time.time()
+    data = request.get_json() or {}
+    module = data.get("module")
+    command = data.get("command")
+    caller_id = data.get("caller_id", "anonymous")
+    connection, error = _validate_run_request(data)
+    if not error and (data.get("format", "text") != "text" or data.get("store")):
+        error = "/run/stream returns text output only (use /run/ndjson for objects)"
+
+    logger.info(f"[HTTP] POST /run/stream connection={connection} module={module} caller={caller_id} command={command[:60] if command else 'None'}")
+
+    if error:
+        metrics.record_request(time.time() - start, error=True)
+        logger.warning(f"[HTTP] POST /run/stream rejected: {error}")
+        return jsonify({"status": "error", "error": error}), 400
+
+    # Output lines, then the response dict; run_command runs on its own thread
+    # so the generator can send keepalives while pwsh is silent
+    events = queue.Queue()
+    consumer_gone = threading.Event()
+
+    def on_line(line: str):
+        if not consumer_gone.is_set():
+            events.put(line)
+
+    def run():
+        try:
+            events.put(pool.run_command(connection, module, command, caller_id,
+                                        fresh=bool(data.get("fresh")), on_line=on_line))
+        except Exception as e:
+            events.put({"status": "error", "error": str(e)})
+
+    threading.Thread(target=run, daemon=True, name=f"stream-{connection}-{module}").start()
+
+    def generate():
+        status = "error"
+        streamed = 0
+        try:
+            while True:
+                try:
+                    item = events.get(timeout=SSE_HEARTBEAT)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if isinstance(item, dict):
+                    break
+                streamed += 1
+                yield sse_event("line", {"line": item})
+            status = item.get("status")
+            output = item.pop("output", None)
+            if output and not streamed:
+                # Cache hits never reach pwsh, so their lines are sent now
+                for line in output.splitlines():
+                    yield sse_event("line", {"line": line})
+            yield sse_event("end", item)
+        finally:
+            consumer_gone.set()
+            elapsed = time.time() - start
+            metrics.record_request(elapsed, error=status == "error")
+            if status == "auth_required":
+                metrics.record_auth()
+            logger.info(f"[HTTP] POST /run/stream connection={connection} module={module} -> status={status} elapsed={elapsed:.1f}s")
+
+    return Response(generate(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def _float_arg(value, default: float = 0.0) -> float:
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return default
+
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    """Submit a command as a job. Optional "wait" (seconds) returns early if it finishes."""
+    data = request.get_json() or {}
+    connection, error = _validate_run_request(data)
+    if not error:
+        options, error = _run_options(data)
+    if error:
+        return jsonify({"status": "error", "error": error}), 400
+
+    logger.info(f"[HTTP] POST /jobs connection={connection} module={data['module']} command={data['command'][:60]}")
+    job = jobs.submit(connection, data["module"], data["command"], data.get("caller_id", "anonymous"), **options)
+    if not job:
+        return jsonify({"status": "error", "error": f"Too many active jobs ({JOB_MAX_ACTIVE}). Retry shortly."}), 429
+
+    wait = _float_arg(data.get("wait"))
+    if wait:
+        jobs.wait(job, wait)
+    return jsonify(job.to_dict()), 200 if job.done else 202
+
+
+@app.route("/jobs", methods=["GET"])
+def list_jobs():
+    return jsonify({"jobs": jobs.summaries(request.args.get("connection"))})
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """Poll a job. ?offset=N returns output after line N; ?wait=S long-polls for completion."""
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({"status": "error", "error": f"Unknown or expired job: {job_id}"}), 404
+    wait = _float_arg(request.args.get("wait"))
+    if wait:
+        jobs.wait(job, wait)
+    return jsonify(job.to_dict(offset=int(_float_arg(request.args.get("offset")))))
+
+
+@app.route("/jobs/<job_id>/cancel", methods=["POST"])
+def cancel_job(job_id):
+    job = jobs.cancel(job_id)
+    if not job:
+        return jsonify({"status": "error", "error": f"Unknown or expired job: {job_id}"}), 404
+    jobs.wait(job, CANCEL_GRACE + 1)  # Interrupted commands stop quickly; stuck ones are killed after CANCEL_GRACE
+    return jsonify(job.to_dict(offset=int(_float_arg(request.args.get("offset")))))
+
+
+@app.route("/cancel", methods=["POST"])
+def cancel_command():
+    """Interrupt the command running on a session without killing its pwsh.
+
+    Body: connection, module, optional worker (index from /status; default all
+    busy workers). Waits up to CANCEL_GRACE + 1s for the commands to stop, so
+    elapsed_ms is the cancellation latency. The interrupted calls themselves
+    return status "cancelled" with their output so far.
+    """
+    data = request.get_json() or {}
+    connection = SINGLE_CONNECTION or data.get("connection")
+    module = data.get("module")
+    if not connection or module not in MODULES:
+        return jsonify({"status": "error", "error": "Missing connection or unknown module"}), 400
+    with pool.lock:
+        session = pool.sessions.get(f"{connection}/{module}")
+    if not session:
+        return jsonify({"status": "error", "error": f"No {module} session for {connection}"}), 404
+
+    start = time.time()
+    interrupted = session.cancel(data.get("worker"))
+    if not interrupted:
+        return jsonify({"status": "idle", "workers": []})
+    stopped = session.wait_cancelled(interrupted, CANCEL_GRACE + 1)
+    elapsed_ms = round((time.time() - start) * 1000)
+    logger.info(f"[HTTP] POST /cancel connection={connection} module={module} workers={interrupted} "
+                f"stopped={stopped} elapsed={elapsed_ms}ms")
+    return jsonify({"status": "cancelled", "workers": interrupted, "stopped": stopped, "elapsed_ms": elapsed_ms})
+
+
+@app.route("/handles", methods=["GET"])
+def list_handles():
+    """Result sets stored with store=true, per session."""
+    with pool.lock:
+        sessions = list(pool.sessions.values())
+    return jsonify({"handles": {
+        s.session_id: [h.to_dict() for h in list(s.handles.values())] for s in sessions if s.handles
+    }})
+
+
+@app.route("/handles/<handle_id>", methods=["POST"])
+def query_handle(handle_id):
+    """Page, filter or sort a result set stored by /run or /jobs with store=true.
+
+    Body: connection, module, and optional filter (Where-Object condition),
+    sort_by, descending, skip, limit, depth, properties.
+    """
+    start = time.time()
+    data = request.get_json() or {}
+    connection = SINGLE_CONNECTION or data.get("connection")
+    module = data.get("module")
+    if not connection or module not in MODULES:
+        error = "Missing connection or module"
+    elif not _HANDLE_ID_RE.match(handle_id):
+        error = f"Invalid handle: {handle_id}"
+    else:
+        error = validate_handle_query(data)
+    if error:
+        metrics.record_request(time.time() - start, error=True)
+        logger.warning(f"[HTTP] POST /handles/{handle_id} rejected: {error}")
+        return jsonify({"status": "error", "error": error}), 400
+
+    logger.info(f"[HTTP] POST /handles/{handle_id} connection={connection} module={module} filter={(data.get('filter') or '')[:60]}")
+    result = pool.query_handle(
+        connection, module, handle_id, data.get("caller_id", "anonymous"),
+        filter=data.get("filter"), sort_by=data.get("sort_by"), descending=bool(data.get("descending")),
+        skip=data.get("skip") or 0, limit=HANDLE_PAGE_SIZE if data.get("limit") is None else data["limit"],
+        json_depth=data.get("depth"), properties=data.get("properties"),
+    )
+    metrics.record_request(time.time() - start, error=result.get("status") == "error")
+    return jsonify(result)
+
+
+@app.route("/handles/<handle_id>", methods=["DELETE"])
+def release_handle(handle_id):
+    """Free a stored result set (?connection=&module=)."""
+    connection = SINGLE_CONNECTION or request.args.get("connection")
+    with pool.lock:
+        session = pool.sessions.get(f"{connection}/{request.args.get('module')}")
+    if not session or not session.release_handle(handle_id):
+        return jsonify({"status": "error", "error": f"Unknown or expired handle: {handle_id}"}), 404
+    return jsonify({"status": "released", "handle": handle_id})
+
+
 @app.route("/reset", methods=["POST"])
 def reset_connection():
     """Reset (kill + remove) sessions for a specific connection."""
@@ -1100,10 +3725,32 @@ def reset_connection():
 
 @app.route("/metrics", methods=["GET"])
 def get_metrics():
+    """JSON stats, or the command latency histograms as OpenMetrics text
+    (?format=openmetrics or an Accept header asking for it)."""
+    if (request.args.get("format") == "openmetrics"
+            or "application/openmetrics-text" in request.headers.get("Accept", "")):
+        return Response(metrics.render(), content_type="application/openmetrics-text; version=1.0.0; charset=utf-8")
+
     stats = metrics.get_stats()
     stats["sessions"] = pool.get_status()["sessions"]
     stats["active_sessions"] = len([s for s in stats["sessions"] if s["authenticated"]])
     stats["keepalive"] = keepalive.get_stats()
+    stats["jobs"] = jobs.get_stats()
+    stats["result_cache"] = result_cache.get_stats()
+    with pool.lock:
+        handles = [h for s in pool.sessions.values() for h in list(s.handles.values())]
+    stats["handles"] = {"count": len(handles), "estimated_bytes": sum(h.bytes for h in handles)}
+    stats["spare_pwsh"] = spare_pool.get_stats()
+    stats["gc"]["threshold_mb"] = GC_RSS_THRESHOLD_MB
+    workers = [w for s in stats["sessions"] for w in s["workers"]]
+    stats["workers"] = {
+        "count": len(workers),
+        "busy": sum(1 for w in workers if w["busy"]),
+        "queued": sum(s["queued"] for s in stats["sessions"]),
+        "min": SESSION_WORKERS_MIN,
+        "max": SESSION_WORKERS_MAX,
+        "rss_mb": round(sum(w["rss_mb"] or 0 for w in workers), 1),
+    }
     return jsonify(stats)
 
 